@@ -0,0 +1,340 @@
+"""
+JSON HTTP API for team evaluation, suggestions and generation.
+
+League datasets stay warm in the shared LeagueRefresher and the per-dataset
+lookup tables are built once, so a request only resolves names and runs the
+analysis. Requests are served on a thread per connection.
+
+    POST /evaluate  {"league": "1500", "team": ["medicham", "Azumarill"]}
+    POST /suggest   {"league": "1500", "team": [...], "top_n": 5}
+    POST /generate  {"league": "1500", "team": [...], "k": 5}
+    GET  /stats     request counts and latency percentiles per endpoint
+
+    python api_server.py [--host 127.0.0.1] [--port 8000]
+    python api_server.py loadtest [--url http://127.0.0.1:8000] [--requests 2000] [--concurrency 16]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from data_loader import DEFAULT_LEAGUE, is_league_id, rankings_name
+from refresher import get_refresher
+from result_cache import cached_search_teams, get_result_cache
+from search_index import get_search_index
+from team_logic import TeamAnalyzer
+
+LATENCY_WINDOW = 10000  # most recent requests kept per endpoint for percentiles
+MAX_BODY = 64 * 1024
+MAX_TOP_N = 20
+MAX_K = 10
+
+# Leagues the API serves. Every league is kept warm and refreshed for good,
+# so clients must not be able to add new ones; cups are enabled here, e.g.
+# PVPOKE_API_LEAGUES="1500,2500,10000,premier/1500"
+API_LEAGUES = tuple(
+    league.strip() for league in os.environ.get("PVPOKE_API_LEAGUES", "1500,2500,10000").split(",") if league.strip()
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyStats:
+    """Request counts and a sliding window of latencies per endpoint."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self._window = window
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, error=False):
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = deque(maxlen=self._window)
+                self._counts[endpoint] = 0
+                self._errors[endpoint] = 0
+            self._latencies[endpoint].append(seconds * 1000)
+            self._counts[endpoint] += 1
+            self._errors[endpoint] += bool(error)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        endpoints = {}
+        for endpoint, values in latencies.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            endpoints[endpoint] = {
+                "requests": counts[endpoint],
+                "errors": errors[endpoint],
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3)
+            }
+        return {"uptime_s": round(time.time() - self.started, 1), "endpoints": endpoints}
+
+
+def pokemon_summary(p):
+    summary = {
+        "speciesId": p["speciesId"],
+        "name": p["name"],
+        "types": list(p["types"]),
+        "rating": p["rating"],
+        "moves": list(p["recommended_moves_raw"])
+    }
+    if "match_score" in p:
+        summary["match_score"] = p["match_score"]
+    return summary
+
+
+class TeamService:
+    """The API operations, independent of HTTP."""
+
+    def __init__(self, refresher=None, leagues=API_LEAGUES):
+        self.refresher = refresher or get_refresher()
+        self.analyzer = TeamAnalyzer()
+        # rankings document -> canonical league id, so "all/1500" and "1500" are one league
+        self._leagues = {rankings_name(league): league for league in leagues}
+
+    def _league(self, body):
+        league = str(body.get("league") or DEFAULT_LEAGUE).strip().lower()
+        canonical = self._leagues.get(rankings_name(league)) if is_league_id(league) else None
+        if canonical is None:
+            raise ApiError(400, f"Unknown league {league}; available: {', '.join(self._leagues.values())}")
+        return canonical
+
+    def _dataset(self, body):
+        league = self._league(body)
+        dataset = self.refresher.dataset(league)
+        if not dataset.pokemon:
+            raise ApiError(503, f"No data available for league {league}")
+        # speciesId/name index, rebuilt only when the refresher swaps in a new dataset
+        return league, dataset, get_search_index(league, dataset.pokemon, dataset.version)
+
+    def _team(self, body, index):
+        team = body.get("team")
+        if not isinstance(team, list) or not team:
+            raise ApiError(400, '"team" must be a non-empty list of speciesIds or names')
+        members, unknown = index.resolve(team)
+        if unknown:
+            raise ApiError(400, f"Unknown Pokemon: {', '.join(map(str, unknown))}")
+        return members
+
+    def evaluate(self, body):
+        league, _, index = self._dataset(body)
+        team = self._team(body, index)
+        return {"league": league, **self.analyzer.evaluate_coverage(team)}
+
+    def suggest(self, body):
+        league, dataset, index = self._dataset(body)
+        team = self._team(body, index)
+        top_n = _clamp(body.get("top_n", 5), MAX_TOP_N)
+        suggestions = self.analyzer.suggest_teammate(team, dataset.pokemon, top_n=top_n, matchups=dataset.matchups)
+        return {"league": league, "suggestions": [pokemon_summary(p) for p in suggestions]}
+
+    def generate(self, body):
+        league, dataset, index = self._dataset(body)
+        team = self._team(body, index)
+        if len(team) > 2:
+            raise ApiError(400, "Give 1 or 2 Pokemon to generate a team")
+        # The version of the very dataset searched, so results are never cached under a newer one
+        result = cached_search_teams(
+            self.analyzer, team, dataset.pokemon, league, dataset.version,
+            k=_clamp(body.get("k", 5), MAX_K), matchups=dataset.matchups
+        )
+        return {
+            "league": league,
+            "complete": result["complete"],
+            "cached": result.get("cached", False),
+            "teams": [
+                {
+                    "members": [pokemon_summary(p) for p in t["members"]],
+                    "score": t["score"],
+                    "analysis": self.analyzer.evaluate_coverage(t["members"])
+                }
+                for t in result["teams"]
+            ]
+        }
+
+
+def _clamp(value, maximum):
+    return min(max(int(value), 1), maximum)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "PvPTeamAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    routes = {
+        ("POST", "/evaluate"): "evaluate",
+        ("POST", "/suggest"): "suggest",
+        ("POST", "/generate"): "generate",
+        ("GET", "/stats"): None
+    }
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        start = time.perf_counter()
+        path = self.path.split("?", 1)[0]
+        status = 200
+        self._body_read = False
+        try:
+            if "Transfer-Encoding" in self.headers:
+                # Chunked bodies are not decoded; reading one as empty would leave
+                # the chunks to be parsed as the next request
+                raise ApiError(411, "Transfer-Encoding is not supported; send a Content-Length")
+            if (method, path) not in self.routes:
+                raise ApiError(404, f"No route for {method} {path}")
+            operation = self.routes[(method, path)]
+            if operation is None:
+                payload = {**self.server.stats.snapshot(), "result_cache": get_result_cache().stats()}
+            else:
+                payload = getattr(self.server.service, operation)(self._body())
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (ValueError, TypeError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"Internal error: {e}"}
+
+        # An unread body (unknown route, oversized, chunked or bad length) would be
+        # parsed as the next request on this keep-alive connection, so the
+        # connection ends with the response
+        if not self._body_read and self._has_body():
+            self.close_connection = True
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.stats.record(f"{method} {path}", time.perf_counter() - start, error=status >= 400)
+
+    def _has_body(self):
+        return self.headers.get("Content-Length", "0").strip() != "0" or "Transfer-Encoding" in self.headers
+
+    def _body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ApiError(400, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise ApiError(413, "Request body too large")
+        data = self.rfile.read(length)
+        if len(data) != length:
+            raise ApiError(400, "Request body shorter than its Content-Length")
+        self._body_read = True
+        body = json.loads(data or b"{}")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate latency under load; /stats covers it
+        pass
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections under concurrent load
+    request_queue_size = 128
+
+
+def make_server(host="127.0.0.1", port=8000, service=None):
+    server = ApiServer((host, port), ApiHandler)
+    server.service = service or TeamService()
+    server.stats = LatencyStats()
+    return server
+
+
+def load_test(url, requests=2000, concurrency=16, league=DEFAULT_LEAGUE):
+    """Sends mixed /evaluate, /suggest and /generate requests and prints client-side latencies."""
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.request import Request, urlopen
+
+    from data_loader import load_data
+
+    ids = [p["speciesId"] for p in load_data(league)[:50]]
+    if len(ids) < 3:
+        print("Not enough Pokemon for a load test")
+        return
+    endpoints = ["/evaluate", "/suggest", "/generate"]
+
+    def call(i):
+        endpoint = endpoints[i % len(endpoints)]
+        team = [ids[i % len(ids)]] if endpoint == "/generate" else [ids[i % len(ids)], ids[(i * 7 + 1) % len(ids)]]
+        body = json.dumps({"league": league, "team": team}).encode("utf-8")
+        start = time.perf_counter()
+        with urlopen(Request(url + endpoint, data=body, headers={"Content-Type": "application/json"})) as response:
+            response.read()
+        return endpoint, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{requests} requests in {elapsed:.2f} s ({requests / elapsed:.0f} req/s, concurrency {concurrency})")
+    for endpoint in endpoints:
+        values = np.array([ms for e, ms in results if e == endpoint])
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        print(f"  {endpoint}: p50 {p50:.2f} ms, p90 {p90:.2f} ms, p99 {p99:.2f} ms")
+
+
+def main(argv):
+    if argv and argv[0] == "loadtest":
+        parser = argparse.ArgumentParser(description="Load test a running API server.")
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--league", default=DEFAULT_LEAGUE)
+        args = parser.parse_args(argv[1:])
+        load_test(args.url.rstrip("/"), args.requests, args.concurrency, args.league)
+        return 0
+
+    parser = argparse.ArgumentParser(description="Serve the team analysis JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    service = TeamService()
+    # Warm every default league before accepting requests
+    for league in API_LEAGUES:
+        service.refresher.get(league)
+    server = make_server(args.host, args.port, service)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
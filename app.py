@@ -1,28 +1,47 @@
 import streamlit as st
-import data_loader
-from data_loader import TYPE_ICONS
+from icon_assets import get_icon_table
+from refresher import get_refresher
+from result_cache import cached_search_teams
+from search_index import get_search_index
+from sprite_cache import get_sprite_cache
 from team_logic import TeamAnalyzer
 from ai_config import SYSTEM_PROMPT
-import base64
-
-# Helper to load SVG as base64
-def get_svg_base64(file_path):
-    try:
-        with open(file_path, "r") as f:
-            svg_data = f.read()
-        b64_data = base64.b64encode(svg_data.encode("utf-8")).decode("utf-8")
-        return f"data:image/svg+xml;base64,{b64_data}"
-    except Exception:
-        return ""
+import html
+
+def icon_html(type_name, size=20):
+    """Inline type icon (see icon_assets), or an empty string if the type has none."""
+    return icons.icon(type_name, size)
 
 def render_type_with_icon(type_name):
     """Renders a type name with its icon inline."""
-    icon_path = TYPE_ICONS.get(type_name.lower())
-    if icon_path:
-        icon_b64 = get_svg_base64(icon_path)
-        if icon_b64:
-            return f'<img src="{icon_b64}" width="20" style="vertical-align:middle; margin-right:5px;">{type_name.title()}'
-    return type_name.title()
+    return icon_html(type_name) + type_name.title()
+
+def render_card(role, p, substitutes=()):
+    """
+    HTML of one team card, rendered with a single st.markdown call.
+
+    Args:
+        role (str): Lead, Switch or Closer.
+        p (dict): Pokemon dictionary (as returned by data_loader).
+        substitutes (list): Similar Pokemon to offer when the user lacks this one.
+    """
+    types = " ".join(render_type_with_icon(t) for t in p["types"])
+    moves = []
+    for move_name, move_icon_path in zip(p["recommended_moves"], p["move_type_icons"]):
+        icon = icon_html(icons.type_for_path(move_icon_path), size=15)
+        moves.append(f"{icon} {html.escape(move_name)}" if icon else f"- {html.escape(move_name)}")
+
+    card = (
+        f"### {role}\n\n"
+        f'<img src="{sprites.image_src(p["speciesId"])}" style="width:100%;">\n\n'
+        f"**{html.escape(p['name'])}**\n\n"
+        f"{types}\n\n"
+        f'<span style="opacity:0.6; font-size:0.875rem;">Rating: {p["rating"]}</span>\n\n'
+    )
+    if substitutes:
+        names = html.escape(", ".join(s["name"] for s in substitutes))
+        card += f'<span style="opacity:0.6; font-size:0.875rem;">¿No lo tienes? Alternativas: {names}</span>\n\n'
+    return card + "**Movimientos:**\n\n" + "<br>".join(moves)
 
 # Set page config
 st.set_page_config(
@@ -32,9 +51,23 @@ st.set_page_config(
 )
 
 # Load data
-@st.cache_data
-def get_data(league_code):
-    return data_loader.load_data(league_code)
+# League datasets are kept warm by a background refresher shared by all
+# sessions, so reruns never wait on pvpoke downloads. Every session reads the
+# same frozen dataset object; nothing is copied per rerun.
+@st.cache_resource
+def get_league_refresher():
+    return get_refresher()
+
+# Type icons are read once per process and re-checked at most every
+# icon_assets.CHECK_INTERVAL seconds, so an edited icon shows up without a
+# restart while most reruns do no file I/O; the page gets their stylesheet
+# once and cards just reference its classes
+icons = get_icon_table(check=True)
+st.markdown(icons.stylesheet(), unsafe_allow_html=True)
+
+# Sprites come from the local thumbnail store (see sprite_cache prefetch),
+# falling back to the remote sprite URL for any not fetched yet
+sprites = get_sprite_cache()
 
 # Title and Intro
 st.title("🏆 Agente PvP: Constructor de Equipos")
@@ -59,153 +92,181 @@ league_map = {
 selected_league_name = st.selectbox("Selecciona la Liga:", list(league_map.keys()))
 league_code = league_map[selected_league_name]
 
-all_pokemon = get_data(league_code)
 analyzer = TeamAnalyzer()
 
+# One read of the current dataset: every fragment below works on this version
+dataset = get_league_refresher().dataset(league_code)
+if dataset.version:
+    st.caption(f"Datos pvpoke versión {dataset.version[:8]} · actualizados hace {int(dataset.age // 60)} min")
+
 # Main Interface
-# Layout: Vertical for better mobile responsiveness
-st.subheader("1. Selecciona tus Pokémon")
-pokemon_names = [p["name"] for p in all_pokemon]
-selected_names = st.multiselect(
-    "Elige 1 o 2 Pokémon:",
-    options=pokemon_names,
-    max_selections=2,
-    help="Empieza con tu favorito o el núcleo de tu equipo."
-)
+# The selection and the results are fragments: picking Pokemon, generating a
+# team or switching between alternatives reruns only the fragment involved,
+# not the league selector and data lookup above.
+@st.fragment
+def team_builder(league_code, dataset):
+    # Layout: Vertical for better mobile responsiveness
+    st.subheader("1. Selecciona tus Pokémon")
+    all_pokemon, version = dataset.pokemon, dataset.version
+    # Name lookups and fuzzy search, built once per data version
+    index = get_search_index(league_code, all_pokemon, version)
+    query = st.text_input("Buscar:", placeholder="Nombre, tipo o forma (p. ej. \"azu\", \"fuego\", \"sombra\")")
 
-selected_pokemon = [p for p in all_pokemon if p["name"] in selected_names]
+    # A search narrows the options; current picks always stay selectable
+    picker_key = f"seed_names_{league_code}"
+    pokemon_names = index.names
+    if query.strip():
+        current = st.session_state.get(picker_key, [])
+        pokemon_names = list(current) + [p["name"] for p in index.search(query, limit=50) if p["name"] not in current]
+    selected_names = st.multiselect(
+        "Elige 1 o 2 Pokémon:",
+        options=pokemon_names,
+        max_selections=2,
+        key=picker_key,
+        help="Empieza con tu favorito o el núcleo de tu equipo."
+    )
 
-generate_btn = st.button("Generar Equipo Completo", type="primary", disabled=len(selected_pokemon) == 0)
+    selected_pokemon, _ = index.resolve(selected_names)
 
-if generate_btn and selected_pokemon:
+    generate_btn = st.button("Generar Equipo Completo", type="primary", disabled=len(selected_pokemon) == 0)
+
+    # Search results survive reruns (e.g. picking an alternative) until the selection changes
+    search_key = (league_code, tuple(selected_names))
+
+    if generate_btn and selected_pokemon:
+        with st.spinner("Analizando el meta y buscando sinergias..."):
+            # Find the best completions of the team within a fixed time budget
+            # (shared across sessions and restarts through the result cache)
+            st.session_state["team_search"] = (
+                search_key,
+                cached_search_teams(
+                    analyzer, selected_pokemon, all_pokemon, league_code, version, k=5, matchups=dataset.matchups
+                )
+            )
+
+    team_search_state = st.session_state.get("team_search")
+    if selected_pokemon and team_search_state and team_search_state[0] == search_key:
+        team_results(dataset, selected_pokemon, team_search_state[1]["teams"])
+    elif generate_btn and not selected_pokemon:
+        st.error("Por favor selecciona al menos 1 Pokémon.")
+
+@st.fragment
+def team_results(dataset, selected_pokemon, teams):
+    # Matchups, substitutes and movesets were built with the dataset by the
+    # refresher, so rendering never parses snapshots or builds indexes
     st.divider()
     st.subheader("2. Análisis y Sugerencia")
-    
-    with st.spinner("Analizando el meta y buscando sinergias..."):
-        # Suggest teammates
-        current_team = selected_pokemon.copy()
-        suggestions = []
-        
-        while len(current_team) < 3:
-            # Find best teammate
-            candidates = analyzer.suggest_teammate(current_team, all_pokemon, top_n=1)
-            if candidates:
-                best_pick = candidates[0]
-                current_team.append(best_pick)
-                suggestions.append(best_pick)
-            else:
-                st.warning("No se encontraron candidatos adecuados para completar el equipo.")
-                break
-        
-        # Display the suggested team
-        st.success("¡Equipo Generado!")
-        
-        def get_image_url(species_id):
-            # Remove _shadow suffix
-            if species_id.endswith("_shadow"):
-                species_id = species_id[:-7]
-            
-            # Replace underscores with hyphens
-            species_id = species_id.replace("_", "-")
-            
-            return f"https://img.pokemondb.net/sprites/home/normal/{species_id}.png"
-
-        # Show the team cards
-        cols = st.columns(3)
-        for i, p in enumerate(current_team):
-            role = "Lead" if i == 0 else ("Switch" if i == 1 else "Closer")
-            with cols[i]:
-                with st.container(border=True):
-                    st.markdown(f"### {role}")
-                    st.image(get_image_url(p['speciesId']), use_container_width=True)
-                    
-
-# ... (inside the loop)
-                    # Name and Types with Icons
-                    # Use HTML to display SVG icons inline
-                    type_html = ""
-                    for t, icon_path in zip(p['types'], p['type_icons']):
-                        if icon_path:
-                            icon_b64 = get_svg_base64(icon_path)
-                            if icon_b64:
-                                type_html += f'<img src="{icon_b64}" width="20" style="vertical-align:middle; margin-right:5px;">{t.title()} '
-                            else:
-                                type_html += f'{t.title()} '
-                        else:
-                            type_html += f'{t.title()} '
-                            
-                    st.markdown(f"**{p['name']}**")
-                    st.markdown(type_html, unsafe_allow_html=True)
-                    
-                    st.caption(f"Rating: {p['rating']}")
-                    
-                    st.markdown("**Movimientos:**")
-                    # Display moves with icons
-                    for move_name, move_icon_path in zip(p['recommended_moves'], p['move_type_icons']):
-                        if move_icon_path:
-                            icon_b64 = get_svg_base64(move_icon_path)
-                            if icon_b64:
-                                st.markdown(f'<img src="{icon_b64}" width="15" style="vertical-align:middle; margin-right:5px;"> {move_name}', unsafe_allow_html=True)
-                            else:
-                                st.text(f"- {move_name}")
-                        else:
-                            st.text(f"- {move_name}")
-        
-        # Analyze the full team
-        analysis = analyzer.evaluate_coverage(current_team)
-        
-        st.divider()
-        
-        # Display Analysis
-        st.markdown("### 📊 Reporte de Sinergia")
-        
-        # Metrics
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Puntaje de Seguridad", f"{analysis['safety_score']}/100")
-        m2.metric("Debilidades Compartidas", len(analysis['shared_weaknesses']), delta_color="inverse")
-        m3.metric("Tipos sin Cobertura", len(analysis['uncovered_types']), delta_color="inverse")
-        
-        # Detailed breakdown
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("#### ⚠️ Alertas de Debilidad")
-            if analysis['shared_weaknesses']:
-                for w in analysis['shared_weaknesses']:
-                    st.markdown(f"El equipo es débil a: {render_type_with_icon(w)}", unsafe_allow_html=True)
-            else:
-                st.success("¡No hay debilidades compartidas graves!")
-                
-        with c2:
-            st.markdown("#### ⚔️ Cobertura Ofensiva")
-            if analysis['uncovered_types']:
-                # st.warning(f"No tienes daño súper efectivo contra: {', '.join([t.upper() for t in analysis['uncovered_types']])}")
-                st.markdown("No tienes daño súper efectivo contra:")
-                cols = st.columns(3)
-                for i, t in enumerate(analysis['uncovered_types']):
-                    with cols[i % 3]:
-                        st.markdown(render_type_with_icon(t), unsafe_allow_html=True)
-            else:
-                st.success("¡Cobertura ofensiva perfecta!")
-
-        # AI Commentary (Simulated)
-        st.divider()
-        st.markdown("### 💬 Comentarios del Entrenador (IA)")
-        
-        commentary = f"""
-        > "¡Excelente elección de base con **{', '.join(selected_names)}**!
-        >
-        > He añadido a **{', '.join([s['name'] for s in suggestions])}** para completar el trío.
-        >
-        > **¿Por qué?**
-        > {suggestions[0]['name'] if suggestions else ''} aporta una cobertura clave y ayuda a mitigar las debilidades del equipo. 
-        > Con un puntaje de seguridad de **{analysis['safety_score']}**, este equipo tiene un buen equilibrio para la Liga Super.
-        >
-        > **Estrategia:**
-        > Usa a **{current_team[0]['name']}** como Lead para presionar escudos temprano. 
-        > Si te encuentras en un mal matchup, **{current_team[1]['name']}** es tu cambio seguro.
-        > Guarda a **{current_team[2]['name']}** para cerrar la partida cuando los escudos estén bajos."
-        """
-        st.info(commentary)
-
-elif generate_btn and not selected_pokemon:
-    st.error("Por favor selecciona al menos 1 Pokémon.")
+
+    if not teams:
+        st.warning("No se encontraron candidatos adecuados para completar el equipo.")
+        return
+
+    choice = 0
+    if len(teams) > 1:
+        choice = st.radio(
+            "Alternativas encontradas:",
+            range(len(teams)),
+            format_func=lambda i: f"{i + 1}. {' + '.join(p['name'] for p in teams[i]['additions'])} (puntaje {teams[i]['score']:.1f})"
+        )
+    current_team = teams[choice]["members"]
+    suggestions = teams[choice]["additions"]
+
+    # Display the suggested team
+    st.success("¡Equipo Generado!")
+
+    # Substitutes for suggested members the user may not own
+    similarity = dataset.similarity
+    team_ids = [m['speciesId'] for m in current_team]
+
+    # Show the team cards, one render each
+    cols = st.columns(3)
+    for i, p in enumerate(current_team):
+        role = "Lead" if i == 0 else ("Switch" if i == 1 else "Closer")
+        substitutes = similarity.similar(p['speciesId'], k=3, exclude=team_ids) if similarity and i >= len(selected_pokemon) else []
+        with cols[i]:
+            with st.container(border=True):
+                st.markdown(render_card(role, p, substitutes), unsafe_allow_html=True)
+
+    # Analyze the full team
+    analysis = analyzer.evaluate_coverage(current_team)
+
+    st.divider()
+
+    # Display Analysis
+    st.markdown("### 📊 Reporte de Sinergia")
+
+    # Metrics
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Puntaje de Seguridad", f"{analysis['safety_score']}/100")
+    m2.metric("Debilidades Compartidas", len(analysis['shared_weaknesses']), delta_color="inverse")
+    m3.metric("Tipos sin Cobertura", len(analysis['uncovered_types']), delta_color="inverse")
+
+    # Simulated matchups against the meta, when the league's battle matrix has been built
+    matchups = analyzer.evaluate_matchups(current_team, dataset.battles) if dataset.battles else {}
+    if matchups:
+        st.caption(f"Simulación con 1 escudo: el equipo gana a {matchups['wins']} de {matchups['opponents']} rivales del meta "
+                   f"(rating medio {matchups['average_rating']})")
+
+    # Detailed breakdown
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### ⚠️ Alertas de Debilidad")
+        if analysis['shared_weaknesses']:
+            st.markdown("<br>".join(f"El equipo es débil a: {render_type_with_icon(w)}" for w in analysis['shared_weaknesses']),
+                        unsafe_allow_html=True)
+        else:
+            st.success("¡No hay debilidades compartidas graves!")
+
+    with c2:
+        st.markdown("#### ⚔️ Cobertura Ofensiva")
+        if analysis['uncovered_types']:
+            # st.warning(f"No tienes daño súper efectivo contra: {', '.join([t.upper() for t in analysis['uncovered_types']])}")
+            # Uncovered types in a three-column grid, rendered at once
+            cells = "".join(f"<div>{render_type_with_icon(t)}</div>" for t in analysis['uncovered_types'])
+            st.markdown("No tienes daño súper efectivo contra:\n\n"
+                        f'<div style="display:grid; grid-template-columns:repeat(3, 1fr); gap:0.25rem;">{cells}</div>',
+                        unsafe_allow_html=True)
+
+            # Alternative movesets from each member's full move pool
+            moveset_tips = analyzer.suggest_movesets(current_team, dataset.movesets) if dataset.movesets else []
+            if moveset_tips:
+                lines = []
+                for tip in moveset_tips:
+                    covers = ", ".join(render_type_with_icon(t) for t in tip['covers'])
+                    lines.append(f"{html.escape(tip['name'])}: {html.escape(' / '.join(tip['move_names']))} → cubre {covers}")
+                st.markdown("**Movimientos alternativos para cubrir huecos:**\n\n" + "<br>".join(lines), unsafe_allow_html=True)
+        else:
+            st.success("¡Cobertura ofensiva perfecta!")
+
+    # Top meta threats the team has no winning answer to (pvpoke rankings matchups)
+    if dataset.matchups is not None:
+        threats = analyzer.threat_report(current_team, dataset.matchups)
+        if threats['unanswered']:
+            st.markdown("#### 🎯 Amenazas del Meta\n\n"
+                        f"El equipo responde a {len(threats['answered'])} de las {threats['threats']} principales amenazas. Sin respuesta clara:\n\n"
+                        + ", ".join(t['name'] for t in threats['unanswered']))
+        else:
+            st.markdown("#### 🎯 Amenazas del Meta")
+            st.success(f"¡El equipo tiene respuesta para las {threats['threats']} principales amenazas!")
+
+    # AI Commentary (Simulated)
+    st.divider()
+    st.markdown("### 💬 Comentarios del Entrenador (IA)")
+
+    commentary = f"""
+    > "¡Excelente elección de base con **{', '.join(p['name'] for p in selected_pokemon)}**!
+    >
+    > He añadido a **{', '.join([s['name'] for s in suggestions])}** para completar el trío.
+    >
+    > **¿Por qué?**
+    > {suggestions[0]['name'] if suggestions else ''} aporta una cobertura clave y ayuda a mitigar las debilidades del equipo.
+    > Con un puntaje de seguridad de **{analysis['safety_score']}**, este equipo tiene un buen equilibrio para la Liga Super.
+    >
+    > **Estrategia:**
+    > Usa a **{current_team[0]['name']}** como Lead para presionar escudos temprano.
+    > Si te encuentras en un mal matchup, **{current_team[1]['name']}** es tu cambio seguro.
+    > Guarda a **{current_team[2]['name']}** para cerrar la partida cuando los escudos estén bajos."
+    """
+    st.info(commentary)
+
+team_builder(league_code, dataset)
@@ -0,0 +1,278 @@
+"""
+Headless batch team evaluation.
+
+Streams teams from a CSV or JSONL file, resolves each member to the league
+dataset (by speciesId or display name, like the API; see search_index), runs
+evaluate_coverage plus teammate suggestions (rewarding answers to meta
+threats when the rankings snapshot has matchups) on a process pool and writes one
+result per team, in input order, as soon as it is ready. Only a bounded number
+of chunks is in flight, so memory stays flat for any input size.
+
+Input:
+    JSONL  one team per line: a list of members, or an object with "team"
+           (or "members") and optional "id" and "league"
+    CSV    a header row; optional "id" and "league" columns, every other
+           non-empty cell is a member
+
+    python batch_eval.py teams.csv -o results.jsonl --league 1500 --workers 8
+    python batch_eval.py teams.jsonl --offline        # local snapshots only
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from data_loader import DEFAULT_LEAGUE, get_matchup_matrix, is_league_id, load_league, rankings_name
+from search_index import get_search_index
+from snapshot_cache import get_store
+from team_logic import CandidatePool, TeamAnalyzer
+
+CHUNK_SIZE = 256  # teams per task
+REPORT_INTERVAL = 5  # seconds between progress lines
+RESERVED_COLUMNS = ("id", "league")
+RESULT_FIELDS = (
+    "id", "league", "members", "unresolved", "shared_weaknesses",
+    "uncovered_types", "safety_score", "suggestions", "error"
+)
+
+
+def read_teams(path, input_format=None):
+    """
+    Yields {"id", "league", "members"} for every team in a CSV or JSONL file
+    ("-" reads standard input). The format defaults to the file extension.
+    JSONL lines that are not valid teams and CSV rows with more cells than
+    the header are yielded with an "error" instead.
+    """
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if input_format == "csv":
+            for line_number, row in enumerate(csv.DictReader(f), start=1):
+                # DictReader puts cells beyond the header under None; a row
+                # that does not fit the header becomes an error row
+                if None in row:
+                    yield {"id": row.get("id") or line_number, "league": None, "members": [],
+                           "error": f"Row has {len(row) - 1 + len(row[None])} cells, the header has {len(row) - 1}"}
+                    continue
+                yield {
+                    "id": row.get("id") or line_number,
+                    "league": row.get("league") or None,
+                    "members": [v.strip() for k, v in row.items() if k not in RESERVED_COLUMNS and v and v.strip()]
+                }
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                # A bad line becomes an error row; it must not end the run
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    yield {"id": line_number, "league": None, "members": [], "error": f"Invalid JSON: {e}"}
+                    continue
+                if isinstance(entry, list):
+                    entry = {"team": entry}
+                if not isinstance(entry, dict):
+                    yield {"id": line_number, "league": None, "members": [], "error": "Expected a list or an object"}
+                    continue
+                members = entry.get("team") or entry.get("members") or []
+                if not isinstance(members, list):
+                    yield {"id": entry.get("id", line_number), "league": None, "members": [],
+                           "error": '"team" must be a list'}
+                    continue
+                yield {
+                    "id": entry.get("id", line_number),
+                    "league": entry.get("league"),
+                    "members": members
+                }
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, result):
+        self.f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    """Flattens list fields to ";"-separated cells."""
+
+    def __init__(self, f):
+        self.writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, result):
+        self.writer.writerow({
+            key: ";".join(map(str, value)) if isinstance(value, list) else value
+            for key, value in result.items()
+        })
+
+
+# Per-process state: the analyzer and the league datasets loaded so far
+_worker = {}
+
+
+def _init_worker(default_league, suggestions):
+    _worker.update(default_league=default_league, suggestions=suggestions, analyzer=TeamAnalyzer(), leagues={})
+
+
+def _league(league):
+    """
+    (dataset, SpeciesIndex, MatchupMatrix or None) of a league, built from
+    local snapshots on first use. Leagues are keyed by their rankings
+    document, so "1500" and "all/1500" load once.
+    """
+    leagues = _worker["leagues"]
+    key = rankings_name(league)
+    if key not in leagues:
+        store = get_store().offline_view()
+        # Loader progress goes to stderr so it never mixes with results on stdout
+        with redirect_stdout(sys.stderr):
+            pokemon, version, _ = load_league(league, store=store)
+            try:
+                matchups = get_matchup_matrix(league, store)
+            except Exception as e:
+                print(f"No matchup matrix for league {league}: {e}")
+                matchups = None
+        # The worker holds the pool, so suggestions reuse its columns
+        pool = CandidatePool.register(CandidatePool(pokemon))
+        leagues[key] = (pokemon, get_search_index(key, pokemon, version), matchups, pool)
+    return leagues[key][:3]
+
+
+def evaluate_team(team):
+    """Evaluates one team read by read_teams; never raises."""
+    league = str(team["league"] or _worker["default_league"]).strip().lower()
+    result = {"id": team["id"], "league": league}
+    if team.get("error"):
+        result["error"] = team["error"]
+        return result
+    # rankings_name would quietly fall back to the Great League
+    if not is_league_id(league):
+        result["error"] = f"Unknown league {league}"
+        return result
+    pokemon, index, matchups = _league(league)
+    if not pokemon:
+        result["error"] = f"No data for league {league}"
+        return result
+
+    members, unresolved = index.resolve(team["members"])
+    result["members"] = [p["name"] for p in members]
+    result["unresolved"] = unresolved
+    if not members:
+        result["error"] = "No known members"
+        return result
+
+    analyzer = _worker["analyzer"]
+    analysis = analyzer.evaluate_coverage(members)
+    result["shared_weaknesses"] = analysis["shared_weaknesses"]
+    result["uncovered_types"] = analysis["uncovered_types"]
+    result["safety_score"] = analysis["safety_score"]
+    if _worker["suggestions"]:
+        suggested = analyzer.suggest_teammate(members, pokemon, top_n=_worker["suggestions"], matchups=matchups)
+        result["suggestions"] = [p["name"] for p in suggested]
+    return result
+
+
+def evaluate_chunk(teams):
+    return [evaluate_team(team) for team in teams]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(teams, writer, league=DEFAULT_LEAGUE, workers=None, suggestions=3, chunk_size=CHUNK_SIZE, log=sys.stderr):
+    """
+    Evaluates an iterable of teams and writes results in input order.
+
+    Returns:
+        int: Number of teams written.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = last_report = time.perf_counter()
+    written = 0
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = written / elapsed if elapsed > 0 else 0.0
+        label = "Done" if final else "Progress"
+        print(f"{label}: {written} teams in {elapsed:.1f} s ({rate:.0f} teams/s)", file=log)
+
+    def emit(results):
+        nonlocal written, last_report
+        for result in results:
+            writer.write(result)
+        written += len(results)
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            last_report = time.perf_counter()
+            report()
+
+    if workers == 1:
+        _init_worker(league, suggestions)
+        for chunk in _chunks(teams, chunk_size):
+            emit(evaluate_chunk(chunk))
+    else:
+        # At most two chunks per worker are pending, so reading never runs far ahead of writing
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(league, suggestions)) as executor:
+            for chunk in _chunks(teams, chunk_size):
+                pending.append(executor.submit(evaluate_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+
+    report(final=True)
+    return written
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Evaluate teams in bulk from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL file, or - for standard input")
+    parser.add_argument("-o", "--output", default="-", help="Output file (.csv or .jsonl); standard output by default")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Input format (default: from the extension)")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE, help="League for rows without a league column")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--suggestions", type=int, default=3, help="Teammate suggestions per team (0 to skip)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--offline", action="store_true", help="Never contact pvpoke; use local snapshots only")
+    args = parser.parse_args(argv)
+
+    # Fetch (or, offline, just check) the default league's snapshots once, so
+    # workers can build their datasets from local files
+    store = get_store().offline_view() if args.offline else get_store()
+    with redirect_stdout(sys.stderr):
+        pokemon, version, _ = load_league(args.league, store=store)
+    if not pokemon:
+        print(f"No data available for league {args.league}", file=sys.stderr)
+        return 1
+    print(f"League {args.league} data version {version}", file=sys.stderr)
+
+    output_csv = args.output.lower().endswith(".csv")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = CsvWriter(out) if output_csv else JsonlWriter(out)
+        run(read_teams(args.input, args.format), writer, args.league, args.workers, args.suggestions, args.chunk_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,354 @@
+"""
+Deterministic 1v1 PvP battle simulator.
+
+All pairings of a league's top species are simulated together: every battle
+is one lane of a set of numpy state arrays (HP, energy, shields, fast move
+timers), and each 500 ms turn advances every lane at once. Pairings are split
+across a process pool in fixed chunks, so results do not depend on the number
+of workers.
+
+Battle model (shared by every pairing):
+    - Each side uses its pvpoke recommended moveset and the rank 1 IV spread
+      for the league's CP cap (see iv_engine); shadows get x1.2 attack and
+      x5/6 defense.
+    - Damage = floor(0.5 * power * attack / defense * STAB * effectiveness * 1.3) + 1,
+      with GO effectiveness multipliers (see type_engine.GO_EFFECTIVENESS).
+    - A side throws a charged move as soon as it can afford one: the cheapest
+      while the opponent has shields (bait), the strongest otherwise. Shields
+      are always used while available. Simultaneous charged moves resolve by
+      attack stat (ties favour the row species).
+    - Battle rating = 500 * damage dealt / opponent HP + 500 * HP left / own HP,
+      so 500 is a tie and anything above is a win.
+
+Matrices (one per 0/1/2 shield scenario) are saved per league data version.
+
+    python battle_sim.py build [league ...]
+    python battle_sim.py <league> <speciesId> <speciesId>
+"""
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_loader import gamemaster_for, load_league
+from iv_engine import CPM, get_iv_table
+from snapshot_cache import CACHE_DIR, atomic_write
+from type_engine import GO_EFFECTIVENESS, TYPE_INDEX
+
+BATTLE_DIR = os.environ.get("PVPOKE_BATTLE_DIR", os.path.join(os.path.dirname(CACHE_DIR) or ".", "battles"))
+META_SIZE = 100
+SHIELD_SCENARIOS = (0, 1, 2)
+MAX_TURNS = 480  # 4 minute battle timer
+MAX_ENERGY = 100
+PVP_BONUS = 1.3
+STAB = 1.2
+SHADOW_ATTACK = 1.2
+SHADOW_DEFENSE = 5 / 6
+CHUNK_SIZE = 2048  # pairings per task
+
+_GO_EFFECTIVENESS = np.array(GO_EFFECTIVENESS)
+
+
+class Combatants:
+    """Column arrays describing each meta species as a battler."""
+
+    def __init__(self, pokemon, gamemaster, iv_table):
+        self.species_ids = []
+        attack, defense, hp, defender_types = [], [], [], []
+        fast, charged = [], []
+        for p in pokemon:
+            species_id = p["speciesId"]
+            moveset = list(p["recommended_moves_raw"])
+            stats = gamemaster.base_stats.get(species_id)
+            if stats is None or species_id not in iv_table or len(moveset) < 2:
+                continue
+            moves = [_move(gamemaster, m, p["types"]) for m in moveset]
+            if None in moves[:2]:
+                continue
+            charged_moves = [m for m in moves[1:3] if m is not None]
+
+            top = iv_table.top(species_id, 1)
+            if not top:
+                # Over the league's CP cap with any IVs
+                continue
+            best = top[0]
+            ivs = best["ivs"]
+            cpm = CPM[int((best["level"] - 1) * 2)]
+            atk = (stats[0] + ivs[0]) * cpm
+            dfn = (stats[1] + ivs[1]) * cpm
+            if species_id.endswith("_shadow"):
+                atk *= SHADOW_ATTACK
+                dfn *= SHADOW_DEFENSE
+
+            self.species_ids.append(species_id)
+            attack.append(atk)
+            defense.append(dfn)
+            hp.append(max(10, int((stats[2] + ivs[2]) * cpm)))
+            defender_types.append([TYPE_INDEX[t] for t in p["types"] if t in TYPE_INDEX])
+            fast.append(moves[0])
+            # Species with one charged move carry it in both slots
+            charged.append(charged_moves + charged_moves[:1] * (2 - len(charged_moves)))
+
+        self.attack = np.array(attack)
+        self.defense = np.array(defense)
+        self.hp = np.array(hp, dtype=np.float64)
+        # Effectiveness of every attacking type against each species
+        self.effectiveness = np.ones((len(_GO_EFFECTIVENESS), len(self.species_ids)))
+        for i, types in enumerate(defender_types):
+            for t in types:
+                self.effectiveness[:, i] *= _GO_EFFECTIVENESS[:, t]
+        # Moves as (type, power * STAB, energy, energy gain, turns) columns
+        self.fast = np.array(fast, dtype=np.float64).reshape(-1, 5)
+        self.charged = np.array(charged, dtype=np.float64).reshape(-1, 2, 5)
+
+
+def _move(gamemaster, move_id, species_types):
+    stats = gamemaster.move_stats.get(move_id)
+    move_type = gamemaster.moves_map.get(move_id)
+    if stats is None or move_type not in TYPE_INDEX:
+        return None
+    power, energy, energy_gain, cooldown = stats
+    stab = STAB if move_type in species_types else 1.0
+    return (TYPE_INDEX[move_type], power * stab, energy, energy_gain, max(1, round(cooldown / 500)))
+
+
+def _damage(c, move, attacker, defender):
+    """Damage of a (pairs, 5) move column block from attacker to defender rows."""
+    move_type = move[:, 0].astype(np.intp)
+    return np.floor(
+        0.5 * move[:, 1] * c.attack[attacker] / c.defense[defender]
+        * c.effectiveness[move_type, defender] * PVP_BONUS
+    ) + 1
+
+
+def simulate(c, a, b, shields):
+    """
+    Simulates battles between rows a and b of Combatants c, all at once.
+
+    Args:
+        c (Combatants): The battlers.
+        a, b (array): Row indices of each pairing's two sides.
+        shields (int): Shields each side starts with.
+
+    Returns:
+        tuple: (rating of a, rating of b) arrays.
+    """
+    sides = []
+    for me, foe in ((a, b), (b, a)):
+        fast = c.fast[me]
+        sides.append({
+            "hp": c.hp[me].copy(),
+            "max_hp": c.hp[me],
+            "energy": np.zeros(len(me)),
+            "shields": np.full(len(me), shields),
+            "timer": np.zeros(len(me)),
+            "fast_damage": _damage(c, fast, me, foe),
+            "fast_gain": fast[:, 3],
+            "fast_turns": fast[:, 4],
+            "charged_damage": np.stack([_damage(c, c.charged[me, k], me, foe) for k in range(2)], axis=1),
+            "charged_cost": c.charged[me, :, 2],
+            "attack": c.attack[me]
+        })
+    first, second = sides
+    a_first = first["attack"] >= second["attack"]
+    pick = np.arange(len(a))
+
+    for _ in range(MAX_TURNS):
+        alive = (first["hp"] > 0) & (second["hp"] > 0)
+        if not alive.any():
+            break
+
+        # Charged moves: decide for every free side, then resolve in CMP order
+        choices = []
+        for me, foe in ((first, second), (second, first)):
+            free = alive & (me["timer"] == 0)
+            cost, damage = me["charged_cost"], me["charged_damage"]
+            affordable = me["energy"][:, None] >= cost
+            prefer_first = np.where(foe["shields"] > 0, cost[:, 0] <= cost[:, 1], damage[:, 0] >= damage[:, 1])
+            move = np.where(affordable[:, 0] & (prefer_first | ~affordable[:, 1]), 0, 1)
+            fire = free & affordable.any(axis=1)
+            choices.append((fire, move))
+
+        def throw(me, foe, fire, move):
+            shielded = fire & (foe["shields"] > 0)
+            foe["hp"] -= np.where(fire, np.where(shielded, 1, me["charged_damage"][pick, move]), 0)
+            foe["shields"] -= shielded
+            me["energy"] -= np.where(fire, me["charged_cost"][pick, move], 0)
+
+        (fire_a, move_a), (fire_b, move_b) = choices
+        throw(first, second, fire_a & a_first, move_a)
+        throw(second, first, fire_b & (second["hp"] > 0), move_b)
+        throw(first, second, fire_a & ~a_first & (first["hp"] > 0), move_a)
+
+        # Fast moves: start one on every free side that did not throw, and
+        # land damage and energy when the move's last turn ends
+        landed = []
+        for me, fire in ((first, fire_a), (second, fire_b)):
+            start = alive & (me["timer"] == 0) & ~fire
+            me["timer"] = np.where(start, me["fast_turns"], me["timer"])
+            ticking = me["timer"] > 0
+            me["timer"] = np.where(ticking, me["timer"] - 1, 0)
+            landed.append(ticking & (me["timer"] == 0) & (me["hp"] > 0))
+        for (me, foe), land in zip(((first, second), (second, first)), landed):
+            foe["hp"] -= np.where(land, me["fast_damage"], 0)
+            me["energy"] = np.minimum(MAX_ENERGY, me["energy"] + np.where(land, me["fast_gain"], 0))
+
+    ratings = []
+    for me, foe in ((first, second), (second, first)):
+        dealt = 1 - np.maximum(foe["hp"], 0) / foe["max_hp"]
+        left = np.maximum(me["hp"], 0) / me["max_hp"]
+        ratings.append(np.floor(500 * dealt + 500 * left).astype(np.int16))
+    return tuple(ratings)
+
+
+# Combatants of the current build, set once per worker process
+_worker = {}
+
+
+def _init_worker(combatants):
+    _worker["combatants"] = combatants
+
+
+def _simulate_chunk(task):
+    a, b = task
+    c = _worker["combatants"]
+    return [simulate(c, a, b, shields) for shields in SHIELD_SCENARIOS]
+
+
+class BattleMatrix:
+    """Battle ratings of every meta species against every other, per shield scenario."""
+
+    SHIELD_SCENARIOS = SHIELD_SCENARIOS
+
+    def __init__(self, league, version, species_ids, ratings):
+        self.league = league
+        self.version = version
+        self.species_ids = tuple(species_ids)
+        # ratings[s, i, j]: rating of species i against species j with s shields each
+        self.ratings = ratings
+        self.index = {species_id: i for i, species_id in enumerate(self.species_ids)}
+
+    @classmethod
+    def build(cls, league, pokemon, version, gamemaster, meta_size=META_SIZE, workers=None):
+        """Simulates the meta of a dataset; gamemaster must be the one its data version was built from."""
+        c = Combatants(pokemon[:meta_size], gamemaster, get_iv_table(league, gamemaster))
+        n = len(c.species_ids)
+        a, b = np.triu_indices(n, k=1)
+        tasks = [(a[i:i + CHUNK_SIZE], b[i:i + CHUNK_SIZE]) for i in range(0, len(a), CHUNK_SIZE)]
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) == 1:
+            _init_worker(c)
+            results = [_simulate_chunk(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(c,)) as executor:
+                results = list(executor.map(_simulate_chunk, tasks))
+
+        ratings = np.full((len(SHIELD_SCENARIOS), n, n), 500, dtype=np.int16)
+        for (ta, tb), scenarios in zip(tasks, results):
+            for s, (rating_a, rating_b) in enumerate(scenarios):
+                ratings[s, ta, tb] = rating_a
+                ratings[s, tb, ta] = rating_b
+        return cls(league, version, c.species_ids, ratings)
+
+    def save(self, path):
+        buffer = io.BytesIO()
+        np.savez(buffer, league=self.league, version=self.version,
+                 species_ids=np.array(self.species_ids), ratings=self.ratings)
+        atomic_write(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(str(data["league"]), str(data["version"]),
+                       [str(s) for s in data["species_ids"]], data["ratings"])
+
+    def rating(self, species_id, opponent_id, shields=1):
+        """Battle rating of species_id against opponent_id, or None if either is outside the meta."""
+        i, j = self.index.get(species_id), self.index.get(opponent_id)
+        if i is None or j is None:
+            return None
+        return int(self.ratings[self.SHIELD_SCENARIOS.index(shields), i, j])
+
+
+def matrix_path(league, version, directory=BATTLE_DIR):
+    return os.path.join(directory, f"battles-{league.replace('/', '_')}-{version}.npz")
+
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+
+def get_battle_matrix(league, pokemon, version, gamemaster=None, build=True):
+    """
+    Returns the BattleMatrix of a league dataset version: from memory, then
+    from disk, then (if build is true) simulated and saved. None if missing
+    and build is false.
+
+    Simulation uses gamemaster, which defaults to the one the data version
+    was built from (see data_loader.gamemaster_for).
+
+    Raises:
+        ValueError: if a simulation is needed and the data version's gamemaster is no longer stored.
+    """
+    key = (league, version)
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is not None:
+            return matrix
+        path = matrix_path(league, version)
+        if os.path.exists(path):
+            try:
+                matrix = BattleMatrix.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable battle matrix {path}: {e}")
+        if matrix is None:
+            if not build:
+                return None
+            gamemaster = gamemaster or gamemaster_for(version)
+            if gamemaster is None:
+                raise ValueError(f"The gamemaster of data version {version} is no longer stored")
+            start = time.perf_counter()
+            matrix = BattleMatrix.build(league, pokemon, version, gamemaster)
+            matrix.save(path)
+            n = len(matrix.species_ids)
+            print(f"Simulated {n * (n - 1) // 2 * len(SHIELD_SCENARIOS)} battles for league {league} "
+                  f"in {time.perf_counter() - start:.2f} s")
+        for old in [k for k in _matrices if k[0] == league]:
+            del _matrices[old]
+        _matrices[key] = matrix
+        return matrix
+
+
+def main(argv):
+    if not argv:
+        print("Usage: python battle_sim.py build [league ...] | <league> <speciesId> <speciesId>")
+        return 2
+
+    if argv[0] == "build":
+        for league in argv[1:] or ["1500", "2500", "10000"]:
+            pokemon, version, _ = load_league(league)
+            if not pokemon:
+                print(f"Skipping league {league}: no data")
+                continue
+            matrix = get_battle_matrix(league, pokemon, version)
+            print(f"{matrix_path(league, version)}: {len(matrix.species_ids)} species")
+        return 0
+
+    if len(argv) < 3:
+        print("Usage: python battle_sim.py <league> <speciesId> <speciesId>")
+        return 2
+    league, species_id, opponent_id = argv[:3]
+    pokemon, version, _ = load_league(league)
+    matrix = get_battle_matrix(league, pokemon, version)
+    for shields in SHIELD_SCENARIOS:
+        print(f"{shields} shields: {species_id} vs {opponent_id}: {matrix.rating(species_id, opponent_id, shields)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
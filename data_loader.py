@@ -1,31 +1,12 @@
-import requests
-import pandas as pd
+import hashlib
+import re
+import threading
 
-# Type effectiveness chart (Attacker -> Defender multipliers)
-# 2.0: Super Effective, 0.5: Not Very Effective, 0.390625: Immune (approx 0.39)
-# We only care about weaknesses (multiplier > 1.0)
-TYPE_CHART = {
-    "normal": {"rock": 0.5, "ghost": 0.39, "steel": 0.5},
-    "fire": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 2.0, "bug": 2.0, "rock": 0.5, "dragon": 0.5, "steel": 2.0},
-    "water": {"fire": 2.0, "water": 0.5, "grass": 0.5, "ground": 2.0, "rock": 2.0, "dragon": 0.5},
-    "grass": {"fire": 0.5, "water": 2.0, "grass": 0.5, "poison": 0.5, "ground": 2.0, "flying": 0.5, "bug": 0.5, "rock": 2.0, "dragon": 0.5, "steel": 0.5},
-    "electric": {"water": 2.0, "grass": 0.5, "electric": 0.5, "ground": 0.39, "flying": 2.0, "dragon": 0.5},
-    "ice": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 0.5, "ground": 2.0, "flying": 2.0, "dragon": 2.0, "steel": 0.5},
-    "fighting": {"normal": 2.0, "ice": 2.0, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2.0, "ghost": 0.0, "dark": 2.0, "steel": 2.0, "fairy": 0.5},
-    "poison": {"grass": 2.0, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0.0, "fairy": 2.0},
-    "ground": {"fire": 2.0, "grass": 0.5, "electric": 2.0, "poison": 2.0, "flying": 0.0, "bug": 0.5, "rock": 2.0, "steel": 2.0},
-    "flying": {"grass": 2.0, "electric": 0.5, "fighting": 2.0, "bug": 2.0, "rock": 0.5, "steel": 0.5},
-    "psychic": {"fighting": 2.0, "poison": 2.0, "psychic": 0.5, "dark": 0.0, "steel": 0.5},
-    "bug": {"fire": 0.5, "grass": 2.0, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2.0, "ghost": 0.5, "dark": 2.0, "steel": 0.5, "fairy": 0.5},
-    "rock": {"fire": 2.0, "ice": 2.0, "fighting": 0.5, "ground": 0.5, "flying": 2.0, "bug": 2.0, "steel": 0.5},
-    "ghost": {"normal": 0.0, "psychic": 2.0, "ghost": 2.0, "dark": 0.5},
-    "dragon": {"dragon": 2.0, "steel": 0.5, "fairy": 0.0},
-    "dark": {"fighting": 0.5, "psychic": 2.0, "ghost": 2.0, "dark": 0.5, "fairy": 0.5},
-    "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2.0, "rock": 2.0, "steel": 0.5, "fairy": 2.0},
-    "fairy": {"fire": 0.5, "fighting": 2.0, "poison": 0.5, "dragon": 2.0, "dark": 2.0, "steel": 0.5}
-}
+import numpy as np
+import pandas as pd
 
-ALL_TYPES = list(TYPE_CHART.keys())
+from snapshot_cache import get_store
+from type_engine import ALL_TYPES, TYPE_CHART, coverage_mask, profile_for
 
 # Type Icons Mapping
 # Using local SVG icons in assets/icons/
@@ -195,131 +176,447 @@ def get_weaknesses(defender_types):
     Calculate weaknesses for a given list of defender types.
     Returns a list of types that are super effective against the defender.
     """
-    weaknesses = []
-    
-    for attacker_type in ALL_TYPES:
-        multiplier = 1.0
-        for defender_type in defender_types:
-            defender_type = defender_type.lower()
-            # Default to 1.0 if not in chart (neutral)
-            if attacker_type in TYPE_CHART:
-                effect = TYPE_CHART[attacker_type].get(defender_type, 1.0)
-                multiplier *= effect
-        
-        if multiplier > 1.0:
-            weaknesses.append(attacker_type)
-            
-    return weaknesses
+    return list(profile_for(defender_types).weaknesses)
+
+def get_resistances(defender_types):
+    """
+    Calculate resistances for a given list of defender types.
+    Returns a list of types that deal reduced damage (multiplier < 1.0) to the defender.
+    """
+    return list(profile_for(defender_types).resistances)
+
+GAMEMASTER_NAME = "gamemaster/pokemon.json"
+MOVES_NAME = "gamemaster/moves.json"
+
+# The only fields the loader keeps from each document. Everything else is
+# dropped element by element while streaming (see json_stream).
+GAMEMASTER_FIELDS = ("speciesId", "types", "baseStats", "fastMoves", "chargedMoves")
+MOVE_FIELDS = ("moveId", "type", "power", "energy", "energyGain", "cooldown")
+RANKING_FIELDS = ("speciesId", "speciesName", "score", "moveset")
+MATCHUP_FIELDS = ("speciesId", "speciesName", "matchups", "counters")
+
+# Bare CP caps map to pvpoke's open ("all") rankings for that league
+DEFAULT_LEAGUE = "1500"
+_RANKING_ID_RE = re.compile(r"^(?:([a-z0-9_-]+)/)?(\d+)$")
+
+
+def is_league_id(league):
+    """True if league is a bare CP cap or a "<cup>/<cp>" identifier (see rankings_name)."""
+    return _RANKING_ID_RE.match(str(league).strip().lower()) is not None
+
+
+def rankings_name(league):
+    """
+    Maps a league or cup identifier to its pvpoke rankings document.
+
+    Accepts a bare CP cap ("1500", "2500", "10000") for the open leagues, or
+    "<cup>/<cp>" for themed cups (e.g. "premier/1500", "little/500").
+    Unknown identifiers fall back to the Great League.
+    """
+    match = _RANKING_ID_RE.match(str(league).strip().lower())
+    if not match:
+        return rankings_name(DEFAULT_LEAGUE)
+    cup, cp = match.group(1) or "all", match.group(2)
+    return f"rankings/{cup}/overall/rankings-{cp}.json"
+
+
+class GameMaster:
+    """
+    Species and move lookups parsed from one version of pvpoke's gamemaster.
+    Built once per data version and shared by every league and cup load.
+    Accepts any iterables of entries, so documents can be streamed in.
+    """
+
+    def __init__(self, version, gamemaster_data, moves_data):
+        self.version = version
+
+        # Create maps of speciesId -> types, (atk, def, hp) base stats and
+        # (fast moves, charged moves) move pools
+        self.species_types_map = {}
+        self.base_stats = {}
+        self.move_pools = {}
+        for pokemon in gamemaster_data:
+            species_id = pokemon.get("speciesId")
+            types = pokemon.get("types", [])
+            if species_id:
+                self.species_types_map[species_id] = types
+                stats = pokemon.get("baseStats")
+                if stats:
+                    self.base_stats[species_id] = (stats["atk"], stats["def"], stats["hp"])
+                self.move_pools[species_id] = (
+                    tuple(pokemon.get("fastMoves", [])),
+                    tuple(pokemon.get("chargedMoves", []))
+                )
+
+        # Create maps of moveId -> type and moveId -> (power, energy, energy gain, cooldown ms)
+        self.moves_map = {}
+        self.move_stats = {}
+        for move in moves_data:
+            move_id = move.get("moveId")
+            move_type = move.get("type")
+            if move_id and move_type:
+                self.moves_map[move_id] = move_type
+                self.move_stats[move_id] = (
+                    move.get("power", 0) or 0,
+                    move.get("energy", 0) or 0,
+                    move.get("energyGain", 0) or 0,
+                    move.get("cooldown", 0) or 0
+                )
+
+
+_gamemaster = None
+_gamemaster_lock = threading.Lock()
+
+
+def get_gamemaster(gamemaster_snapshot=None, moves_snapshot=None):
+    """
+    Returns the shared GameMaster, re-parsing only when the underlying
+    gamemaster or moves snapshot has changed version.
+
+    Args:
+        gamemaster_snapshot, moves_snapshot: Snapshots already fetched by the
+            caller. Fetched from the snapshot store when omitted.
+    """
+    global _gamemaster
+
+    if gamemaster_snapshot is None or moves_snapshot is None:
+        store = get_store()
+        gamemaster_snapshot = store.get(GAMEMASTER_NAME)
+        moves_snapshot = store.get(MOVES_NAME)
+
+    version = f"{gamemaster_snapshot.version}-{moves_snapshot.version}"
+    with _gamemaster_lock:
+        if _gamemaster is None or _gamemaster.version != version:
+            print(f"Parsing gamemaster version {version}...")
+            _gamemaster = GameMaster(
+                version,
+                gamemaster_snapshot.iter_json(GAMEMASTER_FIELDS),
+                moves_snapshot.iter_json(MOVE_FIELDS)
+            )
+        return _gamemaster
+
+
+def gamemaster_for(data_version, store=None):
+    """
+    Returns the GameMaster a league data version (see load_league) was built
+    from, or None if the stored gamemaster or moves snapshot has moved on
+    since. Reads only local snapshots.
+    """
+    _, _, gamemaster_version = (data_version or "").partition("-")
+    store = (store or get_store()).offline_view()
+    try:
+        gamemaster = get_gamemaster(store.get(GAMEMASTER_NAME), store.get(MOVES_NAME))
+    except Exception as e:
+        print(f"No gamemaster for data version {data_version}: {e}")
+        return None
+    return gamemaster if gamemaster.version == gamemaster_version else None
+
+
+class MatchupMatrix:
+    """
+    Dense battle ratings between the ranked species of one league, built from
+    pvpoke's per-species "matchups" (best wins) and "counters" (worst losses).
+
+    ratings[i, j] is species i's rating against species j (500 is even).
+    Pairings pvpoke lists from one side only are mirrored (1000 - rating);
+    pairings listed from neither side are NaN. Rows are in ranking order, so
+    the first N rows are the top N of the meta.
+    """
+
+    def __init__(self, version, species_ids, names, ratings):
+        self.version = version
+        self.species_ids = tuple(species_ids)
+        self.names = tuple(names)
+        self.ratings = ratings
+        self.index = {species_id: i for i, species_id in enumerate(self.species_ids)}
+
+    @classmethod
+    def from_rankings(cls, version, entries):
+        entries = list(entries)
+        species_ids = [e.get("speciesId") for e in entries]
+        index = {species_id: i for i, species_id in enumerate(species_ids)}
+        ratings = np.full((len(entries), len(entries)), np.nan, dtype=np.float32)
+        for i, entry in enumerate(entries):
+            for matchup in entry.get("matchups", []) + entry.get("counters", []):
+                j = index.get(matchup.get("opponent"))
+                if j is not None:
+                    ratings[i, j] = matchup.get("rating", np.nan)
+        mirrored = np.isnan(ratings) & ~np.isnan(ratings.T)
+        ratings[mirrored] = 1000 - ratings.T[mirrored]
+        np.fill_diagonal(ratings, 500)
+        return cls(version, species_ids, [e.get("speciesName") for e in entries], ratings)
+
+    def rating(self, species_id, opponent_id):
+        """Rating of species_id against opponent_id, or None if unknown."""
+        i, j = self.index.get(species_id), self.index.get(opponent_id)
+        if i is None or j is None or np.isnan(self.ratings[i, j]):
+            return None
+        return float(self.ratings[i, j])
+
+
+_matchup_matrices = {}
+_matchup_lock = threading.Lock()
+
+
+def get_matchup_matrix(league="1500", store=None):
+    """
+    Returns the MatchupMatrix of a league's current rankings snapshot, built
+    once per snapshot version. Only the matchup fields are streamed from disk.
+    """
+    snapshot = (store or get_store()).get(rankings_name(league))
+    with _matchup_lock:
+        matrix = _matchup_matrices.get(league)
+        if matrix is None or matrix.version != snapshot.version:
+            matrix = MatchupMatrix.from_rankings(snapshot.version, snapshot.iter_json(MATCHUP_FIELDS))
+            _matchup_matrices[league] = matrix
+        return matrix
+
 
 def load_data(league="1500"):
     """
     Fetches ranking and gamemaster data, merges them, and returns a list of Pokemon dictionaries.
+    Documents are served from the local snapshot store (see snapshot_cache) and
+    only downloaded when the cached copy is missing or past its TTL. The
+    gamemaster and moves are parsed once per data version and shared.
     
     Args:
-        league (str): "1500" (Great), "2500" (Ultra), or "10000" (Master).
+        league (str): "1500" (Great), "2500" (Ultra), "10000" (Master), or a
+            "<cup>/<cp>" cup identifier such as "premier/1500".
+    """
+    processed_data, _, _ = load_league(league)
+    return processed_data
+
+
+def load_league(league="1500", store=None, max_age=None, known_version=None, previous=None):
+    """
+    Same as load_data, but also returns the data version the result was built
+    from and, when rebuilding over a previous result, what changed.
+
+    Args:
+        league (str): League or cup identifier (see rankings_name).
+        store (SnapshotStore): Store to read from. Defaults to the shared store;
+            pass an offline store to build strictly from local snapshots.
+        max_age (float): Forwarded to the store; 0 forces revalidation.
+        known_version (str): Version the caller already has. If the snapshots
+            still match it, processing is skipped and the list is None.
+        previous (sequence): The caller's current data for this league. Only
+            species whose inputs changed are reprocessed (see build_league).
+
+    Returns:
+        tuple: (list of Pokemon dictionaries, version string, Changeset or None).
+        On failure the list is empty and the version is None.
     """
     print(f"Fetching rankings data for league {league}...")
+    store = store or get_store()
     
-    # Validate league
-    if league not in ["1500", "2500", "10000"]:
-        league = "1500"
-        
-    rankings_url = f"https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data/rankings/all/overall/rankings-{league}.json"
-    try:
-        rankings_response = requests.get(rankings_url)
-        rankings_response.raise_for_status()
-        rankings_data = rankings_response.json()
-    except Exception as e:
-        print(f"Error fetching rankings: {e}")
-        return []
+    # Download (or revalidate) all three documents concurrently
+    ranking_doc = rankings_name(league)
+    results = store.get_many([ranking_doc, GAMEMASTER_NAME, MOVES_NAME], max_age=max_age)
 
-    print("Fetching gamemaster data (for types)...")
-    gamemaster_url = "https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data/gamemaster/pokemon.json"
-    try:
-        gamemaster_response = requests.get(gamemaster_url)
-        gamemaster_response.raise_for_status()
-        gamemaster_data = gamemaster_response.json()
-    except Exception as e:
-        print(f"Error fetching gamemaster: {e}")
-        return []
+    snapshots = {}
+    for name, label in [(ranking_doc, "rankings"), (GAMEMASTER_NAME, "gamemaster"), (MOVES_NAME, "moves")]:
+        snapshot, error, _ = results[name]
+        if error is not None:
+            print(f"Error fetching {label}: {error}")
+            return [], None, None
+        snapshots[name] = snapshot
+
+    version = "-".join(snapshots[name].version for name in (ranking_doc, GAMEMASTER_NAME, MOVES_NAME))
+    if version == known_version:
+        return None, version, None
 
-    print("Fetching moves data...")
-    moves_url = "https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data/gamemaster/moves.json"
     try:
-        moves_response = requests.get(moves_url)
-        moves_response.raise_for_status()
-        moves_data = moves_response.json()
+        rankings_data = list(snapshots[ranking_doc].iter_json(RANKING_FIELDS))
+        gamemaster = get_gamemaster(snapshots[GAMEMASTER_NAME], snapshots[MOVES_NAME])
     except Exception as e:
-        print(f"Error fetching moves: {e}")
-        return []
-
-    # Create a map of speciesId -> types
-    species_types_map = {}
-    for pokemon in gamemaster_data:
-        species_id = pokemon.get("speciesId")
-        types = pokemon.get("types", [])
-        if species_id:
-            species_types_map[species_id] = types
-
-    # Create a map of moveId -> type
-    moves_map = {}
-    for move in moves_data:
-        move_id = move.get("moveId")
-        move_type = move.get("type")
-        if move_id and move_type:
-            moves_map[move_id] = move_type
+        print(f"Error parsing data: {e}")
+        return [], None, None
+
+    processed_data, changes = build_league(rankings_data, gamemaster, previous)
+    if changes is not None:
+        print(f"Changes for league {league}: {changes.summary()}")
+
+    print(f"Successfully processed {len(processed_data)} Pokemon for league {league}.")
+    return processed_data, version, changes
+
+
+def process_entry(entry, species_types_map, moves_map):
+    """Merges one rankings entry with the gamemaster into a Pokemon dictionary."""
+    species_id = entry.get("speciesId")
+    species_name = entry.get("speciesName")
+    score = entry.get("score")
+    moveset = entry.get("moveset", [])
+    
+    # Get types from gamemaster map
+    types = species_types_map.get(species_id, [])
+    
+    # Get move types and translated names
+    move_types = []
+    translated_moves = []
+    move_type_icons = []
+    
+    for move in moveset:
+        m_type = moves_map.get(move)
+        if m_type:
+            move_types.append(m_type)
+            move_type_icons.append(TYPE_ICONS.get(m_type, ""))
+        else:
+            move_type_icons.append("")
+        
+        # Translate move name
+        translated_name = MOVES_ES.get(move, move.replace("_", " ").title())
+        translated_moves.append(translated_name)
+    
+    # Calculate weaknesses
+    profile = profile_for(types)
+    weaknesses = list(profile.weaknesses)
+    
+    # Get type icons
+    type_icons = [TYPE_ICONS.get(t, "") for t in types]
+
+    return {
+        "name": species_name,
+        "types": types,
+        "type_icons": type_icons,
+        "recommended_moves": translated_moves, # Use translated names for display
+        "recommended_moves_raw": moveset, # Keep raw IDs if needed
+        "move_types": move_types,
+        "move_type_icons": move_type_icons,
+        "weaknesses": weaknesses,
+        "rating": score,
+        "speciesId": species_id, # Keeping ID for reference
+        # Bitmasks over ALL_TYPES for fast team analysis (see type_engine)
+        "weakness_mask": profile.weakness_mask,
+        "resistance_mask": profile.resistance_mask,
+        "coverage_mask": coverage_mask(move_types)
+    }
+
 
+class Changeset:
+    """Species-level differences between two builds of a league."""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.rerated = []
+        self.moveset_changed = []
+        self.types_changed = []
+        self.unchanged = 0
+
+    def summary(self):
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, {len(self.rerated)} re-rated, "
+            f"{len(self.moveset_changed)} moveset changed, {len(self.types_changed)} types changed, "
+            f"{self.unchanged} unchanged"
+        )
+
+    def as_dict(self):
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "rerated": self.rerated,
+            "moveset_changed": self.moveset_changed,
+            "types_changed": self.types_changed,
+            "unchanged": self.unchanged
+        }
+
+
+def moveset_digest(moveset, move_types):
+    """
+    64-bit digest of a moveset and its move types, stable across processes.
+    League artifacts store it per row, so a rebuild can tell whether a moveset
+    changed without decoding the row's moves.
+    """
+    text = "\0".join(moveset) + "\1" + "\0".join(move_types)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def moveset_key(moveset, move_types):
+    """A moveset and its move types as one comparable value."""
+    return tuple(moveset), tuple(move_types)
+
+
+def previous_inputs(previous):
+    """
+    The inputs build_league compares, taken from an earlier build.
+
+    Returns:
+        tuple: (speciesId -> (name, rating, types, moveset key, entry), the
+        function computing a moveset key). A LeagueArtifact reads them from its
+        columns, with moveset digests as keys, and its entries are rows that
+        are only decoded if someone reads them.
+    """
+    row_inputs = getattr(previous, "row_inputs", None)
+    if row_inputs is not None:
+        return row_inputs(), moveset_digest
+    inputs = {
+        p["speciesId"]: (
+            p["name"], p["rating"], tuple(p["types"]), moveset_key(p["recommended_moves_raw"], p["move_types"]), p
+        )
+        for p in previous
+    }
+    return inputs, moveset_key
+
+
+def build_league(rankings_data, gamemaster, previous=None):
+    """
+    Builds the processed Pokemon list for one league.
+
+    With a previous build, only species whose inputs changed (rating, moveset,
+    types or move types) are reprocessed; unchanged entries are reused as-is.
+    Over a LeagueArtifact the comparison reads its columns and the reused
+    entries are its rows, still encoded, which build_artifact copies without
+    decoding them.
+
+    Args:
+        rankings_data (iterable): pvpoke rankings entries, in ranking order.
+        gamemaster (GameMaster): Shared species and move lookups.
+        previous (sequence): An earlier result of build_league/load_data for
+            the same league, or its LeagueArtifact.
+
+    Returns:
+        tuple: (list of Pokemon dictionaries, Changeset or None when there was no previous build).
+    """
+    species_types_map = gamemaster.species_types_map
+    moves_map = gamemaster.moves_map
+
+    if previous is None:
+        return [process_entry(entry, species_types_map, moves_map) for entry in rankings_data], None
+
+    previous_by_id, key = previous_inputs(previous)
+    changes = Changeset()
     processed_data = []
 
     for entry in rankings_data:
         species_id = entry.get("speciesId")
-        species_name = entry.get("speciesName")
-        score = entry.get("score")
+        inputs = previous_by_id.pop(species_id, None)
+        if inputs is None:
+            changes.added.append(species_id)
+            processed_data.append(process_entry(entry, species_types_map, moves_map))
+            continue
+
+        name, rating, types, moves, old = inputs
         moveset = entry.get("moveset", [])
-        
-        # Get types from gamemaster map
-        types = species_types_map.get(species_id, [])
-        
-        # Get move types and translated names
-        move_types = []
-        translated_moves = []
-        move_type_icons = []
-        
-        for move in moveset:
-            m_type = moves_map.get(move)
-            if m_type:
-                move_types.append(m_type)
-                move_type_icons.append(TYPE_ICONS.get(m_type, ""))
-            else:
-                move_type_icons.append("")
-            
-            # Translate move name
-            translated_name = MOVES_ES.get(move, move.replace("_", " ").title())
-            translated_moves.append(translated_name)
-        
-        # Calculate weaknesses
-        weaknesses = get_weaknesses(types)
-        
-        # Get type icons
-        type_icons = [TYPE_ICONS.get(t, "") for t in types]
-
-        pokemon_obj = {
-            "name": species_name,
-            "types": types,
-            "type_icons": type_icons,
-            "recommended_moves": translated_moves, # Use translated names for display
-            "recommended_moves_raw": moveset, # Keep raw IDs if needed
-            "move_types": move_types,
-            "move_type_icons": move_type_icons,
-            "weaknesses": weaknesses,
-            "rating": score,
-            "speciesId": species_id # Keeping ID for reference
-        }
-        
-        processed_data.append(pokemon_obj)
+        move_types = [moves_map[m] for m in moveset if moves_map.get(m)]
+        changed = entry.get("speciesName") != name
+        if entry.get("score") != rating:
+            changes.rerated.append(species_id)
+            changed = True
+        if key(moveset, move_types) != moves:
+            changes.moveset_changed.append(species_id)
+            changed = True
+        if tuple(species_types_map.get(species_id, [])) != types:
+            changes.types_changed.append(species_id)
+            changed = True
 
-    print(f"Successfully processed {len(processed_data)} Pokemon for league {league}.")
-    return processed_data
+        if changed:
+            processed_data.append(process_entry(entry, species_types_map, moves_map))
+        else:
+            changes.unchanged += 1
+            processed_data.append(old)
+
+    changes.removed = list(previous_by_id)
+    return processed_data, changes
 
 if __name__ == "__main__":
     data = load_data()
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds for every pvpoke request
+DEFAULT_TIMEOUT = (3.05, float(os.environ.get("PVPOKE_READ_TIMEOUT", 20)))
+
+# Bounded retry with exponential backoff: 0.5s, 1s, 2s between attempts
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+POOL_SIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session(pool_size=POOL_SIZE):
+    """Creates a requests Session with pooled keep-alive connections and retries."""
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Returns the process-wide pooled Session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def fetch(url, headers=None, timeout=DEFAULT_TIMEOUT, stream=False):
+    """
+    GETs a URL through the shared pooled session.
+
+    Returns:
+        requests.Response: the final response after any retries. HTTP error
+        statuses are not raised here; callers decide (e.g. 304 is expected).
+    """
+    return get_session().get(url, headers=headers, timeout=timeout, stream=stream)
+
+
+def run_concurrently(func, items, max_workers=POOL_SIZE):
+    """
+    Calls func(item) for every item on a thread pool.
+
+    Returns:
+        dict: item -> (result, error, elapsed_seconds). Exactly one of result
+        and error is set, so one failing item never hides the others.
+    """
+    items = list(items)
+    if not items:
+        return {}
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            return item, func(item), None, time.perf_counter() - start
+        except Exception as e:
+            return item, None, e, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return {item: (result, error, elapsed) for item, result, error, elapsed in pool.map(timed, items)}
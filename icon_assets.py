@@ -0,0 +1,125 @@
+"""
+Type icons, loaded once.
+
+All TYPE_ICONS SVGs are read and base64-encoded together into an immutable
+IconTable of data URIs. The table is identified by a hash of the icon
+contents, which also names its CSS classes: the app injects the stylesheet
+once per page and every icon after that is a tiny <span> referencing a
+class, so rendering never touches the files and the icon bytes are sent to
+the browser once instead of in every card. get_icon_table(check=True) stats
+the files at most once every CHECK_INTERVAL seconds and swaps in a new table
+(and so new class names) when an icon changed.
+"""
+import base64
+import hashlib
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from data_loader import TYPE_ICONS
+
+
+class IconTable:
+    """Immutable type -> data URI table of one set of icon files."""
+
+    def __init__(self, uris, paths, digest):
+        self.uris = MappingProxyType(dict(uris))
+        self.digest = digest
+        # Icon path (as stored in the Pokemon dictionaries) -> type
+        self._types_by_path = MappingProxyType({path: t for t, path in paths.items()})
+        self._class_prefix = f"ti-{digest[:8]}"
+
+    @classmethod
+    def load(cls, icons=TYPE_ICONS):
+        """Reads and encodes every icon; unreadable files are left out."""
+        uris, paths = {}, {}
+        content_hash = hashlib.sha256()
+        for type_name, path in sorted(icons.items()):
+            if not path:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Missing type icon {path}: {e}")
+                continue
+            content_hash.update(type_name.encode("utf-8") + b"\0" + data + b"\0")
+            uris[type_name] = "data:image/svg+xml;base64," + base64.b64encode(data).decode("ascii")
+            paths[type_name] = path
+        return cls(uris, paths, content_hash.hexdigest())
+
+    def uri(self, type_name):
+        return self.uris.get(type_name.lower(), "")
+
+    def type_for_path(self, icon_path):
+        return self._types_by_path.get(icon_path)
+
+    def stylesheet(self):
+        """<style> block defining one CSS class per icon, to inject once per page."""
+        rules = [
+            f".{self._class_prefix}{{display:inline-block; vertical-align:middle; margin-right:5px; "
+            f"background-size:contain; background-repeat:no-repeat;}}"
+        ]
+        rules.extend(
+            f'.{self._class_prefix}-{type_name}{{background-image:url("{uri}");}}'
+            for type_name, uri in self.uris.items()
+        )
+        return "<style>" + "".join(rules) + "</style>"
+
+    def icon(self, type_name, size=20):
+        """Inline icon referencing the stylesheet's classes, or "" if the type has no icon."""
+        type_name = (type_name or "").lower()
+        if type_name not in self.uris:
+            return ""
+        return (f'<span class="{self._class_prefix} {self._class_prefix}-{type_name}" '
+                f'style="width:{size}px; height:{size}px;"></span>')
+
+
+def _signature(icons):
+    """Cheap change check of the icon files: (path, mtime, size) of each."""
+    signature = []
+    for path in sorted(p for p in icons.values() if p):
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+_table = None
+_table_signature = None
+_table_checked_at = 0.0
+_table_lock = threading.Lock()
+
+# Minimum seconds between two stats of the icon files by get_icon_table(check=True)
+CHECK_INTERVAL = 60
+
+
+def get_icon_table(icons=TYPE_ICONS, check=False):
+    """
+    Returns the process-wide IconTable.
+
+    Args:
+        check (bool): Stat the icon files and reload them if any changed, at
+            most once every CHECK_INTERVAL seconds; other calls do no file I/O.
+            The table is only replaced if the contents (and so the digest) differ.
+    """
+    global _table, _table_signature, _table_checked_at
+    if _table is not None and (not check or time.monotonic() - _table_checked_at < CHECK_INTERVAL):
+        return _table
+    with _table_lock:
+        signature = _signature(icons) if check or _table is None else _table_signature
+        _table_checked_at = time.monotonic()
+        if _table is None or signature != _table_signature:
+            table = IconTable.load(icons)
+            if _table is None or table.digest != _table.digest:
+                _table = table
+            _table_signature = signature
+        return _table
+
+
+if __name__ == "__main__":
+    table = get_icon_table()
+    print(f"{len(table.uris)} icons, digest {table.digest[:16]}, stylesheet {len(table.stylesheet())} bytes")
@@ -0,0 +1,284 @@
+"""
+IV spread optimizer for CP-capped leagues.
+
+For every species in the gamemaster and a league's CP cap, all 4096 IV
+combinations are evaluated across every level in one vectorized pass: each
+spread is raised to the highest level that stays under the cap and ranked by
+stat product (attack x defense x HP), the usual PvP measure of bulk. Spreads
+over the cap even at level 1 cannot enter the league; they are marked
+ineligible (rank 0) and left out of the ranking.
+
+Levels go up to MAX_LEVEL (50). Best buddy level 51 is deliberately not
+considered: ranks assume a Pokemon without the buddy boost, as pvpoke does.
+
+Tables are built once per gamemaster version and CP cap, saved under
+IV_DIR and memoized in memory, so "what rank are my IVs?" is a lookup.
+
+    python iv_engine.py <speciesId> [league] [atk def hp]
+"""
+import io
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+from data_loader import DEFAULT_LEAGUE, get_gamemaster
+from snapshot_cache import CACHE_DIR, atomic_write
+
+IV_DIR = os.environ.get("PVPOKE_IV_DIR", os.path.join(os.path.dirname(CACHE_DIR) or ".", "ivs"))
+MAX_LEVEL = 50
+UNCAPPED = 10000  # Master League has no effective cap
+
+# Official CP multipliers for whole levels 1-51
+_WHOLE_LEVEL_CPM = [
+    0.094, 0.16639787, 0.21573247, 0.25572005, 0.29024988, 0.3210876, 0.34921268, 0.3752356,
+    0.39956728, 0.42250001, 0.44310755, 0.46279839, 0.48168495, 0.49985844, 0.51739395, 0.53435433,
+    0.55079269, 0.56675452, 0.58227891, 0.59740001, 0.61215729, 0.62656713, 0.64065295, 0.65443563,
+    0.667934, 0.68116492, 0.69414365, 0.70688421, 0.71939909, 0.7317, 0.73776948, 0.74378943,
+    0.74976104, 0.75568551, 0.76156384, 0.76739717, 0.7731865, 0.77893275, 0.78463697, 0.79030001,
+    0.79530001, 0.8003, 0.8053, 0.81029999, 0.81529999, 0.82029999, 0.82529999, 0.83029999,
+    0.83529999, 0.84029999, 0.84529999
+]
+
+
+def _level_table(max_level):
+    """(levels, cp multipliers) in half-level steps; half levels use the game's sqrt interpolation."""
+    whole = np.array(_WHOLE_LEVEL_CPM[:max_level])
+    half = np.sqrt((whole[:-1] ** 2 + whole[1:] ** 2) / 2)
+    cpm = np.empty(2 * len(whole) - 1)
+    cpm[0::2] = whole
+    cpm[1::2] = half
+    return np.arange(2 * len(whole) - 1) / 2 + 1, cpm
+
+
+LEVELS, CPM = _level_table(MAX_LEVEL)
+
+# IVS[i] = (atk, def, hp) of spread i; i = atk * 256 + def * 16 + hp
+IVS = np.array(np.meshgrid(np.arange(16), np.arange(16), np.arange(16), indexing="ij")).reshape(3, -1).T
+
+
+def iv_index(atk, defense, hp):
+    return atk * 256 + defense * 16 + hp
+
+
+def league_cap(league):
+    """CP cap of a league or cup identifier ("1500", "premier/1500")."""
+    match = re.search(r"(\d+)$", str(league))
+    return int(match.group(1)) if match else int(DEFAULT_LEAGUE)
+
+
+def compute_spreads(base_stats, cap, cpm=CPM):
+    """
+    Evaluates every IV spread of one species under a CP cap.
+
+    Args:
+        base_stats (tuple): (atk, def, hp) base stats.
+        cap (int): CP cap; UNCAPPED or more means the highest level.
+        cpm (array): CP multiplier per level index.
+
+    Returns:
+        dict: Arrays of length 4096 indexed like IVS: "level" (index into
+        LEVELS), "cp", "stat_product", "eligible" (False when over the cap
+        even at level 1) and "rank" (1 = best among eligible spreads; equal
+        stat products share a rank; 0 for ineligible spreads).
+    """
+    attack = base_stats[0] + IVS[:, 0]
+    defense = base_stats[1] + IVS[:, 1]
+    stamina = base_stats[2] + IVS[:, 2]
+
+    # CP of every spread at every level; CP grows with level, so the best
+    # level is the last one under the cap (level 1 when even that is over)
+    cp = np.maximum(10, np.floor(
+        (attack * np.sqrt(defense) * np.sqrt(stamina))[:, None] * cpm[None, :] ** 2 / 10
+    )).astype(np.int64)
+    if cap >= UNCAPPED:
+        level = np.full(len(IVS), len(cpm) - 1)
+        eligible = np.ones(len(IVS), dtype=bool)
+    else:
+        level = np.maximum((cp <= cap).sum(axis=1) - 1, 0)
+        eligible = cp[:, 0] <= cap
+
+    m = cpm[level]
+    stat_product = (attack * m) * (defense * m) * np.maximum(10, np.floor(stamina * m))
+    ordered = np.sort(-stat_product[eligible])
+    rank = np.where(eligible, np.searchsorted(ordered, -stat_product, side="left") + 1, 0)
+    return {
+        "level": level,
+        "cp": cp[np.arange(len(IVS)), level],
+        "stat_product": stat_product,
+        "eligible": eligible,
+        "rank": rank
+    }
+
+
+class IVTable:
+    """
+    IV ranks of every species for one CP cap and gamemaster version.
+    Arrays are (species, 4096), rows in species_ids order; rank 0 marks
+    spreads that are over the cap even at level 1.
+    """
+
+    def __init__(self, cap, version, species_ids, rank, level, cp, stat_product):
+        self.cap = cap
+        self.version = version
+        self.species_ids = tuple(species_ids)
+        self.rank = rank
+        self.level = level
+        self.cp = cp
+        self.stat_product = stat_product
+        self._rows = {species_id: row for row, species_id in enumerate(self.species_ids)}
+
+    @classmethod
+    def build(cls, gamemaster, cap):
+        species_ids = sorted(gamemaster.base_stats)
+        shape = (len(species_ids), len(IVS))
+        rank = np.empty(shape, dtype=np.uint16)
+        level = np.empty(shape, dtype=np.uint8)
+        cp = np.empty(shape, dtype=np.uint16)
+        stat_product = np.empty(shape, dtype=np.float32)
+        for row, species_id in enumerate(species_ids):
+            spreads = compute_spreads(gamemaster.base_stats[species_id], cap)
+            rank[row] = spreads["rank"]
+            level[row] = spreads["level"]
+            cp[row] = np.minimum(spreads["cp"], np.iinfo(np.uint16).max)
+            stat_product[row] = spreads["stat_product"]
+        return cls(cap, gamemaster.version, species_ids, rank, level, cp, stat_product)
+
+    def save(self, path):
+        buffer = io.BytesIO()
+        np.savez(
+            buffer, cap=self.cap, version=self.version, species_ids=np.array(self.species_ids),
+            rank=self.rank, level=self.level, cp=self.cp, stat_product=self.stat_product
+        )
+        atomic_write(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                int(data["cap"]), str(data["version"]), [str(s) for s in data["species_ids"]],
+                data["rank"], data["level"], data["cp"], data["stat_product"]
+            )
+
+    def __contains__(self, species_id):
+        return species_id in self._rows
+
+    def lookup(self, species_id, atk, defense, hp):
+        """
+        Rank and build of one IV spread.
+
+        Returns:
+            dict: eligible, rank, level, cp, stat_product and percent (of the
+            rank 1 stat product), or None for an unknown species. rank and
+            percent are None when the spread is over the cap even at level 1.
+
+        Raises:
+            ValueError: if an IV is not an integer from 0 to 15.
+        """
+        for iv in (atk, defense, hp):
+            if isinstance(iv, bool) or not isinstance(iv, (int, np.integer)) or not 0 <= iv <= 15:
+                raise ValueError(f"IVs must be integers from 0 to 15, got {(atk, defense, hp)}")
+        row = self._rows.get(species_id)
+        if row is None:
+            return None
+        i = iv_index(atk, defense, hp)
+        rank = int(self.rank[row, i])
+        eligible = self.rank[row] > 0
+        best = self.stat_product[row][eligible].max() if eligible.any() else None
+        return {
+            "ivs": (int(atk), int(defense), int(hp)),
+            "eligible": rank > 0,
+            "rank": rank or None,
+            "level": float(LEVELS[self.level[row, i]]),
+            "cp": int(self.cp[row, i]),
+            "stat_product": float(self.stat_product[row, i]),
+            "percent": round(float(self.stat_product[row, i] / best) * 100, 2) if rank else None
+        }
+
+    def top(self, species_id, n=10):
+        """The n best eligible spreads of a species, best first (ties by IV order)."""
+        row = self._rows.get(species_id)
+        if row is None:
+            return []
+        eligible = np.flatnonzero(self.rank[row] > 0)
+        best = eligible[np.argsort(self.rank[row][eligible], kind="stable")[:n]]
+        return [self.lookup(species_id, *map(int, IVS[i])) for i in best]
+
+
+TABLE_FORMAT = 2  # bumped when ranks change meaning, so older files are rebuilt
+
+
+def table_path(cap, version, directory=IV_DIR):
+    return os.path.join(directory, f"ivs-v{TABLE_FORMAT}-{cap}-{version}.npz")
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_iv_table(league=DEFAULT_LEAGUE, gamemaster=None):
+    """
+    Returns the IVTable for a league's CP cap and the current gamemaster,
+    loading it from disk or building and saving it on first use.
+    """
+    gamemaster = gamemaster or get_gamemaster()
+    cap = league_cap(league)
+    key = (cap, gamemaster.version)
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            return table
+
+        path = table_path(cap, gamemaster.version)
+        if os.path.exists(path):
+            try:
+                table = IVTable.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable IV table {path}: {e}")
+        if table is None:
+            print(f"Building IV table for CP {cap} (gamemaster {gamemaster.version})...")
+            table = IVTable.build(gamemaster, cap)
+            table.save(path)
+
+        # Tables of older gamemaster versions are no longer needed in memory
+        for old in [k for k in _tables if k[0] == cap]:
+            del _tables[old]
+        _tables[key] = table
+        return table
+
+
+def main(argv):
+    if not argv:
+        print("Usage: python iv_engine.py <speciesId> [league] [atk def hp]")
+        return 2
+
+    species_id = argv[0]
+    league = argv[1] if len(argv) > 1 else DEFAULT_LEAGUE
+    table = get_iv_table(league)
+    if species_id not in table:
+        print(f"Unknown species {species_id}")
+        return 1
+
+    if len(argv) >= 5:
+        try:
+            result = table.lookup(species_id, *(int(v) for v in argv[2:5]))
+        except ValueError as e:
+            print(e)
+            return 2
+        if not result["eligible"]:
+            print(f"{species_id} {result['ivs']}: over CP {table.cap} even at level 1")
+            return 0
+        print(f"{species_id} {result['ivs']}: rank {result['rank']}, level {result['level']}, "
+              f"CP {result['cp']}, {result['percent']}% of rank 1")
+        return 0
+
+    for result in table.top(species_id):
+        print(f"#{result['rank']:<4} {result['ivs']} level {result['level']} CP {result['cp']} "
+              f"SP {result['stat_product']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
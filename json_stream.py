@@ -0,0 +1,112 @@
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_array(fp, fields=None, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally parses a JSON document whose top level is an array.
+
+    Only one element (plus one read chunk) is held in memory at a time, so
+    peak memory stays flat no matter how large the document grows.
+
+    Args:
+        fp: Binary file object positioned at the start of the document.
+        fields (iterable): If given, each yielded element is reduced to these
+            keys (missing keys are omitted) as soon as it is decoded.
+        chunk_size (int): Bytes read per refill.
+
+    Yields:
+        The decoded array elements, in order.
+
+    Raises:
+        ValueError: if the document is not a well-formed JSON array, including
+            when anything but whitespace follows the closing bracket.
+    """
+    fields = tuple(fields) if fields is not None else None
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    expect_comma = False
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            # Only whitespace may follow the array ("[...]garbage" is not JSON)
+            pos += 1
+            skip_whitespace()
+            if pos < len(buf):
+                raise ValueError(f"Unexpected data after JSON array: {buf[pos:pos + 20]!r}")
+            return
+        if expect_comma:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_whitespace()
+
+        while True:
+            try:
+                element, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number cut by the buffer edge ("1." or "12") decodes early; only
+            # accept an element once the delimiter after it has been read
+            if not eof and (end == len(buf) or buf[end] not in _DELIMITERS):
+                fill()
+                continue
+            break
+
+        pos = end
+        expect_comma = True
+        if fields is not None and isinstance(element, dict):
+            element = {k: element[k] for k in fields if k in element}
+        yield element
+
+
+def validate_array(path):
+    """
+    Checks that the file at path holds a well-formed JSON array without loading it whole.
+
+    Returns:
+        int: Number of elements.
+
+    Raises:
+        ValueError: if it is not a JSON array or has trailing data after it.
+    """
+    with open(path, "rb") as f:
+        return sum(1 for _ in iter_array(f))
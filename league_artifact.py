@@ -0,0 +1,349 @@
+"""
+Compiled, memory-mapped league datasets.
+
+`python league_artifact.py build [league ...]` compiles the current pvpoke
+snapshot of each league into one compact binary file. Loading an artifact
+only maps the file: every worker process shares the same page-cache pages,
+and Pokemon dictionaries are decoded on access instead of being rebuilt from
+the raw JSON at startup.
+
+File layout (little endian):
+    header   MAGIC, format version, record count, meta length, string table length
+    meta     JSON: league, data version, type names
+    records  one RECORD per species (see RECORD below)
+    moves    MOVE entries referenced by the records
+    strings  UTF-8 string table referenced by (offset, length) pairs
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from data_loader import TYPE_ICONS, gamemaster_for, load_league, moveset_digest
+from pokemon_store import NO_TYPE, FrozenPokemon
+from type_engine import ALL_TYPES, coverage_mask, mask_to_types, profile_for, types_to_mask
+from snapshot_cache import CACHE_DIR, atomic_write
+
+ARTIFACT_DIR = os.environ.get("PVPOKE_ARTIFACT_DIR", os.path.join(os.path.dirname(CACHE_DIR) or ".", "artifacts"))
+
+MAGIC = b"PVPA"
+FORMAT_VERSION = 3
+HEADER = struct.Struct("<4sHIII")
+# name (off, len), speciesId (off, len), 2 type indices, weakness mask,
+# resistance mask, coverage mask, rating, first move index, move count,
+# moveset digest (see data_loader.moveset_digest)
+RECORD = struct.Struct("<IHIHBBIIIdIBQ")
+# The same record as a numpy dtype, so columns can be read from the mapped file
+RECORD_DTYPE = np.dtype([
+    ("name_offset", "<u4"), ("name_length", "<u2"), ("species_id_offset", "<u4"), ("species_id_length", "<u2"),
+    ("type_a", "u1"), ("type_b", "u1"), ("weakness_mask", "<u4"), ("resistance_mask", "<u4"),
+    ("coverage_mask", "<u4"), ("rating", "<f8"), ("first_move", "<u4"), ("move_count", "u1"),
+    ("moveset_digest", "<u8")
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+# raw move id (off, len), translated name (off, len), type index
+MOVE = struct.Struct("<IHIHB")
+MOVE_DTYPE = np.dtype([
+    ("raw_offset", "<u4"), ("raw_length", "<u2"), ("name_offset", "<u4"), ("name_length", "<u2"), ("type", "u1")
+])
+assert MOVE_DTYPE.itemsize == MOVE.size
+
+
+def artifact_path(league, directory=ARTIFACT_DIR):
+    return os.path.join(directory, f"league-{league.replace('/', '_')}.pvpa")
+
+
+class _StringTable:
+    def __init__(self, blob=b""):
+        # Starting from an artifact's table keeps the offsets of records copied from it
+        self.blob = bytearray(blob)
+        self.offsets = {}
+
+    def add(self, text):
+        text = text or ""
+        if text not in self.offsets:
+            data = text.encode("utf-8")
+            self.offsets[text] = (len(self.blob), len(data))
+            self.blob += data
+        return self.offsets[text]
+
+
+def build_artifact(league, pokemon, version, gamemaster, path=None):
+    """
+    Compiles a processed league dataset (as returned by load_league) into a binary artifact.
+    Move types are read from gamemaster, the GameMaster the dataset was built
+    from (see data_loader.gamemaster_for).
+
+    Rows that build_league carried over unchanged from an artifact (see
+    ArtifactRow) are copied as encoded, together with that artifact's string
+    table, so rewriting a league after a small change only encodes what
+    changed. The inherited table is dropped once most of it is no longer
+    referenced, so it cannot grow without bound across refreshes.
+
+    Returns:
+        str: Path of the written artifact.
+    """
+    path = path or artifact_path(league)
+    base = next((p.artifact for p in pokemon if isinstance(p, ArtifactRow)), None)
+    strings = _StringTable()
+    if base is not None:
+        table = base.string_table()
+        if len(table) > 2 * base.referenced_string_size():
+            base = None
+        else:
+            strings = _StringTable(table)
+    type_names = list(base.type_names if base is not None else ALL_TYPES)
+    type_index = {t: i for i, t in enumerate(type_names)}
+
+    def type_id(t):
+        if t is None:
+            return NO_TYPE
+        if t not in type_index:
+            type_index[t] = len(type_names)
+            type_names.append(t)
+        return type_index[t]
+
+    moves_map = gamemaster.moves_map
+    records = bytearray()
+    moves = bytearray()
+    move_count = 0
+    for p in pokemon:
+        if base is not None and isinstance(p, ArtifactRow) and p.artifact is base:
+            record = base.record(p.index)
+            first_move, count = record[-3], record[-2]
+            moves += base.move_entries(first_move, count)
+            records += RECORD.pack(*record[:-3], move_count, count, record[-1])
+            move_count += count
+            continue
+
+        types = list(p["types"])[:2]
+        if len(p["types"]) > 2:
+            raise ValueError(f"{p['speciesId']} has more than two types")
+        type_ids = [type_id(t) for t in types] + [NO_TYPE] * (2 - len(types))
+
+        first_move = move_count
+        for raw, translated in zip(p["recommended_moves_raw"], p["recommended_moves"]):
+            m_type = moves_map.get(raw)
+            moves += MOVE.pack(*strings.add(raw), *strings.add(translated), type_id(m_type))
+            move_count += 1
+
+        rating = p["rating"] if p["rating"] is not None else float("nan")
+        records += RECORD.pack(
+            *strings.add(p["name"]), *strings.add(p["speciesId"]),
+            type_ids[0], type_ids[1],
+            types_to_mask(p["weaknesses"]), profile_for(types).resistance_mask,
+            coverage_mask(p["move_types"]), rating, first_move, move_count - first_move,
+            moveset_digest(p["recommended_moves_raw"], p["move_types"])
+        )
+
+    meta = json.dumps({"league": league, "version": version, "type_names": type_names}).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(pokemon), len(meta), len(strings.blob))
+    atomic_write(path, header + meta + bytes(records) + bytes(moves) + bytes(strings.blob))
+    return path
+
+
+class ArtifactRow(Mapping):
+    """
+    A row of a LeagueArtifact that a rebuild kept unchanged (see
+    data_loader.build_league). build_artifact copies its encoded record;
+    reading it as a dictionary decodes it once.
+    """
+
+    __slots__ = ("artifact", "index", "_pokemon")
+
+    def __init__(self, artifact, index):
+        self.artifact = artifact
+        self.index = index
+        self._pokemon = None
+
+    def _decoded(self):
+        if self._pokemon is None:
+            self._pokemon = self.artifact[self.index]
+        return self._pokemon
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+
+class LeagueArtifact(Sequence):
+    """
+    Read-only, memory-mapped view of a compiled league.
+
+    Behaves like the list returned by load_data: indexing or iterating yields
+    Pokemon dictionaries decoded on access. They are FrozenPokemon, read-only
+    like every shared dataset (see refresher.LeagueDataset); copy one with
+    dict(p) to modify it.
+
+    columns is a read-only numpy view of every record (see RECORD_DTYPE), so
+    ratings and type masks are read without decoding rows (see
+    pokemon_store.PokemonStore).
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, count, meta_len, strings_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a league artifact (format {FORMAT_VERSION})")
+
+        meta = json.loads(self._mm[HEADER.size:HEADER.size + meta_len])
+        self.path = path
+        self.league = meta["league"]
+        self.version = meta["version"]
+        self.type_names = tuple(meta["type_names"])
+        self._count = count
+        self._records_at = HEADER.size + meta_len
+        self._moves_at = self._records_at + count * RECORD.size
+        self._strings_at = len(self._mm) - strings_len
+        self.columns = np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=count, offset=self._records_at)
+        self._moves = np.frombuffer(
+            self._mm, dtype=MOVE_DTYPE, count=(self._strings_at - self._moves_at) // MOVE.size, offset=self._moves_at
+        )
+
+    def __len__(self):
+        return self._count
+
+    def _string(self, offset, length):
+        start = self._strings_at + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _strings(self, offsets, lengths):
+        table = self.string_table()
+        return [
+            table[offset:offset + length].decode("utf-8") for offset, length in zip(offsets.tolist(), lengths.tolist())
+        ]
+
+    def species_ids(self):
+        """The speciesId of every row, decoding only those strings."""
+        return tuple(self._strings(self.columns["species_id_offset"], self.columns["species_id_length"]))
+
+    def row_inputs(self):
+        """
+        speciesId -> (name, rating, types, moveset digest, ArtifactRow) of every
+        row, read from the columns (see data_loader.previous_inputs).
+        """
+        columns = self.columns
+        names = self._strings(columns["name_offset"], columns["name_length"])
+        types = {}
+        inputs = {}
+        for index, (species_id, name, type_pair, rating, digest) in enumerate(zip(
+            self.species_ids(), names, zip(columns["type_a"].tolist(), columns["type_b"].tolist()),
+            columns["rating"].tolist(), columns["moveset_digest"].tolist()
+        )):
+            if type_pair not in types:
+                types[type_pair] = tuple(self.type_names[t] for t in type_pair if t != NO_TYPE)
+            rating = None if rating != rating else rating
+            inputs[species_id] = (name, rating, types[type_pair], digest, ArtifactRow(self, index))
+        return inputs
+
+    def string_table(self):
+        return self._mm[self._strings_at:]
+
+    def referenced_string_size(self):
+        """Bytes of distinct strings the records and moves reference."""
+        keys = [
+            table[f"{prefix}_offset"].astype(np.int64) << 16 | table[f"{prefix}_length"]
+            for table, prefixes in ((self.columns, ("name", "species_id")), (self._moves, ("raw", "name")))
+            for prefix in prefixes
+        ]
+        return int((np.unique(np.concatenate(keys)) & 0xFFFF).sum())
+
+    def move_entries(self, first, count):
+        """The encoded MOVE entries of one record."""
+        start = self._moves_at + first * MOVE.size
+        return self._mm[start:start + count * MOVE.size]
+
+    def _type(self, index):
+        return None if index == NO_TYPE else self.type_names[index]
+
+    def record(self, index):
+        """Returns the raw record tuple for index (masks and type indices, no strings decoded)."""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self._mm, self._records_at + index * RECORD.size)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        (name_off, name_len, sid_off, sid_len, type_a, type_b,
+         weak_mask, resist_mask, cover_mask, rating, first_move, move_count, _) = self.record(index)
+
+        types = [self._type(t) for t in (type_a, type_b) if t != NO_TYPE]
+        moves_raw, moves_es, move_types, move_type_icons = [], [], [], []
+        for m in range(first_move, first_move + move_count):
+            raw_off, raw_len, es_off, es_len, m_type = MOVE.unpack_from(self._mm, self._moves_at + m * MOVE.size)
+            moves_raw.append(self._string(raw_off, raw_len))
+            moves_es.append(self._string(es_off, es_len))
+            m_type = self._type(m_type)
+            if m_type:
+                move_types.append(m_type)
+                move_type_icons.append(TYPE_ICONS.get(m_type, ""))
+            else:
+                move_type_icons.append("")
+
+        return FrozenPokemon({
+            "name": self._string(name_off, name_len),
+            "types": tuple(types),
+            "type_icons": tuple(TYPE_ICONS.get(t, "") for t in types),
+            "recommended_moves": tuple(moves_es),
+            "recommended_moves_raw": tuple(moves_raw),
+            "move_types": tuple(move_types),
+            "move_type_icons": tuple(move_type_icons),
+            "weaknesses": tuple(mask_to_types(weak_mask)),
+            "rating": None if rating != rating else rating,
+            "speciesId": self._string(sid_off, sid_len),
+            "weakness_mask": weak_mask,
+            "resistance_mask": resist_mask,
+            "coverage_mask": cover_mask
+        })
+
+    def close(self):
+        # The mapping can only be closed once no view of it is left
+        self.columns = self._moves = None
+        self._mm.close()
+
+
+def load_artifact(league, directory=ARTIFACT_DIR):
+    """Returns the mapped LeagueArtifact for league, or None if none has been built."""
+    path = artifact_path(league, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        return LeagueArtifact(path)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable artifact {path}: {e}")
+        return None
+
+
+def main(argv):
+    if not argv or argv[0] != "build":
+        print("Usage: python league_artifact.py build [league ...]")
+        return 2
+
+    leagues = argv[1:] or ["1500", "2500", "10000"]
+    for league in leagues:
+        pokemon, version, _ = load_league(league)
+        gamemaster = gamemaster_for(version) if pokemon else None
+        if gamemaster is None:
+            print(f"Skipping league {league}: no data")
+            continue
+        path = build_artifact(league, pokemon, version, gamemaster)
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes, version {version})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
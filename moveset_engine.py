@@ -0,0 +1,153 @@
+"""
+Moveset enumeration and bulk scoring.
+
+Every legal moveset (one fast move and two charged moves, or one charged
+move for species that only learn one) of every species in the gamemaster is
+laid out as one row of flat numpy arrays, so metrics and coverage are
+computed for all combinations at once instead of per moveset in Python.
+
+Metrics per moveset (PvP turns are 500 ms):
+    fast_dpt         fast move damage per turn, with STAB
+    fast_ept         fast move energy per turn
+    turns_to_charge  turns of fast moves before the cheaper charged move is ready
+    pressure         fast_dpt + fast_ept * best charged damage per energy:
+                     damage per turn when energy goes into the most efficient charged move
+    coverage         super-effective coverage bitmask of the three move types
+"""
+import threading
+from itertools import combinations
+
+import numpy as np
+
+from data_loader import MOVES_ES, get_gamemaster
+from type_engine import ALL_TYPES, COVERAGE_MASKS, TYPE_BITS, TYPE_INDEX, mask_to_types, types_to_mask
+
+STAB = 1.2
+TURN_MS = 500
+NO_MOVE = -1
+
+
+def translate_move(move_id):
+    return MOVES_ES.get(move_id, move_id.replace("_", " ").title())
+
+
+class MovesetEngine:
+    """All movesets of one gamemaster version with their metrics, as flat arrays."""
+
+    def __init__(self, gamemaster):
+        self.version = gamemaster.version
+
+        # Move table; a trailing all-zero entry stands for "no move", so
+        # NO_MOVE (-1) indexes it directly
+        self.move_ids = tuple(sorted(gamemaster.move_stats))
+        move_index = {m: i for i, m in enumerate(self.move_ids)}
+        stats = np.array([gamemaster.move_stats[m] for m in self.move_ids] + [(0, 0, 0, 0)], dtype=np.float64).reshape(-1, 4)
+        self.power, self.energy, self.energy_gain = stats[:, 0], stats[:, 1], stats[:, 2]
+        self.turns = np.round(stats[:, 3] / TURN_MS)
+        self.move_type_ids = np.array(
+            [TYPE_INDEX.get(gamemaster.moves_map[m], NO_MOVE) for m in self.move_ids] + [NO_MOVE], dtype=np.intp
+        )
+
+        species_ids, type_masks, fast, charged_1, charged_2, offsets = [], [], [], [], [], [0]
+        for species_id in sorted(gamemaster.move_pools):
+            fast_pool, charged_pool = gamemaster.move_pools[species_id]
+            fast_moves = [move_index[m] for m in fast_pool if m in move_index and self.turns[move_index[m]] > 0]
+            charged_moves = [move_index[m] for m in charged_pool if m in move_index and self.energy[move_index[m]] > 0]
+            pairs = list(combinations(charged_moves, 2)) or [(c, NO_MOVE) for c in charged_moves]
+            for f in fast_moves:
+                for c1, c2 in pairs:
+                    fast.append(f)
+                    charged_1.append(c1)
+                    charged_2.append(c2)
+            species_ids.append(species_id)
+            type_masks.append(types_to_mask(gamemaster.species_types_map.get(species_id, [])))
+            offsets.append(len(fast))
+
+        self.species_ids = tuple(species_ids)
+        self._rows = {species_id: row for row, species_id in enumerate(self.species_ids)}
+        self.offsets = np.array(offsets, dtype=np.intp)
+        self.fast = np.array(fast, dtype=np.intp)
+        self.charged_1 = np.array(charged_1, dtype=np.intp)
+        self.charged_2 = np.array(charged_2, dtype=np.intp)
+        self.species_type_masks = np.repeat(np.array(type_masks, dtype=np.int64), np.diff(self.offsets))
+        self._score()
+
+    def _stab(self, moves):
+        bits = np.array(TYPE_BITS + (0,), dtype=np.int64)[self.move_type_ids[moves]]
+        return np.where(self.species_type_masks & bits, STAB, 1.0)
+
+    def _score(self):
+        f, c1, c2 = self.fast, self.charged_1, self.charged_2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.fast_dpt = self.power[f] * self._stab(f) / self.turns[f]
+            self.fast_ept = self.energy_gain[f] / self.turns[f]
+
+            dpe_1 = self.power[c1] * self._stab(c1) / self.energy[c1]
+            dpe_2 = np.where(c2 != NO_MOVE, self.power[c2] * self._stab(c2) / self.energy[c2], 0.0)
+            self.best_dpe = np.maximum(dpe_1, dpe_2)
+
+            cheapest = np.where(c2 != NO_MOVE, np.minimum(self.energy[c1], self.energy[c2]), self.energy[c1])
+            casts = np.ceil(cheapest / self.energy_gain[f])
+            self.turns_to_charge = np.where(self.energy_gain[f] > 0, casts * self.turns[f], np.inf)
+
+        self.pressure = self.fast_dpt + self.fast_ept * self.best_dpe
+        coverage = np.array(COVERAGE_MASKS + (0,), dtype=np.int64)
+        self.coverage = (
+            coverage[self.move_type_ids[f]] | coverage[self.move_type_ids[c1]] | coverage[self.move_type_ids[c2]]
+        )
+
+    def __contains__(self, species_id):
+        return species_id in self._rows
+
+    def rows(self, species_id):
+        """Slice of the moveset arrays belonging to a species (empty if unknown)."""
+        row = self._rows.get(species_id)
+        if row is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[row]), int(self.offsets[row + 1]))
+
+    def moveset(self, i):
+        """Moveset i as a dictionary."""
+        indices = [m for m in (self.fast[i], self.charged_1[i], self.charged_2[i]) if m != NO_MOVE]
+        moves = [self.move_ids[m] for m in indices]
+        return {
+            "moves": moves,
+            "move_names": [translate_move(m) for m in moves],
+            "move_types": [ALL_TYPES[self.move_type_ids[m]] for m in indices if self.move_type_ids[m] != NO_MOVE],
+            "fast_dpt": round(float(self.fast_dpt[i]), 2),
+            "fast_ept": round(float(self.fast_ept[i]), 2),
+            "turns_to_charge": float(self.turns_to_charge[i]),
+            "pressure": round(float(self.pressure[i]), 2),
+            "coverage": list(mask_to_types(int(self.coverage[i])))
+        }
+
+    def movesets(self, species_id, top=None):
+        """Movesets of a species, best pressure first (ties: faster charge, then gamemaster order)."""
+        rows = self.rows(species_id)
+        order = np.lexsort((self.turns_to_charge[rows], -self.pressure[rows]))[:top]
+        return [self.moveset(rows.start + int(i)) for i in order]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_moveset_engine(gamemaster=None):
+    """Returns the MovesetEngine of the current gamemaster, building it once per version."""
+    global _engine
+
+    gamemaster = gamemaster or get_gamemaster()
+    with _engine_lock:
+        if _engine is None or _engine.version != gamemaster.version:
+            _engine = MovesetEngine(gamemaster)
+        return _engine
+
+
+if __name__ == "__main__":
+    import sys
+
+    engine = get_moveset_engine()
+    print(f"{len(engine.fast)} movesets for {len(engine.species_ids)} species")
+    species_id = sys.argv[1] if len(sys.argv) > 1 else engine.species_ids[0]
+    for moveset in engine.movesets(species_id, top=5):
+        print(moveset)
@@ -0,0 +1,104 @@
+"""
+Read-only Pokemon records and the columns of a league dataset.
+
+League data is handed to every session, request and worker by reference
+(see refresher.LeagueDataset), so its entries must never change under a
+reader. Plain lists built from the network are frozen with freeze_pokemon;
+memory-mapped artifacts (see league_artifact) decode rows as FrozenPokemon.
+
+PokemonStore exposes a dataset's ratings and type masks as numpy columns
+indexed by row id, for analysis code that works on integers (see
+team_logic.CandidatePool). Over an artifact the columns are views of its
+mapped records, so they cost no memory of their own. Names are resolved by
+search_index, the one normalizer every entry point shares.
+"""
+import numpy as np
+
+from type_engine import coverage_mask, profile_for, types_to_mask
+
+NO_TYPE = 255  # type index of a missing second type or a move of unknown type
+
+
+class FrozenPokemon(dict):
+    """
+    A loader dictionary that cannot be modified.
+
+    League datasets are shared by every session and request, so their entries
+    are frozen: list values become tuples and every mutating method raises
+    TypeError. Use dict(p) or {**p} for a private, mutable copy.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.get('speciesId')!r} belongs to a shared dataset and is read-only; copy it first")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # pickle's default for dict subclasses refills the instance through __setitem__
+        return (FrozenPokemon, (dict(self),))
+
+
+def freeze_pokemon(pokemon):
+    """
+    Returns a league dataset as a tuple of FrozenPokemon, decoding lazily
+    backed sequences (such as a LeagueArtifact) once. Entries that are already
+    frozen are reused, so refreezing a rebuilt league only converts what changed.
+    """
+    return tuple(
+        p if isinstance(p, FrozenPokemon)
+        else FrozenPokemon({key: tuple(value) if isinstance(value, list) else value for key, value in p.items()})
+        for p in pokemon
+    )
+
+
+class PokemonStore:
+    """
+    Rating and type-mask columns of one league dataset, by row id.
+
+    A row id is the entry's position in the dataset. Columns are numpy
+    arrays: ratings (float64, NaN when unrated) and the weakness,
+    resistance and super-effective coverage bitmasks (uint32, see
+    type_engine). A LeagueArtifact provides them as read-only views of its
+    records; other datasets have them computed once, using the precomputed
+    masks when an entry has them (data_loader output).
+    """
+
+    def __init__(self, pokemon):
+        columns = getattr(pokemon, "columns", None)
+        if columns is not None:
+            # Memory-mapped artifact: views, no copy
+            self.species_ids = pokemon.species_ids()
+            self.ratings = columns["rating"]
+            self.weakness_masks = columns["weakness_mask"]
+            self.resistance_masks = columns["resistance_mask"]
+            self.coverage_masks = columns["coverage_mask"]
+        else:
+            self.species_ids = tuple(p.get("speciesId") for p in pokemon)
+            self.ratings = np.array(
+                [np.nan if p.get("rating") is None else p["rating"] for p in pokemon], dtype=np.float64
+            )
+            self.weakness_masks = _column(pokemon, "weakness_mask", lambda p: types_to_mask(p.get("weaknesses", [])))
+            self.resistance_masks = _column(
+                pokemon, "resistance_mask", lambda p: profile_for(p.get("types", [])).resistance_mask
+            )
+            self.coverage_masks = _column(pokemon, "coverage_mask", lambda p: coverage_mask(p.get("move_types", [])))
+
+        self._rows = {}
+        for row, species_id in enumerate(self.species_ids):
+            self._rows.setdefault(species_id, row)
+
+    def __len__(self):
+        return len(self.species_ids)
+
+    def index_of(self, species_id):
+        """Row id of a speciesId, or None."""
+        return self._rows.get(species_id)
+
+
+def _column(pokemon, key, compute):
+    return np.array(
+        [p[key] if p.get(key) is not None else compute(p) for p in pokemon], dtype=np.uint32
+    )
@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+
+from battle_sim import get_battle_matrix
+from data_loader import gamemaster_for, get_matchup_matrix, load_league
+from league_artifact import LeagueArtifact, build_artifact, load_artifact
+from moveset_engine import get_moveset_engine
+from pokemon_store import PokemonStore, freeze_pokemon
+from similarity_index import get_similarity_index
+from snapshot_cache import get_store
+from team_logic import CandidatePool
+
+# How often the background thread revalidates and rebuilds each league (seconds)
+REFRESH_INTERVAL = int(os.environ.get("PVPOKE_REFRESH_INTERVAL", 15 * 60))
+# How long a league whose first load failed is served empty before it is retried (seconds)
+RETRY_INTERVAL = int(os.environ.get("PVPOKE_RETRY_INTERVAL", 60))
+
+
+class LeagueDataset:
+    """
+    One immutable build of a league's processed data.
+
+    The Pokemon are frozen (see pokemon_store.FrozenPokemon) and this one
+    object is handed to every session and request by reference, so nothing is
+    copied per reader and no reader can change what the others see. Lists
+    built from the network are frozen once here; a memory-mapped
+    LeagueArtifact is kept as is, since it already decodes frozen rows on
+    access and its pages are shared by every process.
+
+    The structures derived from a version (columnar store, candidate pool,
+    matchup matrix, similarity index, moveset engine and, if one was
+    simulated, battle matrix) are attached by the refresher before the dataset is swapped in,
+    so readers never build them. Each is None if it could not be built.
+
+    A league whose first load failed is served as an empty dataset with
+    retry_at set: the time after which the refresher tries to load it again.
+    """
+
+    __slots__ = (
+        "league", "pokemon", "version", "built_at", "changes",
+        "store", "pool", "matchups", "similarity", "movesets", "battles", "retry_at"
+    )
+
+    def __init__(self, league, pokemon, version, built_at, changes=None, retry_at=None):
+        self.league = league
+        self.pokemon = pokemon if isinstance(pokemon, LeagueArtifact) else freeze_pokemon(pokemon)
+        self.version = version
+        self.built_at = built_at
+        # data_loader.Changeset against the dataset this one replaced, if any
+        self.changes = changes
+        self.store = None
+        self.pool = None
+        self.matchups = None
+        self.similarity = None
+        self.movesets = None
+        self.battles = None
+        self.retry_at = retry_at
+
+    @property
+    def age(self):
+        """Seconds since this dataset was built."""
+        return time.time() - self.built_at
+
+
+class LeagueRefresher:
+    """
+    Keeps every requested league's processed data warm and fresh.
+
+    Readers always get the current dataset immediately (stale-while-revalidate):
+    a daemon thread periodically revalidates the pvpoke snapshots, rebuilds a
+    league off the request path when its data version changes, and swaps the
+    new dataset in with a single reference assignment. The only time a reader
+    can wait on the network is the very first load of a league with no local
+    snapshot on disk. If that load fails, the league is served empty and the
+    background thread retries it every retry_interval seconds (without a
+    running thread, the next reader after the backoff does).
+
+    Every new build is compiled into the league's artifact (see
+    league_artifact) with the gamemaster of its own data version, and served
+    from the mapped file, so processes keep sharing one copy across refreshes.
+    """
+
+    def __init__(self, leagues=("1500", "2500", "10000"), interval=REFRESH_INTERVAL, store=None,
+                 retry_interval=RETRY_INTERVAL):
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.store = store or get_store()
+        self._datasets = {}
+        self._leagues = list(leagues)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the background refresh thread (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="league-refresher", daemon=True)
+                self._thread.start()
+        return self
+
+    def dataset(self, league):
+        """Returns the current LeagueDataset for league, loading it on first use."""
+        current = self._datasets.get(league)
+        if current is not None and not self._retry_due(current):
+            return current
+
+        with self._lock:
+            if league not in self._leagues:
+                self._leagues.append(league)
+            load_lock = self._load_locks.setdefault(league, threading.Lock())
+
+        with load_lock:
+            current = self._datasets.get(league)
+            if current is None:
+                # Serve whatever is on disk right away and let the background
+                # thread revalidate it: a compiled artifact if one was built,
+                # else the raw snapshots. Only hit the network if neither exists.
+                current = self._from_artifact(league) or self._build(league, self.store.offline_view())
+                if current is None:
+                    current = self._build(league, self.store)
+                    if current is None:
+                        # Served empty; the background thread schedules the retry
+                        current = self._failed(league)
+                        self._wakeup.set()
+                else:
+                    self._wakeup.set()
+            elif self._retry_due(current):
+                current = self._retry(league)
+            return current
+
+    def get(self, league):
+        """Returns the current Pokemon of league: a shared, read-only tuple of dictionaries."""
+        return self.dataset(league).pokemon
+
+    def version(self, league):
+        return self.dataset(league).version
+
+    def age(self, league):
+        return self.dataset(league).age
+
+    def refresh(self, league, max_age=0):
+        """
+        Revalidates a league's snapshots and rebuilds it if the data version changed.
+
+        Returns:
+            bool: True if a new dataset was swapped in.
+        """
+        current = self._datasets.get(league)
+        if current is not None and current.retry_at is not None:
+            return self._retry(league, max_age).retry_at is None
+        rebuilt = self._build(league, self.store, max_age=max_age, skip_version=current and current.version)
+        return rebuilt is not None and rebuilt is not current
+
+    def _retry_due(self, dataset):
+        # Only readers of a refresher without a background thread retry failed loads themselves
+        return dataset.retry_at is not None and self._thread is None and time.time() >= dataset.retry_at
+
+    def _failed(self, league):
+        """Stores and returns the empty dataset of a league that could not be loaded."""
+        print(f"Could not load league {league}; retrying in {self.retry_interval}s")
+        dataset = LeagueDataset(league, [], None, time.time(), retry_at=time.time() + self.retry_interval)
+        self._datasets[league] = dataset
+        return dataset
+
+    def _retry(self, league, max_age=None):
+        """Loads a league whose first load failed again, backing off if it fails again."""
+        try:
+            rebuilt = self._build(league, self.store, max_age=max_age)
+        except Exception:
+            self._failed(league)
+            raise
+        return rebuilt or self._failed(league)
+
+    def _from_artifact(self, league):
+        artifact = load_artifact(league)
+        if artifact is None or not len(artifact):
+            return None
+        dataset = LeagueDataset(league, artifact, artifact.version, os.path.getmtime(artifact.path))
+        self._prepare(dataset, self.store.offline_view())
+        self._datasets[league] = dataset
+        return dataset
+
+    def _build(self, league, store, max_age=None, skip_version=None):
+        current = self._datasets.get(league)
+        if current is not None and current.retry_at is not None:
+            current = None
+        pokemon, version, changes = load_league(
+            league, store=store, max_age=max_age, known_version=skip_version,
+            previous=current.pokemon if current is not None else None
+        )
+        if pokemon is None:
+            # Nothing changed upstream: keep serving the current object
+            return current
+        if not pokemon:
+            return None
+
+        pokemon = self._to_artifact(league, pokemon, version, store)
+        dataset = LeagueDataset(league, pokemon, version, time.time(), changes)
+        self._prepare(dataset, store)
+        self._datasets[league] = dataset
+        return dataset
+
+    def _to_artifact(self, league, pokemon, version, store):
+        """
+        Compiles a newly built league into its artifact and returns the mapped
+        artifact, so every process keeps sharing one copy after a refresh.
+        Rows the rebuild kept from the current artifact are copied, not
+        re-encoded. An artifact another process already compiled for this
+        version is reused.
+        Falls back to the built list if the artifact cannot be written.
+        """
+        artifact = load_artifact(league)
+        if artifact is not None and artifact.version == version:
+            return artifact
+        gamemaster = gamemaster_for(version, store)
+        if gamemaster is None:
+            return pokemon
+        try:
+            return LeagueArtifact(build_artifact(league, pokemon, version, gamemaster))
+        except (OSError, ValueError) as e:
+            print(f"Could not write the artifact of league {league}: {e}")
+            return pokemon
+
+    def _prepare(self, dataset, store):
+        """Builds the per-version structures of a dataset before it is served."""
+        league, pokemon, version = dataset.league, dataset.pokemon, dataset.version
+        dataset.store = PokemonStore(pokemon)
+        # Owned by the dataset, so it is freed when a refresh retires the dataset
+        dataset.pool = CandidatePool.register(CandidatePool(pokemon, dataset.store))
+        try:
+            dataset.matchups = get_matchup_matrix(league, store)
+        except Exception as e:
+            print(f"No matchup matrix for league {league}: {e}")
+        try:
+            dataset.similarity = get_similarity_index(league, pokemon, version, dataset.matchups)
+        except Exception as e:
+            print(f"No similarity index for league {league}: {e}")
+        # The gamemaster this version was built from, so derived data never mixes versions
+        gamemaster = gamemaster_for(version, store)
+        try:
+            if gamemaster is not None:
+                dataset.movesets = get_moveset_engine(gamemaster)
+        except Exception as e:
+            print(f"No moveset engine for league {league}: {e}")
+        try:
+            # Battle matrices are only loaded here; simulating one is a batch job (see battle_sim)
+            dataset.battles = get_battle_matrix(league, pokemon, version, gamemaster, build=False)
+        except Exception as e:
+            print(f"No battle matrix for league {league}: {e}")
+
+    def _run(self):
+        while True:
+            for league in list(self._leagues):
+                current = self._datasets.get(league)
+                if current is not None and current.retry_at is not None and time.time() < current.retry_at:
+                    continue
+                try:
+                    self.refresh(league)
+                except Exception as e:
+                    # Keep serving the previous version; try again next cycle
+                    print(f"Background refresh of league {league} failed: {e}")
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+
+    def _next_wait(self):
+        """Seconds until the next cycle: the refresh interval, or sooner if a failed league is due."""
+        retries = [d.retry_at - time.time() for d in list(self._datasets.values()) if d.retry_at is not None]
+        return max(0.0, min([self.interval] + retries))
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_refresher():
+    """Returns the process-wide LeagueRefresher, started on first use."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = LeagueRefresher().start()
+    return _refresher
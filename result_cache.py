@@ -0,0 +1,217 @@
+"""
+Persistent cache of generated teams, shared by every process on the machine.
+
+Results of search_teams are stored in a local SQLite database keyed by
+league, data version, scoring (with or without meta-threat bonuses) and the
+sorted speciesIds of the seed team, so a popular
+seed is only searched once per data version across sessions, restarts and
+worker processes. Only a league's newest data version, as first seen by any
+process, keeps entries: older ones are dropped as soon as a newer version
+is seen and never stored again, and the table is trimmed to max_entries by least
+recent use. Hit and miss counters are kept in the database too.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from snapshot_cache import CACHE_DIR
+from team_logic import CandidatePool
+from team_search import search_teams
+
+RESULT_CACHE_PATH = os.environ.get(
+    "PVPOKE_RESULT_CACHE", os.path.join(os.path.dirname(CACHE_DIR) or ".", "results.sqlite3")
+)
+MAX_ENTRIES = int(os.environ.get("PVPOKE_RESULT_CACHE_SIZE", 5000))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    league TEXT NOT NULL,
+    version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE INDEX IF NOT EXISTS results_league ON results (league, version);
+CREATE TABLE IF NOT EXISTS versions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    league TEXT NOT NULL,
+    version TEXT NOT NULL,
+    UNIQUE (league, version)
+);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0), ('invalidations', 0);
+"""
+
+
+def cache_key(league, version, seed_ids, scoring=""):
+    return "|".join([str(league), str(version), str(scoring)] + sorted(seed_ids))
+
+
+class ResultCache:
+    """SQLite-backed cache of JSON payloads; safe to use from many threads and processes."""
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._current_versions = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as db:
+            db.executescript(_SCHEMA)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared across threads; keep one per thread
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, db, name, amount=1):
+        db.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _invalidate_old(self, db, league, version):
+        """
+        Registers a league's data version and drops every entry that is not
+        of the newest one, once per version per process.
+
+        Versions are ordered by when any process first saw them. Only the
+        newest version of a league keeps entries, whatever this process last
+        saw: during a rollout a process still on the previous version never
+        deletes the entries of the newer one, and put refuses to store its
+        results.
+        """
+        if self._current_versions.get(league) == version:
+            return
+        db.execute("INSERT OR IGNORE INTO versions (league, version) VALUES (?, ?)", (league, version))
+        removed = db.execute(
+            "DELETE FROM results WHERE league = ? AND version != "
+            "(SELECT version FROM versions WHERE league = ? ORDER BY seq DESC LIMIT 1)",
+            (league, league)
+        ).rowcount
+        if removed:
+            self._count(db, "invalidations", removed)
+        self._current_versions[league] = version
+
+    def get(self, league, version, seed_ids, accept=None, scoring=""):
+        """
+        Returns the cached payload, or None on a miss. A payload that the
+        optional accept(payload) predicate rejects also counts as a miss.
+        scoring names how the payload was computed, if it can differ.
+        """
+        key = cache_key(league, version, seed_ids, scoring)
+        with self._connection() as db:
+            self._invalidate_old(db, league, version)
+            row = db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            payload = json.loads(row[0]) if row is not None else None
+            if payload is None or (accept is not None and not accept(payload)):
+                self._count(db, "misses")
+                return None
+            db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count(db, "hits")
+        return payload
+
+    def put(self, league, version, seed_ids, payload, scoring=""):
+        """Stores a payload, unless another process has already seen a newer data version."""
+        now = time.time()
+        with self._connection() as db:
+            self._invalidate_old(db, league, version)
+            # One statement, so a newer version registered meanwhile is never missed
+            db.execute(
+                "INSERT OR REPLACE INTO results SELECT ?, ?, ?, ?, ?, ? WHERE ? = "
+                "(SELECT version FROM versions WHERE league = ? ORDER BY seq DESC LIMIT 1)",
+                (cache_key(league, version, seed_ids, scoring), league, version, json.dumps(payload), now, now,
+                 version, league)
+            )
+            excess = db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._count(db, "evictions", excess)
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM results")
+            db.execute("UPDATE counters SET value = 0")
+        self._current_versions.clear()
+
+    def stats(self):
+        """Counters shared by every process using this database."""
+        db = self._connection()
+        counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        entries = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": entries,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Returns the process-wide ResultCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+    return _cache
+
+
+def cached_search_teams(analyzer, seed_team, all_pokemon, league, version, k=5, cache=None, matchups=None):
+    """
+    search_teams through the result cache.
+
+    Only complete searches are stored. Cached teams are rebuilt from the
+    current dataset by speciesId, so the return value has the same shape as
+    search_teams (plus "cached": True on a hit). Without a data version the
+    cache is bypassed. Searches with a matchup matrix (meta-threat bonuses)
+    are cached apart from searches without one.
+    """
+    if not version:
+        return search_teams(analyzer, seed_team, all_pokemon, k=k, matchups=matchups)
+
+    cache = cache or get_result_cache()
+    seed_ids = [p["speciesId"] for p in seed_team]
+    scoring = f"threats:{matchups.version}" if matchups is not None else "types"
+    # A hit must hold at least k teams, or every team there was when it was stored
+    payload = cache.get(
+        league, version, seed_ids, accept=lambda p: p["k"] >= k or len(p["teams"]) < p["k"], scoring=scoring
+    )
+    if payload is not None:
+        pool = CandidatePool.for_dataset(all_pokemon)
+        teams = []
+        for team in payload["teams"][:k]:
+            positions = [pool.positions_of(species_id) for species_id in team["additions"]]
+            if not all(positions):
+                break
+            additions = [{**all_pokemon[p[0]]} for p in positions]
+            teams.append({"members": list(seed_team) + additions, "additions": additions, "score": team["score"]})
+        else:
+            return {"teams": teams, "complete": True, "explored": 0, "elapsed": 0.0, "cached": True}
+
+    result = search_teams(analyzer, seed_team, all_pokemon, k=k, matchups=matchups)
+    if result["complete"]:
+        cache.put(league, version, seed_ids, {
+            "k": k,
+            "teams": [
+                {"additions": [p["speciesId"] for p in team["additions"]], "score": team["score"]}
+                for team in result["teams"]
+            ]
+        }, scoring=scoring)
+    return result
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_result_cache().stats(), indent=2))
@@ -0,0 +1,203 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from team_logic import POPCOUNT, CandidatePool, TeamAnalyzer
+from type_engine import ALL_TYPES_MASK
+
+ROSTER_SIZE = 6
+BRING_SIZE = 3
+
+# Roster score = (1 - WORST_WEIGHT) * mean sub-team value + WORST_WEIGHT * worst sub-team value
+WORST_WEIGHT = 0.25
+DEFAULT_BEAM_WIDTH = 24
+DEFAULT_MAX_CANDIDATES = 60
+
+# Column triples of every 3-member sub-team, per roster size
+_TRIPLES = {size: np.array(list(combinations(range(size), BRING_SIZE)), dtype=np.intp) for size in range(BRING_SIZE, ROSTER_SIZE + 1)}
+_PAIRS = {size: np.array(list(combinations(range(size), 2)), dtype=np.intp).reshape(-1, 2) for size in range(0, BRING_SIZE)}
+
+
+def roster_scores(ratings, weakness, coverage):
+    """
+    Scores rosters from their member columns.
+
+    Each 3-member sub-team is valued like evaluate_coverage judges a team:
+    the sum of ratings, -50 per shared weakness and -10 per type nobody hits
+    super effectively. A roster scores a blend of the mean and the worst of
+    its sub-teams, rewarding rosters where any bring-3 choice holds up.
+    Rosters smaller than three members fall back to rating minus pairwise
+    shared weaknesses, which is only used to rank partial rosters.
+
+    Args:
+        ratings, weakness, coverage: arrays of shape (rosters, members).
+
+    Returns:
+        tuple: (score, mean, worst) arrays of shape (rosters,).
+    """
+    size = ratings.shape[1]
+    if size < BRING_SIZE:
+        pairs = _PAIRS[size]
+        shared = np.zeros(ratings.shape[0], dtype=np.int64)
+        for a, b in pairs:
+            shared |= weakness[:, a] & weakness[:, b]
+        value = ratings.sum(axis=1) - POPCOUNT[shared] * 50
+        return value, value, value
+
+    triples = _TRIPLES[size]
+    wa, wb, wc = (weakness[:, triples[:, k]] for k in range(BRING_SIZE))
+    shared = (wa & wb) | (wa & wc) | (wb & wc)
+    covered = coverage[:, triples[:, 0]] | coverage[:, triples[:, 1]] | coverage[:, triples[:, 2]]
+    values = (
+        ratings[:, triples].sum(axis=2)
+        - POPCOUNT[shared] * 50
+        - POPCOUNT[ALL_TYPES_MASK & ~covered] * 10
+    )
+    mean = values.mean(axis=1)
+    worst = values.min(axis=1)
+    return (1 - WORST_WEIGHT) * mean + WORST_WEIGHT * worst, mean, worst
+
+
+# Per-process search state, set once by _init_worker so tasks only carry an index
+_worker = {}
+
+
+def _init_worker(seed_columns, ratings, weakness, coverage, needed, beam_width, k):
+    _worker.update(
+        seed_columns=seed_columns, ratings=ratings, weakness=weakness, coverage=coverage,
+        needed=needed, beam_width=beam_width, k=k
+    )
+
+
+def _columns(states):
+    """Stacks seed and candidate columns for a batch of partial rosters (tuples of candidate indices)."""
+    seed_r, seed_w, seed_c = _worker["seed_columns"]
+    picks = np.array(states, dtype=np.intp).reshape(len(states), -1)
+    rows = len(states)
+    ratings = np.hstack([np.broadcast_to(seed_r, (rows, len(seed_r))), _worker["ratings"][picks]])
+    weakness = np.hstack([np.broadcast_to(seed_w, (rows, len(seed_w))), _worker["weakness"][picks]])
+    coverage = np.hstack([np.broadcast_to(seed_c, (rows, len(seed_c))), _worker["coverage"][picks]])
+    return ratings, weakness, coverage
+
+
+def _search_from(first):
+    """
+    Beam search over rosters whose lowest-indexed addition is `first`.
+    Additions are kept in increasing index order, so every roster belongs to
+    exactly one task and results do not depend on how tasks are distributed.
+    """
+    n = len(_worker["ratings"])
+    beam = [(first,)]
+    for _ in range(_worker["needed"] - 1):
+        expansions = [state + (j,) for state in beam for j in range(state[-1] + 1, n)]
+        if not expansions:
+            return []
+        scores = roster_scores(*_columns(expansions))[0]
+        # Stable order keeps ties deterministic (by generation order)
+        keep = np.argsort(-scores, kind="stable")[:_worker["beam_width"]]
+        beam = [expansions[i] for i in keep]
+
+    score, mean, worst = roster_scores(*_columns(beam))
+    order = np.argsort(-score, kind="stable")[:_worker["k"]]
+    return [(score[i].item(), mean[i].item(), worst[i].item(), beam[i]) for i in order]
+
+
+def search_rosters(analyzer, seed_team, all_pokemon, k=5, workers=None,
+                   beam_width=DEFAULT_BEAM_WIDTH, max_candidates=DEFAULT_MAX_CANDIDATES):
+    """
+    Builds the K best 6-member rosters (bring 6, pick 3) around a seed.
+
+    Candidates are the suggest_teammate pool (rated 80+, not in the seed),
+    limited to the `max_candidates` best rated. The search is split by each
+    roster's first addition into independent beam searches that run on a
+    process pool; results are merged by (score, candidate order), so they are
+    identical for any number of workers.
+
+    Args:
+        analyzer (TeamAnalyzer): Provides the type masks of each Pokemon.
+        seed_team (list): 0 to 5 Pokemon objects that must be in the roster.
+        all_pokemon (list): The league dataset.
+        k (int): Number of rosters to return.
+        workers (int): Worker processes; defaults to the CPU count. 1 runs in-process.
+        beam_width (int): Partial rosters kept per level in each task.
+        max_candidates (int): Size of the candidate pool.
+
+    Returns:
+        dict: "rosters" (list of {"members", "additions", "score", "mean", "worst"},
+        best first), "workers", "tasks" and "elapsed" (seconds).
+    """
+    start = time.perf_counter()
+    needed = ROSTER_SIZE - len(seed_team)
+    if needed < 1:
+        raise ValueError(f"The seed must have fewer than {ROSTER_SIZE} members, got {len(seed_team)}")
+
+    positions, _ = analyzer.score_candidates(seed_team, all_pokemon)
+    pool = CandidatePool.for_dataset(all_pokemon)
+    order = np.argsort(-pool.ratings[positions], kind="stable")[:max_candidates]
+    positions = positions[order]
+
+    seed_columns = (
+        np.array([p.get("rating", 0) or 0 for p in seed_team], dtype=np.float64),
+        np.array([analyzer._weakness_mask(p) for p in seed_team], dtype=np.int64),
+        np.array([analyzer._coverage_mask(p) for p in seed_team], dtype=np.int64)
+    )
+    initargs = (
+        seed_columns, pool.ratings[positions], pool.weakness[positions], pool.coverage[positions],
+        needed, beam_width, k
+    )
+
+    tasks = range(len(positions) - needed + 1)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(*initargs)
+        found = [r for first in tasks for r in _search_from(first)]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+            found = [r for results in executor.map(_search_from, tasks, chunksize=chunksize) for r in results]
+
+    found.sort(key=lambda r: (-r[0], r[3]))
+    rosters = []
+    for score, mean, worst, picks in found[:k]:
+        additions = [{**all_pokemon[int(positions[i])]} for i in picks]
+        rosters.append({
+            "members": list(seed_team) + additions,
+            "additions": additions,
+            "score": score,
+            "mean": mean,
+            "worst": worst
+        })
+    return {
+        "rosters": rosters,
+        "workers": workers,
+        "tasks": len(tasks),
+        "elapsed": time.perf_counter() - start
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from data_loader import load_data
+
+    parser = argparse.ArgumentParser(description="Build 6-Pokemon rosters for bring-6-pick-3 formats.")
+    parser.add_argument("league", nargs="?", default="1500")
+    parser.add_argument("--seed", nargs="*", default=[], help="speciesIds that must be in the roster")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--beam", type=int, default=DEFAULT_BEAM_WIDTH)
+    parser.add_argument("--candidates", type=int, default=DEFAULT_MAX_CANDIDATES)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_data(args.league)
+    by_id = {p["speciesId"]: p for p in data}
+    seed = [by_id[s] for s in args.seed if s in by_id]
+    result = search_rosters(TeamAnalyzer(), seed, data, k=args.k, workers=args.workers,
+                            beam_width=args.beam, max_candidates=args.candidates)
+    for roster in result["rosters"]:
+        print(f"{roster['score']:.1f} (mean {roster['mean']:.1f}, worst {roster['worst']:.1f}):",
+              ", ".join(p["name"] for p in roster["members"]))
+    print(f"{result['tasks']} tasks on {result['workers']} workers in {result['elapsed']:.2f} s")
@@ -0,0 +1,188 @@
+"""
+Species lookup and type-ahead search within a league.
+
+Exact lookups by display name or speciesId are dictionary hits on a
+normalized key (case, accents and punctuation ignored). Fuzzy search runs on
+character n-grams: every species is indexed under the grams of its name, its
+speciesId, its types in English and Spanish and, for shadow forms, the Spanish
+aliases "sombra" and "oscuro". A species scores the share of the query's
+grams it contains, so prefixes ("azu"), typos ("azumarril") and
+type or alias words ("fuego", "sombra") all match. Ties go to the higher
+rated species.
+
+Indexes are built once per league data version and kept in memory.
+"""
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+TYPES_ES = {
+    "normal": "normal",
+    "fire": "fuego",
+    "water": "agua",
+    "grass": "planta",
+    "electric": "eléctrico",
+    "ice": "hielo",
+    "fighting": "lucha",
+    "poison": "veneno",
+    "ground": "tierra",
+    "flying": "volador",
+    "psychic": "psíquico",
+    "bug": "bicho",
+    "rock": "roca",
+    "ghost": "fantasma",
+    "dragon": "dragón",
+    "dark": "siniestro",
+    "steel": "acero",
+    "fairy": "hada"
+}
+SHADOW_ALIASES = ("shadow", "sombra", "oscuro")
+MIN_SCORE = 0.6  # share of the query's n-grams a match must contain
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase, accent-free words separated by single spaces ("Ho-Oh (Shadow)" -> "ho oh shadow")."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def ngrams(text):
+    """
+    Grams of every word of a normalized text: its 2-character start gram
+    ("^a") and all trigrams of "^" + word, so short prefixes still match.
+    """
+    grams = set()
+    for word in text.split():
+        word = "^" + word
+        grams.add(word[:2])
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def search_terms(p):
+    """Every text a Pokemon can be found by."""
+    species_id = p["speciesId"]
+    terms = [p["name"], species_id.replace("_", " ")]
+    for t in p["types"]:
+        terms.append(t)
+        terms.append(TYPES_ES.get(t, ""))
+    if species_id.endswith("_shadow"):
+        terms.extend(SHADOW_ALIASES)
+    return [normalize(term) for term in terms if term]
+
+
+class SpeciesIndex:
+    """Exact and fuzzy lookups over one league dataset version."""
+
+    def __init__(self, pokemon, version=None):
+        self.pokemon = pokemon
+        self.version = version
+        self.names = tuple(p["name"] for p in pokemon)
+        ratings = [p["rating"] for p in pokemon]
+        self.ratings = np.array([r if r is not None else 0 for r in ratings], dtype=np.float64)
+
+        self._by_key = {}
+        postings = {}
+        for position, p in enumerate(pokemon):
+            # Display names win over speciesIds that normalize to the same key
+            self._by_key.setdefault(normalize(p["name"]), position)
+            grams = set()
+            for term in search_terms(p):
+                grams |= ngrams(term)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        for position, p in enumerate(pokemon):
+            self._by_key.setdefault(normalize(p["speciesId"]), position)
+        self._postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.pokemon)
+
+    def get(self, text):
+        """Pokemon whose display name or speciesId matches text (ignoring case and punctuation), or None."""
+        position = self._by_key.get(normalize(text))
+        return None if position is None else self.pokemon[position]
+
+    def resolve(self, texts):
+        """
+        Resolves names or speciesIds in one go.
+
+        Returns:
+            tuple: (list of matched Pokemon, in input order; list of texts with no match).
+        """
+        found, unknown = [], []
+        for text in texts:
+            p = self.get(text)
+            if p is None:
+                unknown.append(text)
+            else:
+                found.append(p)
+        return found, unknown
+
+    def search(self, query, limit=10, min_score=MIN_SCORE):
+        """
+        Fuzzy search by name, speciesId, type (English or Spanish) or shadow alias.
+
+        Args:
+            query (str): Free text, e.g. "azu", "medichan", "fuego", "sombra lucha".
+            limit (int): Maximum number of results.
+            min_score (float): Minimum share of the query's n-grams a result must contain.
+
+        Returns:
+            list: Pokemon dictionaries, best match first. An exact name or
+            speciesId match always comes first.
+        """
+        text = normalize(query)
+        grams = ngrams(text)
+        if not grams or limit <= 0:
+            return []
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return []
+
+        scores = np.bincount(np.concatenate(hits), minlength=len(self.pokemon)) / len(grams)
+        exact = self._by_key.get(text)
+        if exact is not None:
+            scores[exact] = np.inf
+        candidates = np.flatnonzero(scores >= min_score)
+        # Best score first, then rating, then dataset order
+        order = np.lexsort((candidates, -self.ratings[candidates], -scores[candidates]))[:limit]
+        return [self.pokemon[int(i)] for i in candidates[order]]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(league, pokemon, version=None):
+    """Returns the SpeciesIndex of a league dataset, built once per dataset object."""
+    index = _indexes.get(league)
+    if index is not None and index.pokemon is pokemon:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(league)
+        if index is None or index.pokemon is not pokemon:
+            index = SpeciesIndex(pokemon, version)
+            _indexes[league] = index
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from data_loader import load_league
+
+    league = sys.argv[1] if len(sys.argv) > 1 else "1500"
+    pokemon, version, _ = load_league(league)
+    start = time.perf_counter()
+    index = get_search_index(league, pokemon, version)
+    print(f"Indexed {len(index)} Pokemon in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for query in sys.argv[2:] or ["sombra"]:
+        start = time.perf_counter()
+        results = index.search(query)
+        print(f"{query!r} ({(time.perf_counter() - start) * 1000:.3f} ms): {', '.join(p['name'] for p in results)}")
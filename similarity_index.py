@@ -0,0 +1,183 @@
+"""
+Nearest-neighbour index of substitutes within a league.
+
+Every species gets a fixed-length profile vector: its weakness, resistance and
+super-effective coverage bits (see type_engine) and its ratings against the
+top ranked species (see data_loader.MatchupMatrix). Vectors are normalized,
+so the cosine similarity of all pairs is one matrix product; the K nearest
+neighbours of every species are kept, which makes a query a row lookup.
+
+Indexes are saved per league data version next to the snapshot cache.
+"""
+import io
+import os
+import threading
+
+import numpy as np
+
+from snapshot_cache import CACHE_DIR, atomic_write
+from type_engine import TYPE_BITS
+
+SIMILARITY_DIR = os.environ.get("PVPOKE_SIMILARITY_DIR", os.path.join(os.path.dirname(CACHE_DIR) or ".", "similarity"))
+NEIGHBORS = 10
+META_SIZE = 50
+
+# Relative weight of each block of the profile vector
+TYPE_WEIGHT = 1.0
+COVERAGE_WEIGHT = 0.7
+MATCHUP_WEIGHT = 1.5
+
+_BITS = np.array(TYPE_BITS, dtype=np.int64)
+
+
+def base_species(species_id):
+    """speciesId without its shadow suffix: the regular and shadow forms are the same Pokemon to own."""
+    return species_id[:-7] if species_id.endswith("_shadow") else species_id
+
+
+def _bits(masks):
+    """(N,) type masks -> (N, 18) 0/1 matrix."""
+    return ((np.asarray(masks, dtype=np.int64)[:, None] & _BITS) != 0).astype(np.float32)
+
+
+def profile_vectors(pokemon, matchups=None, meta_size=META_SIZE):
+    """
+    Builds the unit-length profile vector of every Pokemon, in dataset order.
+
+    Matchup columns hold (rating - 500) / 500 against the top meta_size
+    species of the matchup matrix; unknown pairings count as even.
+    """
+    blocks = [
+        _bits([p["weakness_mask"] for p in pokemon]) * TYPE_WEIGHT,
+        _bits([p["resistance_mask"] for p in pokemon]) * TYPE_WEIGHT,
+        _bits([p["coverage_mask"] for p in pokemon]) * COVERAGE_WEIGHT / np.sqrt(3)
+    ]
+    if matchups is not None:
+        meta = np.arange(min(meta_size, len(matchups.species_ids)))
+        rows = np.array([matchups.index.get(p["speciesId"], -1) for p in pokemon], dtype=np.intp)
+        ratings = matchups.ratings[np.maximum(rows, 0)][:, meta]
+        ratings = np.where((rows[:, None] >= 0) & ~np.isnan(ratings), (ratings - 500) / 500, 0)
+        blocks.append(ratings.astype(np.float32) * MATCHUP_WEIGHT)
+
+    vectors = np.hstack(blocks)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+class SimilarityIndex:
+    """Precomputed nearest neighbours of every species of one league build."""
+
+    def __init__(self, version, species_ids, names, neighbors, scores):
+        self.version = version
+        self.species_ids = tuple(species_ids)
+        self.names = tuple(names)
+        # neighbors[i]: rows most similar to row i, best first; scores[i]: their cosine similarity
+        self.neighbors = neighbors
+        self.scores = scores
+        self.index = {}
+        for i, species_id in enumerate(self.species_ids):
+            self.index.setdefault(species_id, i)
+
+    @classmethod
+    def build(cls, pokemon, version, matchups=None, k=NEIGHBORS):
+        vectors = profile_vectors(pokemon, matchups)
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, -np.inf)
+        k = min(k, len(pokemon) - 1)
+        if k <= 0:
+            neighbors = np.empty((len(pokemon), 0), dtype=np.int32)
+        else:
+            # Top k per row without a full sort, then order them (ties by dataset order)
+            candidates = np.sort(np.argpartition(-similarity, k - 1, axis=1)[:, :k], axis=1)
+            order = np.argsort(-np.take_along_axis(similarity, candidates, axis=1), axis=1, kind="stable")
+            neighbors = np.take_along_axis(candidates, order, axis=1).astype(np.int32)
+        scores = np.take_along_axis(similarity, neighbors, axis=1).astype(np.float32)
+        return cls(version, [p["speciesId"] for p in pokemon], [p["name"] for p in pokemon], neighbors, scores)
+
+    def save(self, path):
+        buffer = io.BytesIO()
+        np.savez(buffer, version=self.version, species_ids=np.array(self.species_ids),
+                 names=np.array(self.names), neighbors=self.neighbors, scores=self.scores)
+        atomic_write(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(str(data["version"]), [str(s) for s in data["species_ids"]],
+                       [str(n) for n in data["names"]], data["neighbors"], data["scores"])
+
+    def similar(self, species_id, k=5, exclude=()):
+        """
+        Closest substitutes for a species. Other forms of the same species
+        (its shadow or regular form) are never substitutes.
+
+        Args:
+            species_id (str): Species to replace.
+            k (int): Number of substitutes (at most NEIGHBORS).
+            exclude (iterable): speciesIds to leave out (e.g. the rest of the team).
+
+        Returns:
+            list: {"speciesId", "name", "similarity"} dictionaries, most similar first.
+        """
+        row = self.index.get(species_id)
+        if row is None:
+            return []
+        exclude = set(exclude)
+        base = base_species(species_id)
+        results = []
+        for neighbor, score in zip(self.neighbors[row], self.scores[row]):
+            neighbor_id = self.species_ids[neighbor]
+            if neighbor_id in exclude or base_species(neighbor_id) == base:
+                continue
+            results.append({
+                "speciesId": self.species_ids[neighbor],
+                "name": self.names[neighbor],
+                "similarity": round(float(score), 3)
+            })
+            if len(results) == k:
+                break
+        return results
+
+
+def index_path(league, version, directory=SIMILARITY_DIR):
+    return os.path.join(directory, f"similar-{league.replace('/', '_')}-{version}.npz")
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(league, pokemon, version, matchups=None):
+    """
+    Returns the SimilarityIndex of a league dataset version: from memory,
+    then from disk, otherwise built and saved.
+    """
+    with _indexes_lock:
+        index = _indexes.get(league)
+        if index is not None and index.version == version:
+            return index
+        index = None
+        path = index_path(league, version)
+        if os.path.exists(path):
+            try:
+                index = SimilarityIndex.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable similarity index {path}: {e}")
+        if index is None:
+            index = SimilarityIndex.build(pokemon, version, matchups)
+            index.save(path)
+        _indexes[league] = index
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+
+    from data_loader import get_matchup_matrix, load_league
+
+    league = sys.argv[1] if len(sys.argv) > 1 else "1500"
+    pokemon, version, _ = load_league(league)
+    index = get_similarity_index(league, pokemon, version, get_matchup_matrix(league))
+    species_id = sys.argv[2] if len(sys.argv) > 2 else pokemon[0]["speciesId"]
+    for substitute in index.similar(species_id):
+        print(f"{substitute['similarity']:.3f} {substitute['name']}")
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+from fetcher import fetch, run_concurrently
+from json_stream import CHUNK_SIZE, iter_array, validate_array
+
+# Where pvpoke's data lives. Point PVPOKE_BASE_URL at a local server to work
+# against a stand-in copy of the data (e.g. `python -m http.server` over a
+# checkout of pvpoke/src/data).
+PVPOKE_BASE_URL = os.environ.get(
+    "PVPOKE_BASE_URL",
+    "https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data"
+)
+
+# On-disk snapshot store settings
+CACHE_DIR = os.environ.get("PVPOKE_CACHE_DIR", os.path.join(".cache", "pvpoke"))
+DEFAULT_TTL = int(os.environ.get("PVPOKE_CACHE_TTL", 6 * 60 * 60))  # seconds
+OFFLINE = os.environ.get("PVPOKE_OFFLINE", "") not in ("", "0", "false")
+KEEP_VERSIONS = 3
+
+
+class Snapshot:
+    """A single stored version of one pvpoke document."""
+
+    __slots__ = ("name", "path", "version", "fetched_at", "checked_at", "from_cache")
+
+    def __init__(self, name, path, version, fetched_at, checked_at, from_cache):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.fetched_at = fetched_at
+        self.checked_at = checked_at
+        self.from_cache = from_cache
+
+    @property
+    def age(self):
+        """Seconds since this version was downloaded."""
+        return time.time() - self.fetched_at
+
+    def read_bytes(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def load_json(self):
+        with open(self.path, "rb") as f:
+            return json.load(f)
+
+    def iter_json(self, fields=None):
+        """Streams the elements of this (array) document, optionally reduced to fields."""
+        with open(self.path, "rb") as f:
+            yield from iter_array(f, fields)
+
+
+def atomic_write(path, data):
+    """Writes bytes to path so readers never observe a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SnapshotStore:
+    """
+    Versioned on-disk cache of pvpoke documents.
+
+    Each document (e.g. "gamemaster/pokemon.json") gets its own directory
+    holding one file per content version plus a `meta.json` pointing at the
+    current one. pvpoke documents are JSON arrays: bodies are streamed to
+    disk and validated incrementally, never held in memory whole. Documents
+    are revalidated with ETag/Last-Modified once the TTL expires; in offline
+    mode, or when the network fails, the last good snapshot is served instead.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, base_url=PVPOKE_BASE_URL, ttl=DEFAULT_TTL, offline=OFFLINE):
+        self.cache_dir = cache_dir
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.offline = offline
+
+    def offline_view(self):
+        """Returns a store over the same directory that never touches the network."""
+        return SnapshotStore(self.cache_dir, self.base_url, self.ttl, offline=True)
+
+    def url_for(self, name):
+        return f"{self.base_url}/{name}"
+
+    def _doc_dir(self, name):
+        return os.path.join(self.cache_dir, name.replace("/", "__"))
+
+    def _read_meta(self, name):
+        try:
+            with open(os.path.join(self._doc_dir(name), "meta.json"), "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The version file may have been pruned or removed by hand
+        if not os.path.exists(os.path.join(self._doc_dir(name), meta.get("file", ""))):
+            return None
+        return meta
+
+    def _write_meta(self, name, meta):
+        atomic_write(os.path.join(self._doc_dir(name), "meta.json"), json.dumps(meta).encode("utf-8"))
+
+    def _snapshot(self, name, meta, from_cache):
+        return Snapshot(
+            name=name,
+            path=os.path.join(self._doc_dir(name), meta["file"]),
+            version=meta["version"],
+            fetched_at=meta["fetched_at"],
+            checked_at=meta["checked_at"],
+            from_cache=from_cache
+        )
+
+    def _prune(self, name, keep_file):
+        """Removes old versions, keeping the most recent KEEP_VERSIONS."""
+        doc_dir = self._doc_dir(name)
+        versions = [
+            f for f in os.listdir(doc_dir)
+            if f.endswith(".json") and f != "meta.json" and f != keep_file
+        ]
+        versions.sort(key=lambda f: os.path.getmtime(os.path.join(doc_dir, f)), reverse=True)
+        for stale in versions[KEEP_VERSIONS - 1:]:
+            try:
+                os.remove(os.path.join(doc_dir, stale))
+            except OSError:
+                pass
+
+    def cached(self, name):
+        """Returns the current local snapshot for name, or None. Never touches the network."""
+        meta = self._read_meta(name)
+        return self._snapshot(name, meta, from_cache=True) if meta else None
+
+    def get(self, name, max_age=None):
+        """
+        Returns a Snapshot for the given pvpoke document, downloading or
+        revalidating it only when needed.
+
+        Args:
+            name (str): Path relative to the pvpoke data root, e.g. "gamemaster/moves.json".
+            max_age (float): Overrides the store TTL for this call. 0 forces revalidation.
+
+        Raises:
+            requests.RequestException: if nothing is cached and the fetch fails.
+        """
+        meta = self._read_meta(name)
+        ttl = self.ttl if max_age is None else max_age
+
+        if meta and (self.offline or time.time() - meta["checked_at"] < ttl):
+            return self._snapshot(name, meta, from_cache=True)
+        if self.offline:
+            raise FileNotFoundError(f"No offline snapshot for {name} in {self.cache_dir}")
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            with fetch(self.url_for(name), headers=headers, stream=True) as response:
+                if response.status_code == 304 and meta:
+                    meta["checked_at"] = time.time()
+                    self._write_meta(name, meta)
+                    return self._snapshot(name, meta, from_cache=True)
+                response.raise_for_status()
+                return self._store(name, response)
+        except (requests.RequestException, ValueError) as e:
+            if meta:
+                print(f"Revalidation of {name} failed ({e}), serving last good snapshot.")
+                return self._snapshot(name, meta, from_cache=True)
+            raise
+
+    def get_many(self, names, max_age=None):
+        """
+        Fetches several documents concurrently over the pooled session.
+
+        Returns:
+            dict: name -> (Snapshot or None, exception or None, elapsed seconds).
+        """
+        results = run_concurrently(lambda name: self.get(name, max_age=max_age), names)
+        for name, (snapshot, error, elapsed) in results.items():
+            if error is not None:
+                print(f"  {name}: failed after {elapsed * 1000:.0f} ms ({error})")
+            else:
+                source = "cache" if snapshot.from_cache else "network"
+                print(f"  {name}: {elapsed * 1000:.0f} ms ({source})")
+        return results
+
+    def _store(self, name, response):
+        """
+        Streams a response body to disk, hashing it on the way, so the full
+        document is never held in memory.
+        """
+        doc_dir = self._doc_dir(name)
+        os.makedirs(doc_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=doc_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Reject bodies that are not valid JSON before they replace a good snapshot
+            validate_array(tmp_path)
+
+            version = digest.hexdigest()[:16]
+            file_name = f"{version}.json"
+            os.replace(tmp_path, os.path.join(doc_dir, file_name))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        headers = response.headers
+        now = time.time()
+        meta = {
+            "file": file_name,
+            "version": version,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": now,
+            "checked_at": now
+        }
+        self._write_meta(name, meta)
+        self._prune(name, file_name)
+        return self._snapshot(name, meta, from_cache=False)
+
+
+_default_store = None
+
+
+def get_store():
+    """Returns the process-wide SnapshotStore configured from the environment."""
+    global _default_store
+    if _default_store is None:
+        _default_store = SnapshotStore()
+    return _default_store
+
+
+if __name__ == "__main__":
+    # Warm (or refresh) the local snapshot store so later starts can run offline
+    import sys
+
+    from data_loader import GAMEMASTER_NAME, MOVES_NAME, rankings_name
+
+    store = get_store()
+    leagues = sys.argv[1:] or ["1500", "2500", "10000"]
+    names = [GAMEMASTER_NAME, MOVES_NAME] + [rankings_name(league) for league in leagues]
+    for name, (snapshot, error, _) in store.get_many(names, max_age=0).items():
+        if snapshot:
+            print(f"{name}: version {snapshot.version}")
@@ -0,0 +1,222 @@
+"""
+Local store of Pokemon sprite thumbnails.
+
+Sprites are kept as small PNG thumbnails in SPRITE_DIR, one per normalized
+speciesId (see sprite_key: shadow forms share their regular form's sprite).
+The app embeds them in the cards as data URIs, so card rendering never waits
+on the sprite CDN; a sprite that has not been fetched yet falls back to its
+remote URL.
+
+The store is filled ahead of time:
+
+    python sprite_cache.py prefetch [--league 1500 2500 10000] [--workers 8]
+                                    [--base-url URL] [--size 160] [--force] [--retry-missing]
+
+Prefetching is resumable: sprites already on disk are skipped, and sprites
+the server does not have (404) are remembered in missing.json and skipped
+until --retry-missing.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from fetcher import DEFAULT_TIMEOUT, make_session
+from snapshot_cache import CACHE_DIR, atomic_write
+
+SPRITE_DIR = os.environ.get("PVPOKE_SPRITE_DIR", os.path.join(os.path.dirname(CACHE_DIR) or ".", "sprites"))
+SPRITE_BASE_URL = os.environ.get("PVPOKE_SPRITE_URL", "https://img.pokemondb.net/sprites/home/normal").rstrip("/")
+THUMBNAIL_SIZE = 160
+PREFETCH_WORKERS = 8
+MEMORY_ENTRIES = 256  # data URIs kept in memory per process
+
+
+def sprite_key(species_id):
+    """Normalized sprite name of a speciesId: no shadow suffix, hyphens for underscores."""
+    # Remove _shadow suffix
+    if species_id.endswith("_shadow"):
+        species_id = species_id[:-7]
+
+    # Replace underscores with hyphens
+    return species_id.replace("_", "-")
+
+
+def remote_url(species_id, base_url=SPRITE_BASE_URL):
+    return f"{base_url}/{sprite_key(species_id)}.png"
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Downscales image bytes to fit size x size (never upscales) and returns optimized PNG bytes."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+class SpriteCache:
+    """Thumbnails on disk, plus an in-memory LRU of their data URIs."""
+
+    def __init__(self, directory=SPRITE_DIR, base_url=SPRITE_BASE_URL, memory_entries=MEMORY_ENTRIES):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        self.memory_entries = memory_entries
+        self._uris = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, species_id):
+        return os.path.join(self.directory, sprite_key(species_id) + ".png")
+
+    def _missing_path(self):
+        return os.path.join(self.directory, "missing.json")
+
+    def has(self, species_id):
+        return os.path.exists(self.path(species_id))
+
+    def image_src(self, species_id):
+        """
+        Image source for a card: the local thumbnail as a data URI, or the
+        remote URL when it has not been prefetched.
+        """
+        key = sprite_key(species_id)
+        with self._lock:
+            uri = self._uris.get(key)
+            if uri is not None:
+                self._uris.move_to_end(key)
+                return uri
+        try:
+            with open(self.path(species_id), "rb") as f:
+                data = f.read()
+        except OSError:
+            # Not cached (yet): don't remember the miss, a prefetch may fill it
+            return remote_url(species_id, self.base_url)
+        uri = "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+        with self._lock:
+            self._uris[key] = uri
+            if len(self._uris) > self.memory_entries:
+                self._uris.popitem(last=False)
+        return uri
+
+    def load_missing(self):
+        try:
+            with open(self._missing_path(), "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
+
+    def prefetch(self, species_ids, workers=PREFETCH_WORKERS, size=THUMBNAIL_SIZE, force=False, retry_missing=False):
+        """
+        Downloads and thumbnails the sprites of species_ids that are not on disk.
+
+        Args:
+            species_ids (iterable): speciesIds; forms sharing a sprite are fetched once.
+            workers (int): Concurrent downloads.
+            size (int): Thumbnail bounding box in pixels.
+            force (bool): Re-download sprites already on disk.
+            retry_missing (bool): Retry sprites that returned 404 before.
+
+        Returns:
+            dict: Counts of "fetched", "skipped", "missing" and "failed" sprites.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        missing = self.load_missing()
+        keys = list(dict.fromkeys(sprite_key(s) for s in species_ids))
+        counts = {"fetched": 0, "skipped": 0, "missing": 0, "failed": 0}
+        todo = []
+        for key in keys:
+            if (not force and os.path.exists(self.path(key))) or (key in missing and not retry_missing):
+                counts["skipped"] += 1
+            else:
+                todo.append(key)
+
+        session = make_session(pool_size=workers)
+        counts_lock = threading.Lock()
+
+        def fetch_one(key):
+            url = remote_url(key, self.base_url)
+            try:
+                response = session.get(url, timeout=DEFAULT_TIMEOUT)
+                if response.status_code == 404:
+                    outcome = "missing"
+                else:
+                    response.raise_for_status()
+                    atomic_write(self.path(key), make_thumbnail(response.content, size))
+                    outcome = "fetched"
+            except Exception as e:
+                print(f"Failed to fetch sprite {url}: {e}")
+                outcome = "failed"
+            with counts_lock:
+                counts[outcome] += 1
+                if outcome == "missing":
+                    missing.add(key)
+                elif outcome == "fetched":
+                    missing.discard(key)
+            return key, outcome
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for done, _ in enumerate(executor.map(fetch_one, todo), start=1):
+                    if done % 100 == 0:
+                        print(f"{done}/{len(todo)} sprites processed")
+        finally:
+            session.close()
+            # Saved even when interrupted, so the next run resumes where this one stopped
+            atomic_write(self._missing_path(), json.dumps(sorted(missing)).encode("utf-8"))
+        return counts
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_sprite_cache():
+    """Returns the process-wide SpriteCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SpriteCache()
+    return _cache
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Manage the local sprite thumbnail store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prefetch_parser = subparsers.add_parser("prefetch", help="Download the sprites of every Pokemon of some leagues")
+    prefetch_parser.add_argument("--league", nargs="+", default=["1500", "2500", "10000"])
+    prefetch_parser.add_argument("--base-url", default=SPRITE_BASE_URL, help="Sprite server (default: %(default)s)")
+    prefetch_parser.add_argument("--dir", default=SPRITE_DIR, help="Sprite directory (default: %(default)s)")
+    prefetch_parser.add_argument("--workers", type=int, default=PREFETCH_WORKERS)
+    prefetch_parser.add_argument("--size", type=int, default=THUMBNAIL_SIZE)
+    prefetch_parser.add_argument("--force", action="store_true", help="Re-download sprites already on disk")
+    prefetch_parser.add_argument("--retry-missing", action="store_true", help="Retry sprites that were not found before")
+    args = parser.parse_args(argv)
+
+    from data_loader import load_league
+
+    species_ids = []
+    for league in args.league:
+        pokemon, _, _ = load_league(league)
+        species_ids.extend(p["speciesId"] for p in pokemon)
+    if not species_ids:
+        print("No Pokemon to fetch sprites for")
+        return 1
+
+    start = time.perf_counter()
+    cache = SpriteCache(args.dir, args.base_url)
+    counts = cache.prefetch(species_ids, args.workers, args.size, args.force, args.retry_missing)
+    print(f"Sprites: {counts['fetched']} fetched, {counts['skipped']} skipped, {counts['missing']} not found, "
+          f"{counts['failed']} failed in {time.perf_counter() - start:.1f} s")
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,31 @@
-from data_loader import TYPE_CHART, ALL_TYPES
+import threading
+import weakref
+
+import numpy as np
+
+from pokemon_store import PokemonStore
+from type_engine import ALL_TYPES_MASK, coverage_mask, mask_to_types, types_to_mask
+
+# Meta threats considered by threat_report (at most 36, see mask_popcount),
+# and the suggestion bonus per unanswered threat a candidate beats
+THREAT_COUNT = 20
+THREAT_BONUS = 15
 
 class TeamAnalyzer:
     def __init__(self):
         pass
 
+    @staticmethod
+    def _weakness_mask(pokemon):
+        # data_loader precomputes the masks; hand-built dicts are converted on the fly
+        mask = pokemon.get("weakness_mask")
+        return mask if mask is not None else types_to_mask(pokemon.get("weaknesses", []))
+
+    @staticmethod
+    def _coverage_mask(pokemon):
+        mask = pokemon.get("coverage_mask")
+        return mask if mask is not None else coverage_mask(pokemon.get("move_types", []))
+
     def evaluate_coverage(self, team_list):
         """
         Evaluates a team of 3 Pokemon.
@@ -18,35 +40,32 @@ class TeamAnalyzer:
             return {"error": "Team is empty"}
         
         # 1. Shared Weaknesses
-        weakness_counts = {}
+        # A type is shared once a second member's weakness mask hits a bit already seen
+        seen = 0
+        shared = 0
         for pokemon in team_list:
-            for weakness in pokemon.get("weaknesses", []):
-                weakness_counts[weakness] = weakness_counts.get(weakness, 0) + 1
+            mask = self._weakness_mask(pokemon)
+            shared |= seen & mask
+            seen |= mask
         
-        shared_weaknesses = [w for w, count in weakness_counts.items() if count >= 2]
+        shared_weaknesses = list(mask_to_types(shared))
+        if len(shared_weaknesses) > 1:
+            # Report them in the order they first appear across the team
+            order = []
+            for pokemon in team_list:
+                for weakness in pokemon.get("weaknesses", []):
+                    if weakness in shared_weaknesses and weakness not in order:
+                        order.append(weakness)
+            shared_weaknesses = order
         
         # 2. Offensive Coverage
         # Determine which types the team can hit for super effective damage
-        covered_types = set()
-        
-        # Collect all move types available in the team
-        team_move_types = set()
+        covered = 0
         for pokemon in team_list:
-            for m_type in pokemon.get("move_types", []):
-                team_move_types.add(m_type)
-        
-        # For each move type, find what it is super effective against
-        for move_type in team_move_types:
-            move_type = move_type.lower()
-            if move_type in TYPE_CHART:
-                # Check what this move type hits super effectively (> 1.0)
-                # TYPE_CHART[attacker][defender]
-                for defender_type, multiplier in TYPE_CHART[move_type].items():
-                    if multiplier > 1.0:
-                        covered_types.add(defender_type)
+            covered |= self._coverage_mask(pokemon)
         
         # Identify types that are NOT covered (i.e., we don't have super effective moves against them)
-        uncovered_types = [t for t in ALL_TYPES if t not in covered_types]
+        uncovered_types = list(mask_to_types(ALL_TYPES_MASK & ~covered))
         
         # 3. Safety Rating
         total_rating = sum(p.get("rating", 0) for p in team_list)
@@ -59,7 +78,7 @@ class TeamAnalyzer:
             "team_size": len(team_list)
         }
 
-    def suggest_teammate(self, current_team, all_pokemon, top_n=5):
+    def suggest_teammate(self, current_team, all_pokemon, top_n=5, matchups=None):
         """
         Suggests the best teammates for the current team.
         
@@ -67,87 +86,321 @@ class TeamAnalyzer:
             current_team (list): List of currently selected Pokemon objects.
             all_pokemon (list): List of all available Pokemon objects.
             top_n (int): Number of suggestions to return.
+            matchups (MatchupMatrix): If given, candidates that beat the team's
+                unanswered meta threats get a bonus (see score_candidates).
             
         Returns:
-            list: List of suggested Pokemon objects with a 'match_score'.
+            list: Copies of the suggested Pokemon objects with a 'match_score'.
         """
         if not current_team:
             # If no team, just return top rated pokemon
             return sorted(all_pokemon, key=lambda x: x.get("rating", 0), reverse=True)[:top_n]
 
-        # Analyze current team weaknesses and gaps
-        current_analysis = self.evaluate_coverage(current_team)
-        current_weaknesses = set(current_analysis["shared_weaknesses"])
-        current_uncovered = set(current_analysis["uncovered_types"])
-        
+        positions, scores = self.score_candidates(current_team, all_pokemon, matchups)
+        best = top_k(scores, top_n)
+
+        # Return copies so the shared dataset is never written to
+        return [
+            {**all_pokemon[int(positions[i])], "match_score": scores[i].item()}
+            for i in best
+        ]
+
+    def score_candidates(self, current_team, all_pokemon, matchups=None):
+        """
+        Scores every eligible candidate against the current team in one pass.
+
+        Uses the same rules as suggest_teammate: candidates already in the team
+        or rated below 80 are skipped; each candidate gets its rating, -50 per
+        shared weakness of the new team, +10 per offensive gap it covers and
+        +30 per current shared weakness it resists. With a matchup matrix,
+        candidates also get THREAT_BONUS per unanswered meta threat
+        (see threat_report) they beat.
+
+        Returns:
+            tuple: (positions into all_pokemon, scores), both numpy arrays in dataset order.
+        """
+        pool = CandidatePool.for_dataset(all_pokemon)
+
+        # Current team masks: weaknesses seen once, shared weaknesses and coverage
+        seen = 0
+        shared = 0
+        covered = 0
+        for pokemon in current_team:
+            mask = self._weakness_mask(pokemon)
+            shared |= seen & mask
+            seen |= mask
+            covered |= self._coverage_mask(pokemon)
+        uncovered = ALL_TYPES_MASK & ~covered
+
+        # Skip team members and candidates rated too low to ensure quality
+        eligible = pool.ratings >= 80
+        for pokemon in current_team:
+            eligible[pool.positions_of(pokemon.get("speciesId"))] = False
+        positions = np.flatnonzero(eligible)
+
+        # Bonus for high rating (0-100 points), then the same adjustments in
+        # the same order as the per-candidate version, so float scores match exactly
+        scores = pool.ratings[positions].copy()
+        new_shared = shared | (seen & pool.weakness[positions])
+        scores -= POPCOUNT[new_shared] * 50
+        scores += POPCOUNT[pool.coverage[positions] & uncovered] * 10
+        resisted = POPCOUNT[pool.resistance[positions] & shared]
+        for k in range(int(resisted.max(initial=0))):
+            scores = np.where(resisted > k, scores + 30, scores)
+
+        if matchups is not None and current_team:
+            scores += mask_popcount(self.threat_masks(current_team, pool, positions, matchups)) * THREAT_BONUS
+
+        return positions, scores
+
+    def threat_masks(self, current_team, pool, positions, matchups):
+        """
+        Bitmask, per candidate in positions, of the team's unanswered meta
+        threats it beats: bit k stands for the k-th unanswered threat (see
+        threat_report). Candidates missing from the matrix beat none.
+        """
+        threats = self._threats(current_team, matchups)
+        unanswered = threats[~self._answered(current_team, matchups, threats)]
+        rows = pool.matrix_rows(matchups)[positions]
+        beats = (matchups.ratings[np.ix_(np.maximum(rows, 0), unanswered)] > 500) & (rows >= 0)[:, None]
+        return beats.astype(np.int64) @ (np.int64(1) << np.arange(len(unanswered), dtype=np.int64))
+
+    @staticmethod
+    def _threats(team_list, matchups, top_n=THREAT_COUNT):
+        """Matrix columns of the top_n ranked species, skipping the team's own species."""
+        own = {p.get("speciesId") for p in team_list}
+        return np.array(
+            [j for j, species_id in enumerate(matchups.species_ids) if species_id not in own][:top_n],
+            dtype=np.intp
+        )
+
+    @staticmethod
+    def _team_best(team_list, matchups, threats):
+        """Best known rating of any team member against each threat (NaN if none is known)."""
+        rows = [matchups.index[p["speciesId"]] for p in team_list if p.get("speciesId") in matchups.index]
+        if not rows:
+            return np.full(len(threats), np.nan)
+        return np.fmax.reduce(matchups.ratings[np.ix_(rows, threats)], axis=0)
+
+    def _answered(self, team_list, matchups, threats):
+        return self._team_best(team_list, matchups, threats) > 500
+
+    def threat_report(self, team_list, matchups, top_n=THREAT_COUNT):
+        """
+        Checks which of the top meta threats the team has a winning answer to.
+
+        Args:
+            team_list (list): Pokemon dictionaries.
+            matchups (MatchupMatrix): Ratings from the league's rankings.
+            top_n (int): Number of top ranked species to check.
+
+        Returns:
+            dict: "threats" checked, "answered" and "unanswered" lists of
+            {"speciesId", "name", "best_rating"} (the team's best known rating,
+            None when pvpoke lists no matchup) and "answer_rate" (0-100).
+        """
+        threats = self._threats(team_list, matchups, top_n)
+        best = self._team_best(team_list, matchups, threats)
+        answered, unanswered = [], []
+        for column, rating in zip(threats, best):
+            entry = {
+                "speciesId": matchups.species_ids[column],
+                "name": matchups.names[column],
+                "best_rating": None if np.isnan(rating) else int(rating)
+            }
+            (answered if rating > 500 else unanswered).append(entry)
+        return {
+            "threats": len(threats),
+            "answered": answered,
+            "unanswered": unanswered,
+            "answer_rate": round(100 * len(answered) / len(threats), 1) if len(threats) else 0.0
+        }
+
+    def suggest_movesets(self, team_list, engine, top_n=3):
+        """
+        Finds alternative movesets that close the team's offensive coverage gaps.
+
+        For each member, every legal moveset (see moveset_engine) is scored at
+        once by how many types the whole team would leave uncovered if that
+        member switched to it; ties go to the moveset with more pressure.
+
+        Args:
+            team_list (list): Pokemon dictionaries.
+            engine (MovesetEngine): Movesets of the current gamemaster.
+            top_n (int): Maximum number of suggestions.
+
+        Returns:
+            list: Dictionaries with the member's "name" and "speciesId", the
+            moveset (see MovesetEngine.moveset), the types it newly "covers"
+            and the "uncovered_types" left afterwards; the largest gains first.
+        """
+        masks = [self._coverage_mask(p) for p in team_list]
+        covered = 0
+        for mask in masks:
+            covered |= mask
+        uncovered_count = POPCOUNT[ALL_TYPES_MASK & ~covered]
+
         suggestions = []
-        
-        for candidate in all_pokemon:
-            # Skip if already in team
-            if any(p["speciesId"] == candidate["speciesId"] for p in current_team):
+        for i, pokemon in enumerate(team_list):
+            rows = engine.rows(pokemon.get("speciesId"))
+            if rows.start == rows.stop:
                 continue
-                
-            # Skip if rating is too low (e.g. below 80) to ensure quality
-            if candidate.get("rating", 0) < 80:
+            others = 0
+            for j, mask in enumerate(masks):
+                if j != i:
+                    others |= mask
+            remaining = POPCOUNT[ALL_TYPES_MASK & ~(others | engine.coverage[rows])]
+            best = int(np.lexsort((-engine.pressure[rows], remaining))[0])
+            gain = int(uncovered_count - remaining[best])
+            if gain <= 0:
                 continue
+            new_covered = others | int(engine.coverage[rows.start + best])
+            suggestions.append((gain, i, {
+                "name": pokemon.get("name"),
+                "speciesId": pokemon.get("speciesId"),
+                **engine.moveset(rows.start + best),
+                "covers": list(mask_to_types(new_covered & ~covered)),
+                "uncovered_types": list(mask_to_types(ALL_TYPES_MASK & ~new_covered))
+            }))
 
-            score = 0
-            
-            # Bonus for high rating (0-100 points)
-            score += candidate.get("rating", 0)
-            
-            # Penalty for sharing weaknesses with the team
-            # If candidate is weak to something the team is already weak to (shared weakness), big penalty
-            candidate_weaknesses = set(candidate.get("weaknesses", []))
-            
-            # Check if adding this candidate CREATES a new shared weakness or exacerbates an existing one
-            # We simulate the new team
-            new_team = current_team + [candidate]
-            new_analysis = self.evaluate_coverage(new_team)
-            new_shared_weaknesses = set(new_analysis["shared_weaknesses"])
-            
-            # Penalty for each shared weakness in the new team
-            score -= len(new_shared_weaknesses) * 50 
-            
-            # Bonus for covering offensive gaps
-            # Check if candidate's moves hit types that were previously uncovered
-            candidate_move_types = set(candidate.get("move_types", []))
-            covered_by_candidate = set()
-            for m_type in candidate_move_types:
-                if m_type in TYPE_CHART:
-                    for defender, mult in TYPE_CHART[m_type].items():
-                        if mult > 1.0:
-                            covered_by_candidate.add(defender)
-            
-            # Intersection of what candidate covers and what was uncovered
-            useful_coverage = covered_by_candidate.intersection(current_uncovered)
-            score += len(useful_coverage) * 10
-            
-            # Bonus for resisting current team's weaknesses
-            # If the team has a shared weakness, and this candidate RESISTS it, that's good.
-            # (Resistance logic: if type chart says attacker -> candidate is < 1.0)
-            # We need to check resistance against 'current_weaknesses' (which are types)
-            # But 'current_weaknesses' from evaluate_coverage are types that >1 member is weak to.
-            # Let's look at individual weaknesses of team members too? 
-            # For simplicity, let's just look at the 'shared_weaknesses' identified.
-            
-            for weak_type in current_weaknesses:
-                # Check if candidate resists 'weak_type'
-                # weak_type attacking candidate
-                multiplier = 1.0
-                for t in candidate.get("types", []):
-                    if weak_type in TYPE_CHART:
-                         multiplier *= TYPE_CHART[weak_type].get(t, 1.0)
-                
-                if multiplier < 1.0:
-                    score += 30 # Good synergy!
-            
-            candidate["match_score"] = score
-            suggestions.append(candidate)
-            
-        # Sort by score descending
-        suggestions.sort(key=lambda x: x["match_score"], reverse=True)
-        return suggestions[:top_n]
+        suggestions.sort(key=lambda s: (-s[0], s[1]))
+        return [s[2] for s in suggestions[:top_n]]
+
+    def evaluate_matchups(self, team_list, matrix, shields=1, worst_n=5):
+        """
+        Scores the team against the meta with a precomputed battle matrix.
+
+        For every meta opponent (team members excluded), the team's answer is
+        its member with the best battle rating against it (see battle_sim).
+
+        Args:
+            team_list (list): Pokemon dictionaries.
+            matrix (BattleMatrix): Simulated ratings for the team's league and data version.
+            shields (int): Shield scenario (0, 1 or 2).
+            worst_n (int): Number of hardest opponents to report.
+
+        Returns:
+            dict: "wins" and "opponents" counts, "average_rating" of the best
+            answers, and "worst_matchups" as (speciesId, rating) pairs, hardest
+            first. Empty if no member is in the matrix.
+        """
+        rows = [matrix.index[p["speciesId"]] for p in team_list if p.get("speciesId") in matrix.index]
+        if not rows:
+            return {}
+        opponents = np.ones(len(matrix.species_ids), dtype=bool)
+        opponents[rows] = False
+        best = matrix.ratings[matrix.SHIELD_SCENARIOS.index(shields)][rows].max(axis=0)[opponents]
+        opponent_ids = np.array(matrix.species_ids)[opponents]
+        worst = np.argsort(best, kind="stable")[:worst_n]
+        return {
+            "wins": int((best > 500).sum()),
+            "opponents": int(opponents.sum()),
+            "average_rating": round(float(best.mean()), 1),
+            "worst_matchups": [(str(opponent_ids[i]), int(best[i])) for i in worst]
+        }
+
+
+# POPCOUNT[mask] = number of types set in an 18-bit type mask
+POPCOUNT = np.zeros(ALL_TYPES_MASK + 1, dtype=np.int64)
+for _bit in range(ALL_TYPES_MASK.bit_length()):
+    POPCOUNT += (np.arange(ALL_TYPES_MASK + 1) >> _bit) & 1
+
+
+def mask_popcount(masks):
+    """Number of bits set in each of an array of masks of up to 36 bits (such as threat masks)."""
+    return POPCOUNT[masks & ALL_TYPES_MASK] + POPCOUNT[masks >> ALL_TYPES_MASK.bit_length()]
+
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, best first, without sorting everything.
+    Ties keep their original order, like a stable descending sort.
+    """
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    chosen = np.sort(np.concatenate([above, ties]))
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+
+class CandidatePool:
+    """
+    Column arrays of one dataset (rating and type masks) used to score all
+    candidates at once. Built once per dataset object and reused.
+
+    The columns come from the dataset's PokemonStore (see pokemon_store), so
+    a candidate's position in the arrays is its row id in the store and its
+    position in the dataset. The type masks are the store's own arrays (views
+    of the mapped file for an artifact); only unrated species need a copy of
+    the ratings.
+
+    Long-lived datasets own their pool (see refresher.LeagueDataset) and
+    register it, so it is freed together with the dataset. Pools of other
+    datasets (CLI and batch runs) are kept in a small LRU.
+    """
+
+    _owned = weakref.WeakValueDictionary()
+    _cache = {}
+    _cache_size = 4
+    _cache_lock = threading.Lock()
+
+    def __init__(self, all_pokemon, store=None):
+        """
+        Args:
+            all_pokemon (sequence): The dataset candidates are drawn from.
+            store (PokemonStore): Its columnar store, if already built.
+        """
+        self.pokemon = all_pokemon
+        self.store = store if store is not None else PokemonStore(all_pokemon)
+        self.size = len(all_pokemon)
+        # Unrated species score as 0, like p.get("rating", 0)
+        ratings = self.store.ratings
+        self.ratings = np.nan_to_num(ratings, nan=0.0) if np.isnan(ratings).any() else ratings
+        self.weakness = self.store.weakness_masks
+        self.coverage = self.store.coverage_masks
+        self.resistance = self.store.resistance_masks
+        self._matrix_rows = (None, None)
+
+    def positions_of(self, species_id):
+        row = self.store.index_of(species_id)
+        return [] if row is None else [row]
+
+    def matrix_rows(self, matchups):
+        """Row of each pool position in a matchup matrix (-1 when absent), cached per matrix."""
+        if self._matrix_rows[0] is not matchups:
+            rows = np.array([matchups.index.get(species_id, -1) for species_id in self.store.species_ids], dtype=np.intp)
+            self._matrix_rows = (matchups, rows)
+        return self._matrix_rows[1]
+
+    @classmethod
+    def register(cls, pool):
+        """Makes for_dataset return pool for its dataset for as long as the caller keeps pool alive."""
+        with cls._cache_lock:
+            cls._owned[id(pool.pokemon)] = pool
+        return pool
+
+    @classmethod
+    def for_dataset(cls, all_pokemon):
+        """Returns the registered or cached pool for this dataset object, building it if needed."""
+        key = id(all_pokemon)
+        with cls._cache_lock:
+            # Ids are reused once an object is freed, so check the pool is for this very object
+            for pools in (cls._owned, cls._cache):
+                pool = pools.get(key)
+                if pool is not None and pool.pokemon is all_pokemon and pool.size == len(all_pokemon):
+                    return pool
+        pool = cls(all_pokemon)
+        with cls._cache_lock:
+            cls._cache.pop(key, None)
+            while len(cls._cache) >= cls._cache_size:
+                cls._cache.pop(next(iter(cls._cache)))
+            cls._cache[key] = pool
+        return pool
 
 if __name__ == "__main__":
     # Test with dummy data
@@ -0,0 +1,183 @@
+import heapq
+import time
+
+import numpy as np
+
+from team_logic import POPCOUNT, THREAT_BONUS, CandidatePool, TeamAnalyzer, mask_popcount, top_k
+from type_engine import ALL_TYPES_MASK
+
+TEAM_SIZE = 3
+DEFAULT_TIME_BUDGET = 0.5  # seconds
+
+
+def _team_masks(analyzer, team):
+    """(seen weaknesses, shared weaknesses, offensive gaps) of a partial team."""
+    seen = 0
+    shared = 0
+    covered = 0
+    for pokemon in team:
+        mask = analyzer._weakness_mask(pokemon)
+        shared |= seen & mask
+        seen |= mask
+        covered |= analyzer._coverage_mask(pokemon)
+    return seen, shared, ALL_TYPES_MASK & ~covered
+
+
+def search_teams(analyzer, seed_team, all_pokemon, k=5, time_budget=DEFAULT_TIME_BUDGET, matchups=None):
+    """
+    Finds the K best ways to complete a partial team to TEAM_SIZE members.
+
+    A completion is scored like suggest_teammate scores a single pick, applied
+    to all added members together: the sum of their ratings, -50 per shared
+    weakness of the final team, +10 per offensive gap of the seed they cover
+    (each type counted once) and +30 per seed shared weakness each one resists.
+    With a matchup matrix, they also get THREAT_BONUS per unanswered meta
+    threat of the seed that any of them beats (each threat counted once).
+    With one member missing this is exactly the suggest_teammate score.
+
+    Pairs are searched exhaustively with branch-and-bound: candidates are
+    visited by descending rating, and a first pick is skipped when an
+    admissible upper bound (best remaining rating, every remaining coverage
+    and threat bonus, the largest remaining resistance bonus) cannot beat the
+    current K-th best. The search stops at the time budget and returns the
+    best teams found so far.
+
+    Args:
+        analyzer (TeamAnalyzer): Provides the type masks of each Pokemon.
+        seed_team (list): 1 or 2 Pokemon objects chosen by the user.
+        all_pokemon (list): Candidate pool (the league dataset).
+        k (int): Number of alternative teams to return.
+        time_budget (float): Seconds before returning the best teams found so far.
+        matchups (MatchupMatrix): The league's matchup matrix, to reward
+            answers to meta threats (see TeamAnalyzer.score_candidates).
+
+    Returns:
+        dict: "teams" (list of {"members", "additions", "score"}, best first;
+        members are the seed followed by copies of the added Pokemon),
+        "complete" (False if the budget ran out first), "explored" (pairs scored)
+        and "elapsed" (seconds).
+    """
+    start = time.perf_counter()
+    needed = TEAM_SIZE - len(seed_team)
+    if needed < 1 or needed > 2:
+        raise ValueError(f"The seed team must have 1 or {TEAM_SIZE - 1} members, got {len(seed_team)}")
+
+    positions, solo_scores = analyzer.score_candidates(seed_team, all_pokemon, matchups)
+    if needed == 1:
+        best = top_k(solo_scores, k)
+        teams = [(solo_scores[i].item(), (int(positions[i]),)) for i in best]
+        return _result(seed_team, all_pokemon, teams, True, len(positions), start)
+
+    pool = CandidatePool.for_dataset(all_pokemon)
+    seen, shared, uncovered = _team_masks(analyzer, seed_team)
+
+    # Visit candidates by descending rating (ties in dataset order)
+    order = np.argsort(-pool.ratings[positions], kind="stable")
+    positions = positions[order]
+    ratings = pool.ratings[positions]
+    weakness = pool.weakness[positions]
+    gap_cover = pool.coverage[positions] & uncovered
+    resist_bonus = POPCOUNT[pool.resistance[positions] & shared] * 30.0
+    n = len(positions)
+    if matchups is not None:
+        threats = analyzer.threat_masks(seed_team, pool, positions, matchups)
+    else:
+        threats = np.zeros(n, dtype=np.int64)
+
+    # Suffix aggregates over candidates after position i, for the bounds
+    suffix_cover = np.zeros(n + 1, dtype=np.int64)
+    suffix_threats = np.zeros(n + 1, dtype=np.int64)
+    suffix_resist = np.zeros(n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_cover[i] = suffix_cover[i + 1] | gap_cover[i]
+        suffix_threats[i] = suffix_threats[i + 1] | threats[i]
+        suffix_resist[i] = max(suffix_resist[i + 1], resist_bonus[i])
+
+    best = []  # min-heap of (score, -first, -second) holding the K best pairs
+    explored = 0
+    complete = True
+    max_gap_bonus = POPCOUNT[uncovered] * 10
+    max_threat_bonus = mask_popcount(suffix_threats[0]) * THREAT_BONUS
+    shared_penalty = POPCOUNT[shared] * 50
+
+    for i in range(n - 1):
+        threshold = best[0][0] if len(best) >= k else -np.inf
+
+        # Loose bound, non-increasing in i: once it fails, no later first pick can win
+        if (ratings[i] + ratings[i + 1] + max_gap_bonus + max_threat_bonus + 2 * suffix_resist[i]
+                - shared_penalty <= threshold):
+            break
+
+        # Tight bound for this first pick
+        shared_a = shared | (seen & weakness[i])
+        bound = (
+            ratings[i] + ratings[i + 1]
+            - POPCOUNT[shared_a] * 50
+            + POPCOUNT[gap_cover[i] | suffix_cover[i + 1]] * 10
+            + resist_bonus[i] + suffix_resist[i + 1]
+            + mask_popcount(threats[i] | suffix_threats[i + 1]) * THREAT_BONUS
+        )
+        if bound <= threshold:
+            continue
+
+        if best and time.perf_counter() - start > time_budget:
+            complete = False
+            break
+
+        # Score every second pick j > i exactly
+        rest = slice(i + 1, n)
+        new_shared = shared_a | (seen & weakness[rest]) | (weakness[i] & weakness[rest])
+        scores = (
+            ratings[i] + ratings[rest]
+            - POPCOUNT[new_shared] * 50
+            + POPCOUNT[gap_cover[i] | gap_cover[rest]] * 10
+            + resist_bonus[i] + resist_bonus[rest]
+        )
+        if matchups is not None:
+            scores += mask_popcount(threats[i] | threats[rest]) * THREAT_BONUS
+        explored += len(scores)
+
+        for j in top_k(scores, k):
+            entry = (scores[j].item(), -i, -(i + 1 + int(j)))
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+    best.sort(reverse=True)
+    teams = [
+        (score, (int(positions[-a]), int(positions[-b])))
+        for score, a, b in best
+    ]
+    return _result(seed_team, all_pokemon, teams, complete, explored, start)
+
+
+def _result(seed_team, all_pokemon, teams, complete, explored, start):
+    results = []
+    for score, picks in teams:
+        additions = [{**all_pokemon[p]} for p in picks]
+        results.append({
+            "members": list(seed_team) + additions,
+            "additions": additions,
+            "score": score
+        })
+    return {
+        "teams": results,
+        "complete": complete,
+        "explored": explored,
+        "elapsed": time.perf_counter() - start
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from data_loader import load_data
+
+    league = sys.argv[1] if len(sys.argv) > 1 else "1500"
+    data = load_data(league)
+    if data:
+        result = search_teams(TeamAnalyzer(), data[:1], data)
+        for team in result["teams"]:
+            print(round(team["score"], 1), [p["name"] for p in team["members"]])
+        print(f"complete={result['complete']} explored={result['explored']} in {result['elapsed'] * 1000:.1f} ms")
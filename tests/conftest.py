@@ -0,0 +1,110 @@
+import hashlib
+import os
+import random
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import GameMaster  # noqa: E402
+from type_engine import ALL_TYPES  # noqa: E402
+
+
+class DataServer:
+    """
+    Local stand-in for the pvpoke data host.
+
+    Serves docs (path -> bytes) with an ETag derived from the body, answers
+    conditional requests with 304, and records the request headers it got.
+    status (path -> code) forces an error response for a path.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.status = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.lstrip("/")
+                server.requests.append((path, dict(self.headers)))
+                if path in server.status:
+                    self.send_response(server.status[path])
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.docs.get(path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"' + hashlib.sha256(body).hexdigest()[:12] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def conditional_requests(self, path):
+        return [headers for p, headers in self.requests if p == path and "If-None-Match" in headers]
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def data_server():
+    server = DataServer()
+    yield server
+    server.close()
+
+
+def make_gamemaster(species_count=40, seed=7):
+    """Small synthetic gamemaster: one move per type, species with random types and move pools."""
+    rng = random.Random(seed)
+    moves = [{"moveId": f"MOVE_{t.upper()}", "type": t, "power": 10, "energy": 40} for t in ALL_TYPES]
+    species = []
+    for n in range(species_count):
+        types = rng.sample(ALL_TYPES, rng.choice((1, 2)))
+        species.append({
+            "speciesId": f"mon{n}",
+            "types": types,
+            "baseStats": {"atk": 100 + n, "def": 100, "hp": 120},
+            "fastMoves": [f"MOVE_{types[0].upper()}"],
+            "chargedMoves": [m["moveId"] for m in rng.sample(moves, 2)]
+        })
+    return GameMaster("gm-test", species, moves)
+
+
+def make_rankings(gamemaster, seed=7):
+    """Rankings entries for every species of a synthetic gamemaster, best first."""
+    rng = random.Random(seed)
+    entries = []
+    for species_id, (fast, charged) in gamemaster.move_pools.items():
+        entries.append({
+            "speciesId": species_id,
+            "speciesName": species_id.replace("mon", "Mon "),
+            "score": round(rng.uniform(70, 100), 1),
+            "moveset": [fast[0], *charged]
+        })
+    entries.sort(key=lambda e: -e["score"])
+    return entries
@@ -0,0 +1,90 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from api_server import make_server
+
+
+class EchoService:
+    def evaluate(self, body):
+        return {"echo": body}
+
+
+@pytest.fixture
+def api():
+    server = make_server(port=0, service=EchoService())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def request(method, path, body=b"", headers=None):
+    headers = {"Content-Length": str(len(body)), **(headers or {})}
+    lines = [f"{method} {path} HTTP/1.1", "Host: test"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+def read_response(f):
+    status = int(f.readline().split()[1])
+    headers = {}
+    while (line := f.readline().strip()):
+        key, value = line.decode().split(":", 1)
+        headers[key.lower()] = value.strip()
+    return status, headers, json.loads(f.read(int(headers["content-length"])))
+
+
+def test_keep_alive_requests_share_a_connection(api):
+    with socket.create_connection(api, timeout=5) as sock, sock.makefile("rb") as f:
+        body = b'{"team": ["a"]}'
+        sock.sendall(request("POST", "/evaluate", body) + request("POST", "/evaluate", body))
+        assert read_response(f)[2] == {"echo": {"team": ["a"]}}
+        assert read_response(f)[2] == {"echo": {"team": ["a"]}}
+
+
+@pytest.mark.parametrize("path, body, expected", [
+    ("/unknown", b'GET /stats HTTP/1.1\r\n\r\n', 404),
+    ("/evaluate", b"x" * (64 * 1024 + 1), 413)
+])
+def test_unread_body_closes_the_connection(api, path, body, expected):
+    with socket.create_connection(api, timeout=5) as sock, sock.makefile("rb") as f:
+        sock.sendall(request("POST", path, body))
+        status, headers, _ = read_response(f)
+        assert status == expected
+        assert headers["connection"] == "close"
+        # The body is never answered as a request of its own
+        assert f.read() == b""
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_invalid_content_length_is_rejected(api, length):
+    with socket.create_connection(api, timeout=5) as sock, sock.makefile("rb") as f:
+        sock.sendall(request("POST", "/evaluate", headers={"Content-Length": length}))
+        status, headers, payload = read_response(f)
+        assert status == 400 and "Content-Length" in payload["error"]
+        assert headers["connection"] == "close"
+
+
+def test_chunked_body_is_rejected_and_closes_the_connection(api):
+    with socket.create_connection(api, timeout=5) as sock, sock.makefile("rb") as f:
+        chunk = b'{"team": ["a"], "padding": "................"}'
+        body = b"%x\r\n%s\r\n0\r\n\r\n" % (len(chunk), chunk)
+        head = b"POST /evaluate HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n\r\n"
+        sock.sendall(head + body)
+        status, headers, _ = read_response(f)
+        assert status == 411
+        assert headers["connection"] == "close"
+        # The chunks are never answered as a request of their own
+        assert f.read() == b""
+
+
+def test_short_body_is_rejected(api):
+    with socket.create_connection(api, timeout=5) as sock, sock.makefile("rb") as f:
+        sock.sendall(request("POST", "/evaluate", b"{}", headers={"Content-Length": "10"}))
+        sock.shutdown(socket.SHUT_WR)
+        status, headers, _ = read_response(f)
+        assert status == 400
+        assert headers["connection"] == "close"
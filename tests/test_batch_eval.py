@@ -0,0 +1,93 @@
+import pytest
+
+import batch_eval
+from conftest import make_gamemaster, make_rankings
+from data_loader import build_league
+
+
+class ListWriter:
+    def __init__(self):
+        self.results = []
+
+    def write(self, result):
+        self.results.append(result)
+
+
+@pytest.fixture(autouse=True)
+def no_matchups(monkeypatch):
+    # Suggestions fall back to type scoring; the tests never read the local snapshot store
+    monkeypatch.setattr(batch_eval, "get_matchup_matrix", lambda league, store=None: None)
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_csv_row_with_extra_cells_becomes_an_error_row(tmp_path):
+    path = write(tmp_path, "teams.csv", "id,a,b\nfirst,x,y,z\nsecond,p\n")
+
+    teams = list(batch_eval.read_teams(path))
+
+    assert teams[0]["id"] == "first" and teams[0]["members"] == []
+    assert "4 cells" in teams[0]["error"]
+    assert teams[1] == {"id": "second", "league": None, "members": ["p"]}
+
+
+def test_bad_csv_rows_do_not_end_the_run(tmp_path, monkeypatch):
+    gamemaster = make_gamemaster(species_count=20, seed=3)
+    pokemon, _ = build_league(make_rankings(gamemaster, seed=3), gamemaster)
+    monkeypatch.setattr(batch_eval, "load_league", lambda league, store=None: (pokemon, "v1", None))
+    names = [p["name"] for p in pokemon[:3]]
+    path = write(tmp_path, "teams.csv", f"a,b\n{names[0]},{names[1]},{names[2]}\n{names[0]},{pokemon[1]['speciesId'].upper()}\n")
+
+    writer = ListWriter()
+    written = batch_eval.run(batch_eval.read_teams(path), writer, workers=1, suggestions=1)
+
+    assert written == 2
+    bad, good = writer.results
+    assert "error" in bad and "members" not in bad
+    assert good["members"] == names[:2] and good["unresolved"] == []
+    assert len(good["suggestions"]) == 1
+
+
+def test_members_resolve_like_the_api(tmp_path, monkeypatch):
+    gamemaster = make_gamemaster(species_count=20, seed=3)
+    built, _ = build_league(make_rankings(gamemaster, seed=3), gamemaster)
+    pokemon = [{**built[0], "speciesId": "azumarill_shadow", "name": "Azumarill (Shadow)"},
+               {**built[1], "speciesId": "flabebe", "name": "Flabébé"}] + built[2:]
+    monkeypatch.setattr(batch_eval, "load_league", lambda league, store=None: (pokemon, "v2", None))
+    path = write(tmp_path, "teams.jsonl", '["azumarill shadow", "Flabebe", "AZUMARILL_SHADOW"]\n')
+
+    writer = ListWriter()
+    batch_eval.run(batch_eval.read_teams(path), writer, workers=1, suggestions=0)
+
+    result, = writer.results
+    assert result["members"] == ["Azumarill (Shadow)", "Flabébé", "Azumarill (Shadow)"]
+    assert result["unresolved"] == []
+
+
+def test_unknown_leagues_become_error_rows(tmp_path, monkeypatch):
+    gamemaster = make_gamemaster(species_count=20, seed=3)
+    pokemon, _ = build_league(make_rankings(gamemaster, seed=3), gamemaster)
+    loaded = []
+
+    def load_league(league, store=None):
+        loaded.append(league)
+        return pokemon, "v1", None
+
+    monkeypatch.setattr(batch_eval, "load_league", load_league)
+    member = pokemon[0]["speciesId"]
+    path = write(tmp_path, "teams.jsonl", "".join(
+        f'{{"league": "{league}", "team": ["{member}"]}}\n' for league in ("abc", "1500", "all/1500", " ALL/1500 ")
+    ))
+
+    writer = ListWriter()
+    batch_eval.run(batch_eval.read_teams(path), writer, workers=1, suggestions=0)
+
+    unknown, *known = writer.results
+    assert unknown == {"id": 1, "league": "abc", "error": "Unknown league abc"}
+    assert [r["members"] for r in known] == [[pokemon[0]["name"]]] * 3
+    # "1500" and "all/1500" are the same rankings document, loaded once
+    assert loaded == ["1500"]
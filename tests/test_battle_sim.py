@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import battle_sim
+from battle_sim import BattleMatrix, get_battle_matrix
+from conftest import make_gamemaster, make_rankings
+from data_loader import build_league
+
+
+@pytest.fixture
+def league(tmp_path, monkeypatch):
+    # IV tables and battle matrices are written under relative cache directories
+    monkeypatch.chdir(tmp_path)
+    gamemaster = make_gamemaster(species_count=12, seed=4)
+    pokemon, _ = build_league(make_rankings(gamemaster, seed=4), gamemaster)
+    return gamemaster, pokemon
+
+
+def stronger(gamemaster):
+    """A copy of the test gamemaster with every move twice as strong."""
+    other = make_gamemaster(species_count=12, seed=4)
+    other.move_stats = {m: (power * 2, *rest) for m, (power, *rest) in gamemaster.move_stats.items()}
+    return other
+
+
+def test_matrix_is_simulated_with_the_given_gamemaster(league):
+    gamemaster, pokemon = league
+
+    matrix = BattleMatrix.build("1500", pokemon, "v1", gamemaster, workers=1)
+    again = BattleMatrix.build("1500", pokemon, "v1", gamemaster, workers=1)
+    other = BattleMatrix.build("1500", pokemon, "v1", stronger(gamemaster), workers=1)
+
+    assert matrix.ratings.shape == (3, len(pokemon), len(pokemon))
+    assert np.array_equal(matrix.ratings, again.ratings)
+    assert not np.array_equal(matrix.ratings, other.ratings)
+
+
+def test_get_battle_matrix_uses_the_dataset_gamemaster(league, monkeypatch):
+    gamemaster, pokemon = league
+    monkeypatch.setattr(battle_sim, "_matrices", {})
+
+    built = get_battle_matrix("1500", pokemon, "r-v1", gamemaster)
+
+    assert np.array_equal(built.ratings, BattleMatrix.build("1500", pokemon, "r-v1", gamemaster, workers=1).ratings)
+    # Saved under the data version, so a later process loads it without a gamemaster
+    monkeypatch.setattr(battle_sim, "_matrices", {})
+    assert get_battle_matrix("1500", pokemon, "r-v1", build=False).version == "r-v1"
+
+
+def test_missing_gamemaster_is_an_error(league, monkeypatch):
+    _, pokemon = league
+    monkeypatch.setattr(battle_sim, "_matrices", {})
+    monkeypatch.setattr(battle_sim, "gamemaster_for", lambda version: None)
+
+    assert get_battle_matrix("1500", pokemon, "r-v2", build=False) is None
+    with pytest.raises(ValueError):
+        get_battle_matrix("1500", pokemon, "r-v2")
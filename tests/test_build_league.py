@@ -0,0 +1,163 @@
+import copy
+
+from conftest import make_gamemaster, make_rankings
+from data_loader import GameMaster, build_league
+from league_artifact import ArtifactRow, LeagueArtifact, build_artifact
+from pokemon_store import freeze_pokemon
+
+
+def by_id(pokemon):
+    return {p["speciesId"]: p for p in pokemon}
+
+
+def test_first_build_has_no_changeset():
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+
+    pokemon, changes = build_league(rankings, gamemaster)
+
+    assert changes is None
+    assert [p["speciesId"] for p in pokemon] == [e["speciesId"] for e in rankings]
+
+
+def test_rebuild_of_same_data_reuses_every_entry():
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+    previous, _ = build_league(rankings, gamemaster)
+
+    pokemon, changes = build_league(copy.deepcopy(rankings), gamemaster, previous)
+
+    assert changes.unchanged == len(rankings)
+    assert not (changes.added or changes.removed or changes.rerated
+                or changes.moveset_changed or changes.types_changed)
+    assert all(new is old for new, old in zip(pokemon, previous))
+
+
+def test_changes_are_detected_and_only_changed_entries_rebuilt():
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+    previous, _ = build_league(rankings, gamemaster)
+    old = by_id(previous)
+
+    rankings = copy.deepcopy(rankings)
+    rerated, moved, removed = rankings[0], rankings[1], rankings.pop(2)
+    rerated["score"] += 1
+    moved["moveset"] = moved["moveset"][:2]
+    rankings.append({"speciesId": "newmon", "speciesName": "New Mon", "score": 75.0, "moveset": ["MOVE_FIRE"]})
+
+    pokemon, changes = build_league(rankings, gamemaster, previous)
+
+    assert changes.rerated == [rerated["speciesId"]]
+    assert changes.moveset_changed == [moved["speciesId"]]
+    assert changes.added == ["newmon"]
+    assert changes.removed == [removed["speciesId"]]
+    assert changes.types_changed == []
+    assert changes.unchanged == len(previous) - 3
+
+    new = by_id(pokemon)
+    assert new[rerated["speciesId"]]["rating"] == rerated["score"]
+    assert new[moved["speciesId"]]["recommended_moves_raw"] == moved["moveset"]
+    assert new[rerated["speciesId"]] is not old[rerated["speciesId"]]
+    unchanged_id = rankings[3]["speciesId"]
+    assert new[unchanged_id] is old[unchanged_id]
+    assert [p["speciesId"] for p in pokemon] == [e["speciesId"] for e in rankings]
+
+
+def test_gamemaster_changes_are_detected():
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+    previous, _ = build_league(rankings, gamemaster)
+    target = rankings[0]["speciesId"]
+    fast_move = rankings[1]["moveset"][0]
+
+    # Retype one species, and change the type of a move another species uses
+    species = [
+        {"speciesId": species_id, "types": ["ghost"] if species_id == target else list(types),
+         "fastMoves": list(pool[0]), "chargedMoves": list(pool[1])}
+        for species_id, types in gamemaster.species_types_map.items()
+        for pool in [gamemaster.move_pools[species_id]]
+    ]
+    moves = [{"moveId": move_id, "type": "ghost" if move_id == fast_move else move_type}
+             for move_id, move_type in gamemaster.moves_map.items()]
+    retyped = GameMaster("gm-test-2", species, moves)
+
+    pokemon, changes = build_league(rankings, retyped, previous)
+
+    assert target in changes.types_changed
+    assert by_id(pokemon)[target]["types"] == ["ghost"]
+    assert rankings[1]["speciesId"] in changes.moveset_changed
+    users = {e["speciesId"] for e in rankings if fast_move in e["moveset"]}
+    assert set(changes.moveset_changed) == users
+
+
+def changed_rankings(rankings):
+    rankings = copy.deepcopy(rankings)
+    rankings[0]["score"] += 1
+    rankings[1]["moveset"] = rankings[1]["moveset"][:2]
+    rankings.pop(2)
+    rankings.append({"speciesId": "newmon", "speciesName": "New Mon", "score": 75.0, "moveset": ["MOVE_FIRE"]})
+    return rankings
+
+
+def test_rebuild_over_an_artifact_reads_its_columns(tmp_path):
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+    previous, _ = build_league(rankings, gamemaster)
+    artifact = LeagueArtifact(build_artifact("1500", previous, "v1", gamemaster, path=str(tmp_path / "v1.pvpa")))
+    rankings = changed_rankings(rankings)
+
+    pokemon, changes = build_league(rankings, gamemaster, artifact)
+
+    assert changes.as_dict() == build_league(rankings, gamemaster, previous)[1].as_dict()
+    carried = [p for p in pokemon if isinstance(p, ArtifactRow)]
+    assert len(carried) == changes.unchanged
+    # Nothing was decoded to compare them
+    assert all(p._pokemon is None for p in carried)
+    assert [dict(p) for p in carried] == [dict(artifact[p.index]) for p in carried]
+
+
+def test_artifact_rewrite_copies_unchanged_rows(tmp_path):
+    gamemaster = make_gamemaster()
+    rankings = make_rankings(gamemaster)
+    previous, _ = build_league(rankings, gamemaster)
+    first = build_artifact("1500", previous, "v1", gamemaster, path=str(tmp_path / "v1.pvpa"))
+    artifact = LeagueArtifact(first)
+
+    # Same data: the rewrite is the same file
+    same, _ = build_league(copy.deepcopy(rankings), gamemaster, artifact)
+    again = build_artifact("1500", same, "v1", gamemaster, path=str(tmp_path / "again.pvpa"))
+    with open(first, "rb") as a, open(again, "rb") as b:
+        assert a.read() == b.read()
+
+    # Changed data: the rewrite decodes like a full build of the new rankings
+    rankings = changed_rankings(rankings)
+    pokemon, _ = build_league(rankings, gamemaster, artifact)
+    rewritten = LeagueArtifact(build_artifact("1500", pokemon, "v2", gamemaster, path=str(tmp_path / "v2.pvpa")))
+    full, _ = build_league(rankings, gamemaster)
+    assert [dict(p) for p in rewritten] == [dict(p) for p in freeze_pokemon(full)]
+    assert all(p._pokemon is None for p in pokemon if isinstance(p, ArtifactRow))
+
+
+def test_inherited_string_table_stays_bounded(tmp_path):
+    gamemaster = make_gamemaster()
+    rankings = copy.deepcopy(make_rankings(gamemaster))
+    pokemon, _ = build_league(rankings, gamemaster)
+    fresh = LeagueArtifact(build_artifact("1500", pokemon, "v0", gamemaster, path=str(tmp_path / "fresh.pvpa")))
+    artifact = fresh
+    sizes = []
+
+    # Every refresh re-rates all but one species, so their strings are re-added each time
+    for round_number in range(1, 10):
+        for entry in rankings[1:]:
+            entry["score"] += 1
+        pokemon, changes = build_league(rankings, gamemaster, artifact)
+        assert changes.unchanged == 1
+        path = str(tmp_path / f"{round_number}.pvpa")
+        artifact = LeagueArtifact(build_artifact("1500", pokemon, f"v{round_number}", gamemaster, path=path))
+        sizes.append(len(artifact.string_table()))
+
+    # Once most of the table is unreferenced it is rewritten from scratch
+    assert max(sizes) <= 3 * len(fresh.string_table())
+    assert len(fresh.string_table()) in sizes
+    full, _ = build_league(rankings, gamemaster)
+    assert [dict(p) for p in artifact] == [dict(p) for p in freeze_pokemon(full)]
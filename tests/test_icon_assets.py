@@ -0,0 +1,55 @@
+import pytest
+
+import icon_assets
+from icon_assets import get_icon_table
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(icon_assets.time, "monotonic", clock)
+    # Start from an empty process-wide table and restore the real one afterwards
+    monkeypatch.setattr(icon_assets, "_table", None)
+    monkeypatch.setattr(icon_assets, "_table_signature", None)
+    monkeypatch.setattr(icon_assets, "_table_checked_at", 0.0)
+    return clock
+
+
+@pytest.fixture
+def icons(tmp_path):
+    paths = {}
+    for type_name in ("fire", "water"):
+        path = tmp_path / f"{type_name}.svg"
+        path.write_text(f"<svg>{type_name}</svg>", encoding="utf-8")
+        paths[type_name] = str(path)
+    return paths
+
+
+def test_changed_icon_is_picked_up_after_the_check_interval(clock, icons):
+    first = get_icon_table(icons, check=True)
+    with open(icons["fire"], "w", encoding="utf-8") as f:
+        f.write("<svg>a new fire icon</svg>")
+
+    # Within the interval the files are not even looked at
+    clock.now += icon_assets.CHECK_INTERVAL - 1
+    assert get_icon_table(icons, check=True) is first
+
+    clock.now += 1
+    second = get_icon_table(icons, check=True)
+    assert second is not first and second.digest != first.digest
+    assert second.uri("fire") != first.uri("fire") and second.uri("water") == first.uri("water")
+
+
+def test_unchanged_icons_keep_their_table(clock, icons):
+    first = get_icon_table(icons, check=True)
+
+    clock.now += icon_assets.CHECK_INTERVAL
+    assert get_icon_table(icons, check=True) is first
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from data_loader import GameMaster
+from iv_engine import CPM, LEVELS, UNCAPPED, IVTable, compute_spreads, league_cap
+
+
+def species(species_id, atk, defense, hp):
+    return {"speciesId": species_id, "types": ["normal"], "baseStats": {"atk": atk, "def": defense, "hp": hp},
+            "fastMoves": [], "chargedMoves": []}
+
+
+@pytest.fixture(scope="module")
+def gamemaster():
+    return GameMaster("gm-ivs", [
+        species("mewtwo", 300, 182, 214),
+        species("azumarill", 112, 152, 225),
+        species("registeel", 143, 285, 190),
+        # Over every capped league even with 0/0/0 at level 1
+        species("colossus", 4000, 4000, 4000)
+    ], [])
+
+
+@pytest.fixture(scope="module")
+def tables(gamemaster):
+    return {cap: IVTable.build(gamemaster, cap) for cap in (1500, 2500, UNCAPPED)}
+
+
+@pytest.mark.parametrize("cap, species_id, ivs, level, cp", [
+    (1500, "azumarill", (0, 15, 15), 45.5, 1499),
+    (1500, "registeel", (0, 8, 15), 24.0, 1500),
+    (2500, "registeel", (0, 14, 15), 50.0, 2499),
+    (2500, "azumarill", (15, 15, 15), 50.0, 1795),
+    (UNCAPPED, "mewtwo", (15, 15, 15), 50.0, 4724),
+    (UNCAPPED, "registeel", (15, 15, 15), 50.0, 2766)
+])
+def test_rank_one_spreads(tables, cap, species_id, ivs, level, cp):
+    table = tables[cap]
+
+    best, second = table.top(species_id, n=2)
+
+    assert best["ivs"] == ivs and best["rank"] == 1 and best["percent"] == 100.0
+    assert (best["level"], best["cp"]) == (level, cp)
+    assert best["cp"] <= cap and second["rank"] == 2
+    assert table.lookup(species_id, *ivs) == best
+
+
+def test_level_40_cap_matches_the_published_max_cp():
+    # A perfect Mewtwo is 4178 CP at level 40
+    spreads = compute_spreads((300, 182, 214), UNCAPPED, cpm=CPM[:LEVELS.tolist().index(40.0) + 1])
+
+    assert spreads["cp"][-1] == 4178
+
+
+def test_species_over_the_cap_at_level_one_is_ineligible(tables):
+    for cap in (1500, 2500):
+        assert "colossus" in tables[cap]
+        assert not tables[cap].rank[tables[cap].species_ids.index("colossus")].any()
+        assert tables[cap].top("colossus") == []
+        result = tables[cap].lookup("colossus", 0, 0, 0)
+        assert not result["eligible"] and result["rank"] is None and result["percent"] is None
+        assert result["level"] == 1.0 and result["cp"] > cap
+
+    assert tables[UNCAPPED].lookup("colossus", 15, 15, 15)["rank"] == 1
+
+
+def test_lookup_checks_its_arguments(tables):
+    table = tables[1500]
+
+    assert table.lookup("missingno", 0, 0, 0) is None
+    for ivs in [(16, 0, 0), (0, -1, 0), (0, 0, 1.5), (True, 0, 0)]:
+        with pytest.raises(ValueError):
+            table.lookup("azumarill", *ivs)
+
+
+def test_saved_tables_load_unchanged(tables, tmp_path):
+    path = str(tmp_path / "ivs.npz")
+    tables[1500].save(path)
+
+    loaded = IVTable.load(path)
+
+    assert (loaded.cap, loaded.version, loaded.species_ids) == (1500, "gm-ivs", tables[1500].species_ids)
+    assert np.array_equal(loaded.rank, tables[1500].rank) and np.array_equal(loaded.cp, tables[1500].cp)
+
+
+@pytest.mark.parametrize("league, cap", [("1500", 1500), ("premier/2500", 2500), ("10000", 10000)])
+def test_league_cap(league, cap):
+    assert league_cap(league) == cap
@@ -0,0 +1,61 @@
+import pytest
+
+import league_artifact
+from conftest import make_gamemaster, make_rankings
+from data_loader import build_league
+from league_artifact import LeagueArtifact, build_artifact, load_artifact
+
+
+@pytest.fixture
+def league(tmp_path):
+    gamemaster = make_gamemaster()
+    pokemon, _ = build_league(make_rankings(gamemaster), gamemaster)
+    pokemon[3]["rating"] = None
+    path = build_artifact("premier/1500", pokemon, "v1-v2-v3", gamemaster, path=str(tmp_path / "league.pvpa"))
+    artifact = LeagueArtifact(path)
+    yield pokemon, artifact
+    artifact.close()
+
+
+def as_stored(p):
+    """A processed Pokemon as the artifact returns it: sequences become tuples."""
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in p.items()}
+
+
+def test_round_trip(league):
+    pokemon, artifact = league
+
+    assert len(artifact) == len(pokemon)
+    assert artifact.league == "premier/1500"
+    assert artifact.version == "v1-v2-v3"
+    for original, loaded in zip(pokemon, artifact):
+        assert dict(loaded) == as_stored(original)
+
+
+def test_indexing(league):
+    pokemon, artifact = league
+
+    assert artifact[-1]["speciesId"] == pokemon[-1]["speciesId"]
+    assert [p["speciesId"] for p in artifact[2:5]] == [p["speciesId"] for p in pokemon[2:5]]
+    assert artifact[3]["rating"] is None
+    with pytest.raises(IndexError):
+        artifact[len(pokemon)]
+
+
+def test_loaded_pokemon_are_read_only(league):
+    _, artifact = league
+
+    with pytest.raises(TypeError):
+        artifact[0]["rating"] = 1
+    copy = dict(artifact[0])
+    copy["rating"] = 1
+    assert artifact[0]["rating"] != 1
+
+
+def test_load_artifact(league, tmp_path):
+    assert load_artifact("2500", str(tmp_path)) is None
+
+    path = league_artifact.artifact_path("2500", str(tmp_path))
+    with open(path, "wb") as f:
+        f.write(b"not an artifact" + bytes(32))
+    assert load_artifact("2500", str(tmp_path)) is None
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import make_gamemaster, make_rankings
+from data_loader import build_league
+from league_artifact import LeagueArtifact, build_artifact
+from pokemon_store import PokemonStore, freeze_pokemon
+from team_logic import CandidatePool
+
+
+@pytest.fixture(scope="module")
+def league():
+    gamemaster = make_gamemaster(species_count=30, seed=5)
+    data, _ = build_league(make_rankings(gamemaster, seed=5), gamemaster)
+    return data, gamemaster
+
+
+@pytest.fixture
+def artifact(league, tmp_path):
+    pokemon, gamemaster = league
+    return LeagueArtifact(build_artifact("1500", pokemon, "v1-v2-v3", gamemaster, path=str(tmp_path / "league.pvpa")))
+
+
+def assert_columns_match(store, pokemon):
+    assert len(store) == len(pokemon)
+    assert store.species_ids == tuple(p["speciesId"] for p in pokemon)
+    assert store.ratings.tolist() == [p["rating"] for p in pokemon]
+    assert store.weakness_masks.tolist() == [p["weakness_mask"] for p in pokemon]
+    assert store.resistance_masks.tolist() == [p["resistance_mask"] for p in pokemon]
+    assert store.coverage_masks.tolist() == [p["coverage_mask"] for p in pokemon]
+    for position, p in enumerate(pokemon):
+        assert store.index_of(p["speciesId"]) == position
+    assert store.index_of("missingno") is None
+
+
+def test_columns_of_a_frozen_dataset(league):
+    pokemon, _ = league
+
+    assert_columns_match(PokemonStore(freeze_pokemon(pokemon)), pokemon)
+
+
+def test_columns_of_an_artifact_are_views_of_the_mapped_file(league, artifact):
+    pokemon, _ = league
+    store = PokemonStore(artifact)
+
+    assert_columns_match(store, pokemon)
+    for column in (store.ratings, store.weakness_masks, store.resistance_masks, store.coverage_masks):
+        assert np.shares_memory(column, artifact.columns)
+        assert not column.flags.writeable
+
+
+def test_hand_built_entries_get_their_masks_computed():
+    store = PokemonStore([{"speciesId": "a", "name": "A", "types": ["water"], "move_types": ["grass"],
+                           "weaknesses": ["grass", "electric"], "rating": None}])
+
+    assert store.weakness_masks[0] and store.coverage_masks[0] and store.resistance_masks[0]
+    assert math.isnan(store.ratings[0])
+
+
+def test_candidate_pool_reads_the_store_columns(league, artifact):
+    pokemon, _ = league
+    store = PokemonStore(artifact)
+    pool = CandidatePool(artifact, store)
+
+    assert pool.store is store
+    assert pool.weakness is store.weakness_masks and pool.ratings is store.ratings
+    assert pool.positions_of(pokemon[3]["speciesId"]) == [3]
+    assert pool.positions_of("missingno") == []
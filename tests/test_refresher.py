@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from conftest import make_gamemaster, make_rankings
+from data_loader import GAMEMASTER_NAME, MOVES_NAME, GameMaster, build_league, rankings_name
+from league_artifact import LeagueArtifact, load_artifact
+from refresher import LeagueRefresher
+from snapshot_cache import SnapshotStore
+from type_engine import ALL_TYPES
+
+LEAGUE = "1500"
+
+
+def serve(data_server, species, moves, rankings):
+    data_server.docs[GAMEMASTER_NAME] = json.dumps(species).encode("utf-8")
+    data_server.docs[MOVES_NAME] = json.dumps(moves).encode("utf-8")
+    data_server.docs[rankings_name(LEAGUE)] = json.dumps(rankings).encode("utf-8")
+
+
+@pytest.fixture
+def docs():
+    gamemaster = make_gamemaster(species_count=12, seed=4)
+    species = [
+        {"speciesId": species_id, "types": types, "baseStats": {"atk": 120, "def": 110, "hp": 130},
+         "fastMoves": list(gamemaster.move_pools[species_id][0]),
+         "chargedMoves": list(gamemaster.move_pools[species_id][1])}
+        for species_id, types in gamemaster.species_types_map.items()
+    ]
+    moves = [{"moveId": f"MOVE_{t.upper()}", "type": t, "power": 10, "energy": 40} for t in ALL_TYPES]
+    return species, moves, make_rankings(gamemaster, seed=4)
+
+
+@pytest.fixture
+def refresher(tmp_path, monkeypatch, data_server, docs):
+    # Artifacts and derived indexes are written under relative cache directories
+    monkeypatch.chdir(tmp_path)
+    serve(data_server, *docs)
+    return LeagueRefresher(leagues=(LEAGUE,), store=SnapshotStore(str(tmp_path / "cache"), data_server.url, ttl=0))
+
+
+def test_new_builds_are_served_from_a_fresh_artifact(refresher, data_server, docs):
+    species, moves, rankings = docs
+
+    first = refresher.dataset(LEAGUE)
+    assert isinstance(first.pokemon, LeagueArtifact)
+    assert load_artifact(LEAGUE).version == first.version
+
+    # A refresh that changes the gamemaster must recompile the artifact with the new move types
+    moves = [dict(m, type="fire") if m["moveId"] == "MOVE_WATER" else m for m in moves]
+    serve(data_server, species, moves, rankings)
+    assert refresher.refresh(LEAGUE)
+
+    second = refresher.dataset(LEAGUE)
+    assert second.version != first.version
+    assert isinstance(second.pokemon, LeagueArtifact)
+    assert load_artifact(LEAGUE).version == second.version
+
+    expected, _ = build_league(rankings, GameMaster("expected", species, moves))
+    for built, stored in zip(expected, second.pokemon):
+        assert list(stored["move_types"]) == built["move_types"]
+        assert stored["coverage_mask"] == built["coverage_mask"]
+
+
+def test_artifact_of_the_same_version_is_reused(refresher):
+    first = refresher.dataset(LEAGUE)
+
+    other = LeagueRefresher(leagues=(LEAGUE,), store=refresher.store)
+    dataset = other._build(LEAGUE, refresher.store)
+
+    assert dataset.version == first.version
+    assert dataset.pokemon.path == first.pokemon.path
+
+
+@pytest.fixture
+def offline_refresher(tmp_path, monkeypatch, data_server):
+    """A refresher whose data host has nothing to serve yet."""
+    monkeypatch.chdir(tmp_path)
+
+    def make(retry_interval):
+        store = SnapshotStore(str(tmp_path / "cache"), data_server.url, ttl=0)
+        return LeagueRefresher(leagues=(LEAGUE,), store=store, retry_interval=retry_interval)
+    return make
+
+
+def test_failed_first_load_is_kept_until_the_background_retry(offline_refresher, data_server, docs):
+    refresher = offline_refresher(retry_interval=60)
+
+    failed = refresher.dataset(LEAGUE)
+    assert failed.version is None and not failed.pokemon and failed.retry_at is not None
+    requests = len(data_server.requests)
+
+    # Until the retry is due, readers get the stored failure without touching the network
+    assert refresher.dataset(LEAGUE) is failed
+    assert len(data_server.requests) == requests
+    assert 0 < refresher._next_wait() <= 60
+
+    # What the background thread does once the retry is due
+    serve(data_server, *docs)
+    assert refresher.refresh(LEAGUE)
+    loaded = refresher.dataset(LEAGUE)
+    assert loaded.version is not None and loaded.retry_at is None
+    assert isinstance(loaded.pokemon, LeagueArtifact)
+
+
+def test_without_a_background_thread_readers_retry_after_the_backoff(offline_refresher, data_server, docs):
+    refresher = offline_refresher(retry_interval=0)
+
+    first = refresher.dataset(LEAGUE)
+    requests = len(data_server.requests)
+    second = refresher.dataset(LEAGUE)
+    assert second is not first and second.retry_at is not None
+    assert len(data_server.requests) > requests
+
+    serve(data_server, *docs)
+    assert refresher.dataset(LEAGUE).version is not None
@@ -0,0 +1,88 @@
+import itertools
+
+import pytest
+
+import result_cache
+from conftest import make_gamemaster, make_rankings
+from data_loader import build_league
+from result_cache import ResultCache, cached_search_teams
+from team_logic import TeamAnalyzer
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(path=str(tmp_path / "results.sqlite3"), max_entries=100)
+
+
+@pytest.fixture(scope="module")
+def pokemon():
+    gamemaster = make_gamemaster(species_count=40, seed=13)
+    data, _ = build_league(make_rankings(gamemaster, seed=13), gamemaster)
+    return data
+
+
+def test_hit_returns_the_stored_payload(cache):
+    cache.put("1500", "v1", ["b", "a"], {"teams": [1, 2]})
+
+    assert cache.get("1500", "v1", ["a", "b"]) == {"teams": [1, 2]}
+    assert cache.get("1500", "v1", ["a", "b"], scoring="threats:m1") is None
+    assert cache.get("2500", "v1", ["a", "b"]) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_new_version_misses_and_drops_older_entries(cache):
+    cache.put("1500", "v1", ["a"], {"n": 1})
+    cache.put("2500", "v1", ["a"], {"n": 2})
+
+    assert cache.get("1500", "v2", ["a"]) is None
+    assert cache.get("1500", "v1", ["a"]) is None
+    assert cache.get("2500", "v1", ["a"]) == {"n": 2}
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_process_on_an_older_version_cannot_store_it(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    old, new = ResultCache(path=path), ResultCache(path=path)
+    old.put("1500", "v1", ["a"], {"n": 1})
+    new.put("1500", "v2", ["a"], {"n": 2})
+
+    # The old process has already registered v1 and keeps using it
+    old.put("1500", "v1", ["b"], {"n": 3})
+
+    assert old.get("1500", "v1", ["a"]) is None and old.get("1500", "v1", ["b"]) is None
+    assert new.get("1500", "v2", ["a"]) == {"n": 2}
+    assert new.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_at_capacity(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(result_cache.time, "time", lambda: next(clock))
+    cache = ResultCache(path=str(tmp_path / "results.sqlite3"), max_entries=3)
+    for name in "abc":
+        cache.put("1500", "v1", [name], {"n": name})
+    assert cache.get("1500", "v1", ["a"]) is not None
+
+    cache.put("1500", "v1", ["d"], {"n": "d"})
+
+    assert cache.get("1500", "v1", ["b"]) is None
+    assert [cache.get("1500", "v1", [name]) for name in "acd"] == [{"n": "a"}, {"n": "c"}, {"n": "d"}]
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 1
+
+
+def test_more_teams_than_stored_is_a_miss(cache, pokemon):
+    seed = pokemon[:1]
+
+    def search(k):
+        return cached_search_teams(TeamAnalyzer(), seed, pokemon, "1500", "v1", k=k, cache=cache)
+
+    first = search(2)
+    upgraded = search(5)
+    smaller = search(3)
+
+    assert "cached" not in first and "cached" not in upgraded
+    assert smaller["cached"]
+    assert [team["score"] for team in smaller["teams"]] == [team["score"] for team in upgraded["teams"][:3]]
+    assert [p["speciesId"] for p in smaller["teams"][0]["members"]] == \
+        [p["speciesId"] for p in upgraded["teams"][0]["members"]]
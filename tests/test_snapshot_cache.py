@@ -0,0 +1,147 @@
+import json
+import os
+
+import pytest
+import requests
+
+import snapshot_cache
+from snapshot_cache import SnapshotStore, atomic_write
+
+NAME = "gamemaster/pokemon.json"
+
+
+def doc_files(store, name=NAME):
+    return sorted(os.listdir(store._doc_dir(name)))
+
+
+@pytest.fixture
+def store(tmp_path, data_server):
+    data_server.docs[NAME] = b'[{"speciesId": "mon1"}]'
+    return SnapshotStore(str(tmp_path / "cache"), data_server.url, ttl=3600)
+
+
+def test_first_get_downloads_and_stores(store, data_server):
+    snapshot = store.get(NAME)
+
+    assert not snapshot.from_cache
+    assert snapshot.load_json() == [{"speciesId": "mon1"}]
+    assert store.cached(NAME).version == snapshot.version
+    assert doc_files(store) == sorted(["meta.json", f"{snapshot.version}.json"])
+
+
+def test_fresh_snapshot_is_served_without_a_request(store, data_server):
+    first = store.get(NAME)
+    requests_before = len(data_server.requests)
+
+    again = store.get(NAME)
+
+    assert again.from_cache and again.version == first.version
+    assert len(data_server.requests) == requests_before
+
+
+def test_304_revalidation_keeps_the_version_and_refreshes_checked_at(store, data_server):
+    first = store.get(NAME)
+
+    again = store.get(NAME, max_age=0)
+
+    conditional = data_server.conditional_requests(NAME)
+    assert len(conditional) == 1
+    assert again.from_cache
+    assert again.version == first.version
+    assert again.checked_at >= first.checked_at
+    assert again.fetched_at == first.fetched_at
+    assert doc_files(store) == sorted(["meta.json", f"{first.version}.json"])
+
+
+def test_changed_document_becomes_a_new_version(store, data_server):
+    first = store.get(NAME)
+    data_server.docs[NAME] = b'[{"speciesId": "mon2"}]'
+
+    second = store.get(NAME, max_age=0)
+
+    assert not second.from_cache
+    assert second.version != first.version
+    assert second.load_json() == [{"speciesId": "mon2"}]
+    assert store.cached(NAME).version == second.version
+
+
+@pytest.mark.parametrize("body", [b'[{"speciesId": "mon2"}', b'[{"speciesId": "mon2"}]garbage', b'{"a": 1}'])
+def test_invalid_body_falls_back_to_last_good_snapshot(store, data_server, body):
+    first = store.get(NAME)
+    data_server.docs[NAME] = body
+
+    again = store.get(NAME, max_age=0)
+
+    assert again.from_cache and again.version == first.version
+    assert again.load_json() == [{"speciesId": "mon1"}]
+    # The rejected body never replaced the snapshot nor left a temp file behind
+    assert doc_files(store) == sorted(["meta.json", f"{first.version}.json"])
+
+
+def test_http_error_falls_back_to_last_good_snapshot(store, data_server):
+    first = store.get(NAME)
+    data_server.status[NAME] = 404
+
+    again = store.get(NAME, max_age=0)
+
+    assert again.from_cache and again.version == first.version
+
+
+def test_failure_without_a_snapshot_raises(store, data_server):
+    data_server.status[NAME] = 404
+    with pytest.raises(requests.RequestException):
+        store.get(NAME)
+
+    data_server.status.clear()
+    data_server.docs[NAME] = b"[1]garbage"
+    with pytest.raises(ValueError):
+        store.get(NAME)
+    assert store.cached(NAME) is None
+
+
+def test_offline_view_serves_stale_snapshots_and_never_fetches(store, data_server):
+    first = store.get(NAME)
+    offline = store.offline_view()
+    requests_before = len(data_server.requests)
+
+    assert offline.get(NAME, max_age=0).version == first.version
+    with pytest.raises(FileNotFoundError):
+        offline.get("gamemaster/moves.json")
+    assert len(data_server.requests) == requests_before
+
+
+def test_atomic_write_replaces_whole_file(tmp_path):
+    path = str(tmp_path / "doc" / "meta.json")
+    atomic_write(path, b"old")
+    atomic_write(path, b"new")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"new"
+    assert os.listdir(tmp_path / "doc") == ["meta.json"]
+
+
+def test_atomic_write_failure_keeps_the_old_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "meta.json")
+    atomic_write(path, b"old")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot_cache.os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["meta.json"]
+
+
+def test_old_versions_are_pruned(store, data_server):
+    versions = []
+    for n in range(snapshot_cache.KEEP_VERSIONS + 2):
+        data_server.docs[NAME] = json.dumps([{"speciesId": f"mon{n}"}]).encode()
+        versions.append(store.get(NAME, max_age=0).version)
+
+    files = [f for f in doc_files(store) if f != "meta.json"]
+    assert len(files) == snapshot_cache.KEEP_VERSIONS
+    assert f"{versions[-1]}.json" in files
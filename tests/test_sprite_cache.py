@@ -0,0 +1,73 @@
+import io
+import json
+import os
+
+from PIL import Image
+
+from sprite_cache import SpriteCache, remote_url
+
+
+def png(width, height):
+    out = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 40, 40, 255)).save(out, format="PNG")
+    return out.getvalue()
+
+
+def requested(server, key):
+    return [path for path, _ in server.requests if path == f"sprites/{key}.png"]
+
+
+def test_prefetch_thumbnails_sprites_and_records_missing_ones(data_server, tmp_path):
+    data_server.docs["sprites/azumarill.png"] = png(400, 300)
+    data_server.docs["sprites/medicham.png"] = png(64, 64)
+    cache = SpriteCache(str(tmp_path), data_server.url + "/sprites")
+
+    counts = cache.prefetch(["azumarill", "medicham", "medicham_shadow", "missingno"], workers=2, size=100)
+
+    assert counts == {"fetched": 2, "skipped": 0, "missing": 1, "failed": 0}
+    with Image.open(cache.path("azumarill")) as image:
+        assert image.size == (100, 75)
+    with Image.open(cache.path("medicham_shadow")) as image:
+        assert image.size == (64, 64)
+    with open(os.path.join(tmp_path, "missing.json"), encoding="utf-8") as f:
+        assert json.load(f) == ["missingno"]
+
+
+def test_resumed_prefetch_skips_what_it_already_has(data_server, tmp_path):
+    data_server.docs["sprites/azumarill.png"] = png(80, 80)
+    cache = SpriteCache(str(tmp_path), data_server.url + "/sprites")
+    cache.prefetch(["azumarill", "missingno"])
+
+    # A later run only fetches the new sprite, and retries a 404 only when asked
+    data_server.docs["sprites/skarmory.png"] = png(80, 80)
+    counts = cache.prefetch(["azumarill", "missingno", "skarmory"])
+
+    assert counts == {"fetched": 1, "skipped": 2, "missing": 0, "failed": 0}
+    assert len(requested(data_server, "azumarill")) == 1
+    assert len(requested(data_server, "missingno")) == 1
+
+    data_server.docs["sprites/missingno.png"] = png(80, 80)
+    counts = cache.prefetch(["missingno"], retry_missing=True)
+    assert counts["fetched"] == 1 and cache.load_missing() == set()
+
+
+def test_failed_sprites_are_retried_on_the_next_run(data_server, tmp_path):
+    data_server.docs["sprites/azumarill.png"] = png(80, 80)
+    data_server.status["sprites/azumarill.png"] = 403
+    cache = SpriteCache(str(tmp_path), data_server.url + "/sprites")
+
+    assert cache.prefetch(["azumarill"])["failed"] == 1
+    del data_server.status["sprites/azumarill.png"]
+    assert cache.prefetch(["azumarill"])["fetched"] == 1
+
+
+def test_image_src_falls_back_to_the_remote_url(data_server, tmp_path):
+    data_server.docs["sprites/azumarill.png"] = png(80, 80)
+    base_url = data_server.url + "/sprites"
+    cache = SpriteCache(str(tmp_path), base_url)
+
+    assert cache.image_src("azumarill") == remote_url("azumarill", base_url)
+
+    cache.prefetch(["azumarill"])
+    assert cache.image_src("azumarill").startswith("data:image/png;base64,")
+    assert cache.image_src("skarmory") == f"{base_url}/skarmory.png"
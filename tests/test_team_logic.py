@@ -0,0 +1,195 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from data_loader import MatchupMatrix, process_entry
+from team_logic import THREAT_BONUS, TeamAnalyzer
+from type_engine import ALL_TYPES, TYPE_CHART
+
+
+# Reference implementations: the per-type loops TeamAnalyzer used before the
+# bitmask rewrite. The fast paths must give exactly the same results.
+
+def baseline_weaknesses(types):
+    weaknesses = []
+    for attacker_type in ALL_TYPES:
+        multiplier = 1.0
+        for defender_type in types:
+            multiplier *= TYPE_CHART[attacker_type].get(defender_type.lower(), 1.0)
+        if multiplier > 1.0:
+            weaknesses.append(attacker_type)
+    return weaknesses
+
+
+def baseline_evaluate_coverage(team_list):
+    weakness_counts = {}
+    for pokemon in team_list:
+        for weakness in pokemon.get("weaknesses", []):
+            weakness_counts[weakness] = weakness_counts.get(weakness, 0) + 1
+    shared_weaknesses = [w for w, count in weakness_counts.items() if count >= 2]
+
+    covered_types = set()
+    team_move_types = {m_type for pokemon in team_list for m_type in pokemon.get("move_types", [])}
+    for move_type in team_move_types:
+        move_type = move_type.lower()
+        if move_type in TYPE_CHART:
+            for defender_type, multiplier in TYPE_CHART[move_type].items():
+                if multiplier > 1.0:
+                    covered_types.add(defender_type)
+    uncovered_types = [t for t in ALL_TYPES if t not in covered_types]
+
+    total_rating = sum(p.get("rating", 0) for p in team_list)
+    return {
+        "shared_weaknesses": shared_weaknesses,
+        "uncovered_types": uncovered_types,
+        "safety_score": round(total_rating / len(team_list), 1),
+        "team_size": len(team_list)
+    }
+
+
+def hand_built(name, types, move_types, rating):
+    """A Pokemon dictionary without the loader's precomputed masks."""
+    return {"name": name, "speciesId": name.lower(), "types": types, "move_types": move_types,
+            "weaknesses": baseline_weaknesses(types), "rating": rating}
+
+
+def loaded(name, types, move_types, rating):
+    """The same Pokemon as data_loader builds it, masks included."""
+    moves = [f"MOVE_{t.upper()}" for t in move_types]
+    entry = {"speciesId": name.lower(), "speciesName": name, "score": rating, "moveset": moves}
+    return process_entry(entry, {name.lower(): types}, dict(zip(moves, move_types)))
+
+
+# Real Great League cores: (name, types, move types of the pvpoke default moveset, rating)
+REAL_TEAMS = [
+    [("Registeel", ["steel"], ["normal", "fighting", "electric"], 90),
+     ("Altaria", ["dragon", "flying"], ["dragon", "flying", "fairy"], 88),
+     ("Swampert", ["water", "ground"], ["ground", "water", "poison"], 92)],
+    [("Medicham", ["fighting", "psychic"], ["psychic", "ice", "fighting"], 95.3),
+     ("Azumarill", ["water", "fairy"], ["fairy", "ice", "fairy"], 94.1),
+     ("Skarmory", ["steel", "flying"], ["flying", "flying", "dark"], 91.7)],
+    [("Galvantula", ["bug", "electric"], ["electric", "bug", "electric"], 88.2),
+     ("Lanturn", ["water", "electric"], ["electric", "water", "water"], 92.6),
+     ("Trevenant", ["ghost", "grass"], ["ghost", "grass", "ghost"], 89.9)],
+    [("Sableye", ["dark", "ghost"], ["ghost", "dark", "ghost"], 86.0),
+     ("Whiscash", ["water", "ground"], ["ground", "ground", "grass"], 90.4),
+     ("Bastiodon", ["rock", "steel"], ["dragon", "rock", "steel"], 89.1)],
+    [("Talonflame", ["fire", "flying"], ["fire", "flying", "fire"], 87.5),
+     ("Charizard", ["fire", "flying"], ["fire", "dragon", "fire"], 85.0),
+     ("Ninetales", ["fire"], ["fire", "dark", "psychic"], 83.3)],
+    [("Clefable", ["fairy"], ["fairy", "fairy", "psychic"], 84.8),
+     ("Deoxys", ["psychic"], ["psychic", "normal"], 86.6)],
+    [("Froslass", ["ice", "ghost"], ["ice", "ghost", "ice"], 88.8)]
+]
+
+
+@pytest.mark.parametrize("build", [hand_built, loaded])
+@pytest.mark.parametrize("team", REAL_TEAMS, ids=lambda team: "-".join(p[0] for p in team))
+def test_evaluate_coverage_matches_baseline_on_real_teams(team, build):
+    team_list = [build(*p) for p in team]
+
+    assert TeamAnalyzer().evaluate_coverage(team_list) == baseline_evaluate_coverage(team_list)
+
+
+def test_evaluate_coverage_matches_baseline_on_every_type_combination():
+    combinations = [[t] for t in ALL_TYPES] + [list(pair) for pair in itertools.combinations(ALL_TYPES, 2)]
+    rng = random.Random(9)
+    analyzer = TeamAnalyzer()
+    for n in range(2000):
+        team_list = []
+        for i in range(rng.choice((1, 2, 3, 3))):
+            types = rng.choice(combinations)
+            move_types = rng.sample(ALL_TYPES, rng.randint(0, 3))
+            build = loaded if n % 2 else hand_built
+            team_list.append(build(f"mon{n}_{i}", types, move_types, round(rng.uniform(60, 100), 1)))
+        assert analyzer.evaluate_coverage(team_list) == baseline_evaluate_coverage(team_list), team_list
+
+
+def baseline_suggest_teammate(current_team, all_pokemon, top_n=5):
+    """The per-candidate scoring loop, on private copies of the candidates."""
+    current_analysis = baseline_evaluate_coverage(current_team)
+    current_weaknesses = set(current_analysis["shared_weaknesses"])
+    current_uncovered = set(current_analysis["uncovered_types"])
+
+    suggestions = []
+    for candidate in all_pokemon:
+        if any(p["speciesId"] == candidate["speciesId"] for p in current_team):
+            continue
+        if candidate.get("rating", 0) < 80:
+            continue
+        score = 0
+        score += candidate.get("rating", 0)
+        new_analysis = baseline_evaluate_coverage(list(current_team) + [candidate])
+        score -= len(set(new_analysis["shared_weaknesses"])) * 50
+        covered_by_candidate = set()
+        for m_type in set(candidate.get("move_types", [])):
+            if m_type in TYPE_CHART:
+                for defender, mult in TYPE_CHART[m_type].items():
+                    if mult > 1.0:
+                        covered_by_candidate.add(defender)
+        score += len(covered_by_candidate & current_uncovered) * 10
+        for weak_type in current_weaknesses:
+            multiplier = 1.0
+            for t in candidate.get("types", []):
+                multiplier *= TYPE_CHART[weak_type].get(t, 1.0)
+            if multiplier < 1.0:
+                score += 30
+        suggestions.append({**candidate, "match_score": score})
+    suggestions.sort(key=lambda x: x["match_score"], reverse=True)
+    return suggestions[:top_n]
+
+
+def make_dataset(build, size, seed, ratings=None):
+    combinations = [[t] for t in ALL_TYPES] + [list(pair) for pair in itertools.combinations(ALL_TYPES, 2)]
+    rng = random.Random(seed)
+    return [
+        build(f"mon{i}", rng.choice(combinations), rng.sample(ALL_TYPES, rng.randint(1, 3)),
+              rng.choice(ratings) if ratings else round(rng.uniform(70, 100), 1))
+        for i in range(size)
+    ]
+
+
+@pytest.mark.parametrize("build", [hand_built, loaded])
+@pytest.mark.parametrize("ratings", [None, (80, 85, 90)], ids=["float-ratings", "tied-ratings"])
+@pytest.mark.parametrize("seed", range(5))
+def test_suggest_teammate_matches_baseline(build, ratings, seed):
+    # Few distinct integer ratings make many candidates tie on score
+    pokemon = make_dataset(build, 150, seed, ratings)
+    analyzer = TeamAnalyzer()
+    rng = random.Random(seed)
+    for team_size in (1, 2):
+        team = rng.sample(pokemon, team_size)
+
+        expected = baseline_suggest_teammate(team, pokemon, top_n=len(pokemon))
+        positions, scores = analyzer.score_candidates(team, pokemon)
+        assert {pokemon[p]["speciesId"]: s for p, s in zip(positions, scores.tolist())} == \
+            {p["speciesId"]: p["match_score"] for p in expected}
+
+        for top_n in (1, 5, 40, len(pokemon)):
+            suggestions = analyzer.suggest_teammate(team, pokemon, top_n=top_n)
+            assert [(p["speciesId"], p["match_score"]) for p in suggestions] == \
+                [(p["speciesId"], p["match_score"]) for p in expected[:top_n]]
+
+
+def test_answers_to_unanswered_threats_rank_higher():
+    team = [loaded("Lead", ["normal"], ["normal"], 90)]
+    favourite = loaded("Favourite", ["water"], ["water"], 95)
+    answer = loaded("Answer", ["water"], ["water"], 90)
+    threat = loaded("Threat", ["water"], ["water"], 99)
+    pokemon = [threat, favourite, answer] + team
+    ids = [p["speciesId"] for p in pokemon]
+    # Only "Answer" beats the top threat, which the lead loses to
+    ratings = np.full((4, 4), 500, dtype=np.float32)
+    ratings[0, 3], ratings[3, 0] = 700, 300
+    ratings[2, 0], ratings[0, 2] = 600, 400
+    matchups = MatchupMatrix("m1", ids, ids, ratings)
+    analyzer = TeamAnalyzer()
+
+    plain = {p["name"]: p["match_score"] for p in analyzer.suggest_teammate(team, pokemon, top_n=3)}
+    suggested = analyzer.suggest_teammate(team, pokemon, top_n=3, matchups=matchups)
+    scores = {p["name"]: p["match_score"] for p in suggested}
+    assert plain["Favourite"] > plain["Answer"]
+    assert [p["name"] for p in suggested] == ["Answer", "Threat", "Favourite"]
+    assert scores == {**plain, "Answer": plain["Answer"] + THREAT_BONUS}
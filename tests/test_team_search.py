@@ -0,0 +1,120 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from conftest import make_gamemaster, make_rankings
+from data_loader import MatchupMatrix, build_league
+from team_logic import THREAT_BONUS, THREAT_COUNT, TeamAnalyzer
+from team_search import search_teams
+from type_engine import ALL_TYPES_MASK
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def brute_force_threats(seed, additions, matchups):
+    """Unanswered top threats of the seed (see threat_report) that any addition beats."""
+    seed_ids = [p["speciesId"] for p in seed]
+    threats = [j for j, species_id in enumerate(matchups.species_ids) if species_id not in seed_ids][:THREAT_COUNT]
+    rows = [matchups.index[i] for i in seed_ids if i in matchups.index]
+    unanswered = [j for j in threats if not any(matchups.ratings[r, j] > 500 for r in rows)]
+    rows = [matchups.index[p["speciesId"]] for p in additions if p["speciesId"] in matchups.index]
+    return sum(any(matchups.ratings[r, j] > 500 for r in rows) for j in unanswered)
+
+
+def brute_force_score(seed, additions, matchups=None):
+    """The search_teams score of one completion, computed directly from the dictionaries."""
+    seen = shared = covered = 0
+    for p in seed:
+        shared |= seen & p["weakness_mask"]
+        seen |= p["weakness_mask"]
+        covered |= p["coverage_mask"]
+    seed_shared, uncovered = shared, ALL_TYPES_MASK & ~covered
+
+    team_seen, team_shared, gap_cover = seen, shared, 0
+    score = 0.0
+    for p in additions:
+        team_shared |= team_seen & p["weakness_mask"]
+        team_seen |= p["weakness_mask"]
+        gap_cover |= p["coverage_mask"] & uncovered
+        score += p["rating"] + popcount(p["resistance_mask"] & seed_shared) * 30
+    score += popcount(gap_cover) * 10 - popcount(team_shared) * 50
+    if matchups is not None:
+        score += brute_force_threats(seed, additions, matchups) * THREAT_BONUS
+    return score
+
+
+def brute_force(seed, pokemon, matchups=None):
+    seed_ids = {p["speciesId"] for p in seed}
+    candidates = [p for p in pokemon if p["rating"] >= 80 and p["speciesId"] not in seed_ids]
+    size = 3 - len(seed)
+    combos = itertools.combinations(candidates, size)
+    return sorted((brute_force_score(seed, combo, matchups) for combo in combos), reverse=True)
+
+
+@pytest.fixture(scope="module")
+def pokemon():
+    gamemaster = make_gamemaster(species_count=60, seed=11)
+    data, _ = build_league(make_rankings(gamemaster, seed=11), gamemaster)
+    return data
+
+
+@pytest.mark.parametrize("seed_positions", [(0,), (5,), (17,), (0, 1), (3, 40)])
+@pytest.mark.parametrize("k", [1, 5])
+def test_search_matches_brute_force(pokemon, seed_positions, k):
+    seed = [pokemon[i] for i in seed_positions]
+
+    result = search_teams(TeamAnalyzer(), seed, pokemon, k=k, time_budget=60)
+
+    expected = brute_force(seed, pokemon)[:k]
+    assert result["complete"]
+    assert [team["score"] for team in result["teams"]] == pytest.approx(expected)
+    for team in result["teams"]:
+        assert team["members"][:len(seed)] == seed
+        assert team["score"] == pytest.approx(brute_force_score(seed, team["additions"]))
+        ids = [p["speciesId"] for p in team["members"]]
+        assert len(set(ids)) == 3
+
+
+@pytest.fixture(scope="module")
+def matchups(pokemon):
+    """Random ratings between the top 45 species; the rest are missing from the matrix."""
+    rng = np.random.default_rng(7)
+    ids = [p["speciesId"] for p in pokemon[:45]]
+    ratings = rng.integers(100, 900, size=(len(ids), len(ids))).astype(np.float32)
+    ratings[rng.random(ratings.shape) < 0.1] = np.nan
+    return MatchupMatrix("m1", ids, ids, ratings)
+
+
+@pytest.mark.parametrize("seed_positions", [(0,), (17,), (50,), (0, 1), (3, 40)])
+def test_search_with_threats_matches_brute_force(pokemon, matchups, seed_positions):
+    seed = [pokemon[i] for i in seed_positions]
+
+    result = search_teams(TeamAnalyzer(), seed, pokemon, k=5, time_budget=60, matchups=matchups)
+
+    assert result["complete"]
+    assert [team["score"] for team in result["teams"]] == pytest.approx(brute_force(seed, pokemon, matchups)[:5])
+    for team in result["teams"]:
+        assert team["score"] == pytest.approx(brute_force_score(seed, team["additions"], matchups))
+
+
+def test_teams_are_distinct(pokemon):
+    result = search_teams(TeamAnalyzer(), pokemon[:1], pokemon, k=10, time_budget=60)
+
+    picks = [frozenset(p["speciesId"] for p in team["additions"]) for team in result["teams"]]
+    assert len(picks) == 10 and len(set(picks)) == 10
+
+
+def test_additions_are_copies(pokemon):
+    result = search_teams(TeamAnalyzer(), pokemon[:1], pokemon, k=1, time_budget=60)
+
+    addition = result["teams"][0]["additions"][0]
+    addition["rating"] = -1
+    assert all(p["rating"] != -1 for p in pokemon)
+
+
+def test_seed_size_is_checked(pokemon):
+    with pytest.raises(ValueError):
+        search_teams(TeamAnalyzer(), pokemon[:3], pokemon)
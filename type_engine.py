@@ -0,0 +1,127 @@
+from functools import lru_cache
+from itertools import combinations
+
+# Type effectiveness chart (Attacker -> Defender multipliers)
+# 2.0: Super Effective, 0.5: Not Very Effective, 0.390625: Immune (approx 0.39)
+# We only care about weaknesses (multiplier > 1.0)
+TYPE_CHART = {
+    "normal": {"rock": 0.5, "ghost": 0.39, "steel": 0.5},
+    "fire": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 2.0, "bug": 2.0, "rock": 0.5, "dragon": 0.5, "steel": 2.0},
+    "water": {"fire": 2.0, "water": 0.5, "grass": 0.5, "ground": 2.0, "rock": 2.0, "dragon": 0.5},
+    "grass": {"fire": 0.5, "water": 2.0, "grass": 0.5, "poison": 0.5, "ground": 2.0, "flying": 0.5, "bug": 0.5, "rock": 2.0, "dragon": 0.5, "steel": 0.5},
+    "electric": {"water": 2.0, "grass": 0.5, "electric": 0.5, "ground": 0.39, "flying": 2.0, "dragon": 0.5},
+    "ice": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 0.5, "ground": 2.0, "flying": 2.0, "dragon": 2.0, "steel": 0.5},
+    "fighting": {"normal": 2.0, "ice": 2.0, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2.0, "ghost": 0.0, "dark": 2.0, "steel": 2.0, "fairy": 0.5},
+    "poison": {"grass": 2.0, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0.0, "fairy": 2.0},
+    "ground": {"fire": 2.0, "grass": 0.5, "electric": 2.0, "poison": 2.0, "flying": 0.0, "bug": 0.5, "rock": 2.0, "steel": 2.0},
+    "flying": {"grass": 2.0, "electric": 0.5, "fighting": 2.0, "bug": 2.0, "rock": 0.5, "steel": 0.5},
+    "psychic": {"fighting": 2.0, "poison": 2.0, "psychic": 0.5, "dark": 0.0, "steel": 0.5},
+    "bug": {"fire": 0.5, "grass": 2.0, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2.0, "ghost": 0.5, "dark": 2.0, "steel": 0.5, "fairy": 0.5},
+    "rock": {"fire": 2.0, "ice": 2.0, "fighting": 0.5, "ground": 0.5, "flying": 2.0, "bug": 2.0, "steel": 0.5},
+    "ghost": {"normal": 0.0, "psychic": 2.0, "ghost": 2.0, "dark": 0.5},
+    "dragon": {"dragon": 2.0, "steel": 0.5, "fairy": 0.0},
+    "dark": {"fighting": 0.5, "psychic": 2.0, "ghost": 2.0, "dark": 0.5, "fairy": 0.5},
+    "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2.0, "rock": 2.0, "steel": 0.5, "fairy": 2.0},
+    "fairy": {"fire": 0.5, "fighting": 2.0, "poison": 0.5, "dragon": 2.0, "dark": 2.0, "steel": 0.5}
+}
+
+ALL_TYPES = list(TYPE_CHART.keys())
+
+TYPE_INDEX = {t: i for i, t in enumerate(ALL_TYPES)}
+TYPE_BITS = tuple(1 << i for i in range(len(ALL_TYPES)))
+ALL_TYPES_MASK = (1 << len(ALL_TYPES)) - 1
+
+# 18x18 effectiveness matrix: EFFECTIVENESS[attacker][defender]
+EFFECTIVENESS = tuple(
+    tuple(TYPE_CHART[attacker].get(defender, 1.0) for defender in ALL_TYPES)
+    for attacker in ALL_TYPES
+)
+
+# Same matrix with Pokemon GO's damage multipliers (super effective 1.6,
+# not very effective 0.625, immune 0.390625), used for damage calculations
+GO_EFFECTIVENESS = tuple(
+    tuple(1.6 if m > 1.0 else 0.625 if m == 0.5 else 0.390625 if m < 0.5 else 1.0 for m in row)
+    for row in EFFECTIVENESS
+)
+
+# COVERAGE_MASKS[attacker]: defender types this attacking type hits super effectively
+COVERAGE_MASKS = tuple(
+    sum(TYPE_BITS[d] for d, multiplier in enumerate(row) if multiplier > 1.0)
+    for row in EFFECTIVENESS
+)
+
+
+def types_to_mask(types):
+    """Bitmask over ALL_TYPES (bit i set for ALL_TYPES[i]); unknown types are ignored."""
+    mask = 0
+    for t in types:
+        index = TYPE_INDEX.get(t)
+        if index is not None:
+            mask |= TYPE_BITS[index]
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def mask_to_types(mask):
+    """Types whose bits are set in mask, in ALL_TYPES order."""
+    return tuple(t for i, t in enumerate(ALL_TYPES) if mask & TYPE_BITS[i])
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def coverage_mask(move_types):
+    """Defender types hit super effectively by at least one of move_types."""
+    mask = 0
+    for move_type in move_types:
+        index = TYPE_INDEX.get(move_type.lower())
+        if index is not None:
+            mask |= COVERAGE_MASKS[index]
+    return mask
+
+
+class DefensiveProfile:
+    """Incoming damage multipliers and weakness/resistance masks for one type combination."""
+
+    __slots__ = ("types", "multipliers", "weakness_mask", "resistance_mask", "weaknesses", "resistances")
+
+    def __init__(self, type_indices):
+        self.types = tuple(ALL_TYPES[i] for i in type_indices)
+        multipliers = []
+        for attacker in range(len(ALL_TYPES)):
+            multiplier = 1.0
+            for defender in type_indices:
+                multiplier *= EFFECTIVENESS[attacker][defender]
+            multipliers.append(multiplier)
+        self.multipliers = tuple(multipliers)
+        self.weakness_mask = sum(TYPE_BITS[a] for a, m in enumerate(multipliers) if m > 1.0)
+        self.resistance_mask = sum(TYPE_BITS[a] for a, m in enumerate(multipliers) if m < 1.0)
+        self.weaknesses = mask_to_types(self.weakness_mask)
+        self.resistances = mask_to_types(self.resistance_mask)
+
+
+# All 171 single and dual-type defensive profiles, keyed by sorted type indices
+PROFILES = {(i,): DefensiveProfile((i,)) for i in range(len(ALL_TYPES))}
+PROFILES.update({pair: DefensiveProfile(pair) for pair in combinations(range(len(ALL_TYPES)), 2)})
+NEUTRAL_PROFILE = DefensiveProfile(())
+
+
+def profile_for(types):
+    """
+    Returns the DefensiveProfile for a list of defender types.
+
+    Types outside the chart (such as pvpoke's "none") are neutral and ignored,
+    matching the original per-type multiplication.
+    """
+    indices = []
+    for t in types:
+        index = TYPE_INDEX.get(t.lower())
+        if index is not None:
+            indices.append(index)
+    key = tuple(sorted(indices))
+    profile = PROFILES.get(key)
+    if profile is None:
+        # No known types, a repeated type or more than two types
+        profile = NEUTRAL_PROFILE if not key else DefensiveProfile(key)
+    return profile